@@ -0,0 +1,76 @@
+import asyncio
+import os
+from logging.config import fileConfig
+
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from alembic import context
+
+from app.db.session import Base
+# Модели регистрируют свои таблицы в Base.metadata при импорте
+from app.models import activity, change, task, time_entry, user  # noqa: F401
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # Триграммные GIN-индексы Postgres создаются вручную и в метаданных не описаны
+    return not (type_ == "index" and reflected and name.endswith("_trgm"))
+
+
+def database_url() -> str:
+    """URL из конфигурации (например, в тестах) или из DATABASE_URL, как у приложения."""
+    return config.get_main_option("sqlalchemy.url") or os.environ["DATABASE_URL"]
+
+
+def run_migrations_offline() -> None:
+    """Генерирует SQL без подключения к базе (alembic upgrade head --sql)."""
+    context.configure(
+        url=database_url(),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        # SQLite не умеет большинство ALTER TABLE: Alembic пересоздает таблицу целиком
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    connectable = create_async_engine(database_url(), poolclass=pool.NullPool)
+
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
+
+
+def run_migrations_online() -> None:
+    asyncio.run(run_async_migrations())
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
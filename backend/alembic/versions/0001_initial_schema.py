@@ -0,0 +1,81 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Схема, которую до перехода на Alembic создавал create_all при старте: существующую
+базу достаточно один раз пометить командой alembic stamp 0001. Все последующие
+изменения схемы — в следующих ревизиях.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("first_name", sa.String(), nullable=True),
+        sa.Column("last_name", sa.String(), nullable=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("avatar_url", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_first_name", "users", ["first_name"])
+    op.create_index("ix_users_last_name", "users", ["last_name"])
+
+    op.create_table(
+        "tasks",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("status", sa.Enum("todo", "in_progress", "done", name="taskstatus"), nullable=True),
+        sa.Column(
+            "type",
+            sa.Enum("development", "analytics", "documentation", "testing", name="tasktype"),
+            nullable=True,
+        ),
+        sa.Column("priority", sa.String(), nullable=False),
+        sa.Column("time_spent", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("creator_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["creator_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_tasks_id", "tasks", ["id"])
+    op.create_index("ix_tasks_title", "tasks", ["title"])
+    op.create_index("ix_tasks_priority", "tasks", ["priority"])
+
+    op.create_table(
+        "task_assignees",
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["task_id"], ["tasks.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("task_id", "user_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("task_assignees")
+    op.drop_table("tasks")
+    op.drop_table("users")
+    if is_postgresql():
+        op.execute("DROP TYPE IF EXISTS taskstatus")
+        op.execute("DROP TYPE IF EXISTS tasktype")
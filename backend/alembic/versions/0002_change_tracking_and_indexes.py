@@ -0,0 +1,159 @@
+"""change tracking, time entries and query indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+Все, что появилось в моделях после базовой схемы 0001:
+- tasks.priority_rank (заполняется из priority), updated_at и change_seq у задач
+  и пользователей (заполняются текущим временем и последовательностью change_seq);
+- журнал времени time_entries и надгробия tombstones для дельта-синхронизации;
+- индексы под запросы tasks_service: задачи исполнителя, фильтры по создателю и колонке,
+  сортировки списков и триграммный поиск в Postgres.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Ранги приоритетов на момент ревизии (app/models/task.py); неизвестный приоритет — в конец
+PRIORITY_RANKS = {"high": 0, "medium": 1, "low": 2}
+DEFAULT_PRIORITY_RANK = 3
+
+
+def is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def backfill_change_seq(table: sa.Table) -> None:
+    """Раздает существующим строкам значения change_seq, большие всех уже выданных."""
+    if is_postgresql():
+        op.execute(table.update().values(change_seq=sa.func.nextval("change_seq")))
+        return
+    # В SQLite последовательностей нет: новые значения продолжают максимум по уже заполненным таблицам
+    filled = sa.union_all(*(
+        sa.select(sa.func.max(sa.column("change_seq")).label("seq")).select_from(sa.table(name))
+        for name in ("users", "tasks") if name != table.name
+    )).subquery()
+    offset = sa.select(sa.func.coalesce(sa.func.max(filled.c.seq), 0)).scalar_subquery()
+    op.execute(table.update().values(change_seq=offset + table.c.id))
+
+
+def upgrade() -> None:
+    if is_postgresql():
+        op.execute(sa.schema.CreateSequence(sa.Sequence("change_seq")))
+
+    # Новые NOT NULL колонки: сначала без ограничения, затем заполнение и NOT NULL
+    for table_name in ("users", "tasks"):
+        with op.batch_alter_table(table_name) as batch_op:
+            if table_name == "tasks":
+                batch_op.add_column(sa.Column("priority_rank", sa.Integer(), nullable=True))
+            batch_op.add_column(sa.Column("updated_at", sa.DateTime(), nullable=True))
+            batch_op.add_column(sa.Column("change_seq", sa.BigInteger(), nullable=True))
+
+    users = sa.table(
+        "users", sa.column("id", sa.Integer()), sa.column("updated_at", sa.DateTime()),
+        sa.column("change_seq", sa.BigInteger()),
+    )
+    tasks = sa.table(
+        "tasks", sa.column("id", sa.Integer()), sa.column("priority", sa.String()),
+        sa.column("priority_rank", sa.Integer()), sa.column("updated_at", sa.DateTime()),
+        sa.column("change_seq", sa.BigInteger()),
+    )
+    op.execute(users.update().values(updated_at=sa.func.now()))
+    backfill_change_seq(users)
+    op.execute(tasks.update().values(
+        priority_rank=sa.case(PRIORITY_RANKS, value=tasks.c.priority, else_=DEFAULT_PRIORITY_RANK),
+        updated_at=sa.func.now(),
+    ))
+    backfill_change_seq(tasks)
+
+    for table_name in ("users", "tasks"):
+        with op.batch_alter_table(table_name) as batch_op:
+            if table_name == "tasks":
+                batch_op.alter_column("priority_rank", existing_type=sa.Integer(), nullable=False)
+            batch_op.alter_column("updated_at", existing_type=sa.DateTime(), nullable=False)
+            batch_op.alter_column("change_seq", existing_type=sa.BigInteger(), nullable=False)
+
+    op.create_index("ix_users_change_seq", "users", ["change_seq"])
+    op.create_index("ix_tasks_change_seq", "tasks", ["change_seq"])
+    # Фильтры по создателю и по колонке доски
+    op.create_index("ix_tasks_creator_id", "tasks", ["creator_id"])
+    op.create_index("ix_tasks_status", "tasks", ["status"])
+    # Сортировки списков и keyset-пагинация (см. TASK_SORTS)
+    op.create_index(
+        "ix_tasks_priority_rank_created_at_id",
+        "tasks",
+        ["priority_rank", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    op.create_index("ix_tasks_created_at_id", "tasks", ["created_at", "id"])
+    if is_postgresql():
+        # Поиск по подстроке (ILIKE) через триграммы
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX ix_tasks_title_trgm ON tasks USING gin (title gin_trgm_ops)")
+        op.execute("CREATE INDEX ix_tasks_description_trgm ON tasks USING gin (description gin_trgm_ops)")
+    # Задачи исполнителя: первичный ключ начинается с task_id и здесь не помогает
+    op.create_index("ix_task_assignees_user_id_task_id", "task_assignees", ["user_id", "task_id"])
+
+    op.create_table(
+        "time_entries",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("hours", sa.Float(), nullable=False),
+        sa.Column("rolled_up", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["task_id"], ["tasks.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_time_entries_id", "time_entries", ["id"])
+    op.create_index("ix_time_entries_task_id", "time_entries", ["task_id"])
+    op.create_index("ix_time_entries_user_id", "time_entries", ["user_id"])
+    pending = sa.column("rolled_up").is_(sa.false())
+    op.create_index(
+        "ix_time_entries_pending", "time_entries", ["id"], postgresql_where=pending, sqlite_where=pending
+    )
+
+    op.create_table(
+        "tombstones",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("entity", sa.String(), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("change_seq", sa.BigInteger(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_tombstones_change_seq", "tombstones", ["change_seq"])
+
+
+def downgrade() -> None:
+    op.drop_table("tombstones")
+    op.drop_table("time_entries")
+
+    op.drop_index("ix_task_assignees_user_id_task_id", table_name="task_assignees")
+    if is_postgresql():
+        op.execute("DROP INDEX IF EXISTS ix_tasks_title_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_tasks_description_trgm")
+    for index_name in (
+        "ix_tasks_created_at_id", "ix_tasks_priority_rank_created_at_id", "ix_tasks_status",
+        "ix_tasks_creator_id", "ix_tasks_change_seq",
+    ):
+        op.drop_index(index_name, table_name="tasks")
+    op.drop_index("ix_users_change_seq", table_name="users")
+
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_column("change_seq")
+        batch_op.drop_column("updated_at")
+        batch_op.drop_column("priority_rank")
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("change_seq")
+        batch_op.drop_column("updated_at")
+    if is_postgresql():
+        op.execute(sa.schema.DropSequence(sa.Sequence("change_seq")))
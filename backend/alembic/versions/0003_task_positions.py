@@ -0,0 +1,84 @@
+"""task positions
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+Ручной порядок карточек в колонке: tasks.position (дробный ключ, см. app/core/ranking.py)
+и индекс (status, position). Существующие задачи расставляются в текущем порядке доски
+(приоритет, затем новые). Расстановка ключей скопирована из app/core/ranking.py на момент
+ревизии: миграция не должна меняться вместе с кодом приложения.
+"""
+from typing import List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+# Ключ карточки в пустой колонке (середина алфавита ключей)
+FIRST_RANK = "i"
+
+
+def spread_ranks(count: int) -> List[str]:
+    """count равномерно распределенных ключей одинаковой длины, без нулей в конце."""
+    base = len(DIGITS)
+    width = 1
+    while base ** width <= count * 2:
+        width += 1
+    step = base ** width // (count + 1)
+    ranks = []
+    for index in range(1, count + 1):
+        value, digits = index * step, []
+        for _ in range(width):
+            value, digit = divmod(value, base)
+            digits.append(DIGITS[digit])
+        ranks.append("".join(reversed(digits)).rstrip("0"))
+    return ranks
+
+
+def is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    position_type = sa.String(collation="C") if is_postgresql() else sa.String()
+    op.add_column("tasks", sa.Column("position", position_type, nullable=False, server_default=FIRST_RANK))
+
+    tasks = sa.table(
+        "tasks",
+        sa.column("id", sa.Integer()),
+        sa.column("status", sa.String()),
+        sa.column("priority_rank", sa.Integer()),
+        sa.column("created_at", sa.DateTime()),
+        sa.column("position", sa.String()),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(tasks.c.id, tasks.c.status)
+        .order_by(tasks.c.status, tasks.c.priority_rank, tasks.c.created_at.desc(), tasks.c.id.desc())
+    ).all()
+    by_status = {}
+    for task_id, task_status in rows:
+        by_status.setdefault(task_status, []).append(task_id)
+    for task_ids in by_status.values():
+        connection.execute(
+            tasks.update().where(tasks.c.id == sa.bindparam("b_id")).values(position=sa.bindparam("b_position")),
+            [{"b_id": task_id, "b_position": rank} for task_id, rank in zip(task_ids, spread_ranks(len(task_ids)))],
+        )
+
+    # Значение по умолчанию нужно было только для существующих строк
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.alter_column("position", server_default=None)
+    op.create_index("ix_tasks_status_position", "tasks", ["status", "position"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_status_position", table_name="tasks")
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_column("position")
@@ -0,0 +1,44 @@
+"""change_seq from transaction ids
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+В Postgres change_seq теперь равен id пишущей транзакции (см. app/models/change.py), а не
+значению последовательности change_seq. Существующие строки получают id транзакции миграции:
+он меньше id всех последующих транзакций. Последовательность больше не нужна.
+В SQLite change_seq по-прежнему max + 1, менять нечего.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHANGE_TABLES = ("tasks", "users", "tombstones")
+
+
+def is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    if not is_postgresql():
+        return
+    for table_name in CHANGE_TABLES:
+        op.execute(f"UPDATE {table_name} SET change_seq = pg_current_xact_id()::text::bigint")
+    op.execute(sa.schema.DropSequence(sa.Sequence("change_seq")))
+
+
+def downgrade() -> None:
+    if not is_postgresql():
+        return
+    op.execute(sa.schema.CreateSequence(sa.Sequence("change_seq")))
+    maxes = " UNION ALL ".join(f"SELECT max(change_seq) AS seq FROM {table_name}" for table_name in CHANGE_TABLES)
+    # Новые значения последовательности должны быть больше уже выданных id транзакций
+    op.execute(f"SELECT setval('change_seq', (SELECT coalesce(max(seq), 0) + 1 FROM ({maxes}) AS maxes))")
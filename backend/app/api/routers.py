@@ -1,30 +1,169 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response, UploadFile, File
-from fastapi.staticfiles import StaticFiles
-import shutil
-import os
-from datetime import timedelta
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, UploadFile, File, Query, WebSocket, WebSocketDisconnect
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple, Union
+from fastapi.responses import RedirectResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
-from app.schemas.task import TaskCreate, TaskOut, TaskUpdate
+from app.db.session import get_db, SessionLocal
+from app.core.events import broker
+from app.core.etag import board_version, check_not_modified
+from app.core.singleflight import read_flights
+from app.core.storage import Storage, get_storage
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.schemas.task import (
+    TaskCreate, TaskOut, TaskUpdate, TaskFilter, TaskSort, TaskShape, TaskListNormalized, TaskBatch, TaskBatchResult,
+    TaskPlacement, ExportFormat, ExportReport,
+)
 from app.schemas.user import UserCreate, UserOut
 from app.schemas.token import Token
+from app.schemas.board import BoardOut
+from app.schemas.sync import SyncOut
+from app.schemas.time_entry import TimeLog, UserTimeTotal
+from app.schemas.activity import ActivityOut
 from app.services import tasks as tasks_service
+from app.services import task_cache
 from app.services import users as users_service
-from app.core.security import create_access_token, verify_password, get_current_user
-from app.models.user import User
+from app.services import board as board_service
+from app.services import sync as sync_service
+from app.services import avatars as avatars_service
+from app.services import activity as activity_service
+from app.services import export as export_service
+from app.core.security import create_access_token, get_current_user, password_hasher, user_claims
+from app.models.task import TaskStatus, TaskType
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-UPLOADS_DIR = "uploads"
-os.makedirs(UPLOADS_DIR, exist_ok=True)
+# Заголовок, в котором списки задач возвращают курсор следующей страницы
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+TASK_LIST_ADAPTER = TypeAdapter(List[TaskOut])
+
+
+def _set_next_cursor(response: Response, tasks: list, limit: int, sort: TaskSort):
+    cursor = tasks_service.tasks_next_cursor(tasks, limit, sort)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
+def _json_task_list(response: Response, body: bytes, next_page: Optional[str]) -> Response:
+    """Ответ из готового JSON (быстрый путь или кэш), с заголовками, выставленными в response."""
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    return Response(body, media_type="application/json", headers=dict(response.headers))
+
+
+async def _render_task_list(
+    db: AsyncSession,
+    limit: int,
+    cursor: Optional[str],
+    filters: TaskFilter,
+    sort: TaskSort,
+    shape: TaskShape,
+    user_id: Optional[int] = None,
+) -> Tuple[bytes, Optional[str]]:
+    """Тело списка задач в нужной форме и курсор следующей страницы."""
+    if shape is TaskShape.normalized:
+        payload, next_page = await tasks_service.get_task_rows_normalized(
+            db, limit=limit, cursor=cursor, filters=filters, sort=sort, user_id=user_id
+        )
+        return FastJSONResponse(payload).body, next_page
+    if settings.FAST_TASK_LISTS:
+        rows, next_page = await tasks_service.get_task_rows(
+            db, limit=limit, cursor=cursor, filters=filters, sort=sort, user_id=user_id
+        )
+        return FastJSONResponse(rows).body, next_page
+    tasks = await _load_tasks(db, limit, cursor, filters, sort, user_id)
+    body = TASK_LIST_ADAPTER.dump_json(TASK_LIST_ADAPTER.validate_python(tasks, from_attributes=True))
+    return body, tasks_service.tasks_next_cursor(tasks, limit, sort)
+
+
+async def _load_tasks(
+    db: AsyncSession, limit: int, cursor: Optional[str], filters: TaskFilter, sort: TaskSort, user_id: Optional[int]
+):
+    if user_id is None:
+        return await tasks_service.get_tasks(db, limit=limit, cursor=cursor, filters=filters, sort=sort)
+    return await tasks_service.get_tasks_by_assignee(
+        db, user_id=user_id, limit=limit, cursor=cursor, filters=filters, sort=sort
+    )
+
+
+async def _coalesced(key: tuple, version: int, render):
+    """
+    Выполняет render один раз на все одновременные запросы с тем же ключом. В ключ входит
+    версия доски, прочитанная запросом из базы, поэтому запрос, пришедший после записи
+    (в том числе в другом воркере), не получит результат, начатый до нее.
+    Права проверяются зависимостями каждого запроса до этого вызова.
+    """
+    return await read_flights.do((*key, version), render)
+
+
+async def _list_tasks(
+    db: AsyncSession,
+    response: Response,
+    version: int,
+    limit: int,
+    cursor: Optional[str],
+    filters: TaskFilter,
+    sort: TaskSort,
+    shape: TaskShape,
+    user_id: Optional[int] = None,
+):
+    """
+    Общая часть /tasks/ и /users/me/tasks (при user_id): выбор формы ответа и пути сериализации.
+    С включенным кэшем (TASK_CACHE_BACKEND) готовое тело ответа берется из кэша списков,
+    а одинаковые одновременные запросы (COALESCE_READS) строят его один раз.
+    """
+    key = task_cache.task_list_key(limit, cursor, filters, sort, shape, settings.FAST_TASK_LISTS)
+
+    async def render():
+        if not settings.COALESCE_READS:
+            return await _render_task_list(db, limit, cursor, filters, sort, shape, user_id)
+        return await _coalesced(
+            ("tasks", user_id, key), version, lambda: _render_task_list(db, limit, cursor, filters, sort, shape, user_id)
+        )
+
+    if task_cache.task_list_cache is not None:
+        body, next_page = await task_cache.cached_task_list(user_id, key, render)
+        return _json_task_list(response, body, next_page)
+    if shape is TaskShape.normalized or settings.FAST_TASK_LISTS or settings.COALESCE_READS:
+        body, next_page = await render()
+        return _json_task_list(response, body, next_page)
+    tasks = await _load_tasks(db, limit, cursor, filters, sort, user_id)
+    _set_next_cursor(response, tasks, limit, sort)
+    return tasks
+
+
+def task_filters(
+    status: Optional[List[TaskStatus]] = Query(None),
+    type: Optional[List[TaskType]] = Query(None),
+    priority: Optional[List[str]] = Query(None),
+    assignee_id: Optional[int] = None,
+    creator_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    q: Optional[str] = Query(None, min_length=1, max_length=100),
+) -> TaskFilter:
+    """Собирает фильтры списка задач из query-параметров."""
+    return TaskFilter(
+        status=status, type=type, priority=priority,
+        assignee_id=assignee_id, creator_id=creator_id,
+        created_from=created_from, created_to=created_to, q=q,
+    )
 
 @router.post("/auth/token", response_model=Token)
 async def login_for_access_token(db: AsyncSession = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
     user = await users_service.get_user_by_email(db, email=form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    password_ok, new_hash = (
+        await password_hasher.verify_and_update(form_data.password, user.hashed_password) if user else (False, None)
+    )
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -32,8 +171,10 @@ async def login_for_access_token(db: AsyncSession = Depends(get_db), form_data:
         )
     access_token_expires = timedelta(minutes=30)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data=user_claims(user), expires_delta=access_token_expires
     )
+    if new_hash:
+        await users_service.update_password_hash(db, user, new_hash)
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/users/", response_model=UserOut, status_code=status.HTTP_201_CREATED)
@@ -45,61 +186,184 @@ async def create_user_endpoint(user: UserCreate, db: AsyncSession = Depends(get_
 
 @router.get("/users/", response_model=List[UserOut])
 async def read_users_endpoint(
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserOut = Depends(get_current_user)
 ):
+    if not_modified := check_not_modified(request, response, await board_version.read(db)):
+        return not_modified
     return await users_service.get_users(db)
 
 @router.get("/users/me", response_model=UserOut)
-async def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: UserOut = Depends(get_current_user)):
     return current_user
 
 @router.post("/users/me/avatar", response_model=UserOut)
 async def upload_avatar_endpoint(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: UserOut = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    storage: Storage = Depends(get_storage)
 ):
-    file_path = os.path.join(UPLOADS_DIR, f"{current_user.id}_{file.filename}")
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    return await users_service.update_avatar(db, user=current_user, avatar_path=file_path)
+    """Загружает аватар: файл сохраняется по хешу содержимого, в профиль пишется его URL."""
+    avatar_url = await avatars_service.save_avatar(file, storage)
+    return await users_service.update_avatar(db, user_id=current_user.id, avatar_path=avatar_url)
+
+
+@router.get("/files/{key:path}", include_in_schema=False)
+async def read_file_endpoint(key: str, storage: Storage = Depends(get_storage)):
+    """
+    Перенаправляет на файл в хранилище (presigned URL для S3), чтобы байты не шли через приложение.
+    Ключи содержат хеш содержимого, поэтому браузер может кэшировать сам редирект.
+    """
+    return RedirectResponse(
+        await storage.download_url(key),
+        status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+        headers={"Cache-Control": f"private, max-age={storage.redirect_max_age}"},
+    )
 
-@router.get("/users/me/tasks", response_model=List[TaskOut])
+@router.get("/users/me/tasks", response_model=Union[List[TaskOut], TaskListNormalized])
 async def read_my_tasks_endpoint(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: TaskSort = TaskSort.priority,
+    shape: TaskShape = TaskShape.full,
+    filters: TaskFilter = Depends(task_filters),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserOut = Depends(get_current_user)
 ):
     """
     Возвращает задачи, созданные текущим пользователем или назначенные ему.
+    Курсор следующей страницы передается в заголовке X-Next-Cursor.
     """
-    return await tasks_service.get_tasks_by_assignee(db, user_id=current_user.id)
-
-# router.mount("/uploads", StaticFiles(directory=UPLOADS_DIR), name="uploads")
+    version = await board_version.read(db)
+    if not_modified := check_not_modified(request, response, version, current_user.id):
+        return not_modified
+    return await _list_tasks(db, response, version, limit, cursor, filters, sort, shape, user_id=current_user.id)
 
 
 @router.post("/tasks/", response_model=TaskOut, status_code=status.HTTP_201_CREATED)
 async def create_task_endpoint(
     task: TaskCreate, 
     db: AsyncSession = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    current_user: UserOut = Depends(get_current_user),
+    users: users_service.UserLoader = Depends(users_service.get_user_loader),
+):
+    return await tasks_service.create_task(db=db, task=task, creator_id=current_user.id, users=users)
+
+@router.post("/tasks/batch", response_model=TaskBatchResult)
+async def batch_tasks_endpoint(
+    batch: TaskBatch,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user),
+    users: users_service.UserLoader = Depends(users_service.get_user_loader),
 ):
-    return await tasks_service.create_task(db=db, task=task, creator_id=current_user.id)
+    """
+    Создает, обновляет, перемещает и удаляет задачи пакетом в одной транзакции.
+    Для каждой операции возвращается свой результат с HTTP-кодом.
+    """
+    results = await tasks_service.apply_task_batch(db, batch, current_user, users=users)
+    return TaskBatchResult(results=results)
 
-@router.get("/tasks/", response_model=List[TaskOut])
+@router.get("/tasks/", response_model=Union[List[TaskOut], TaskListNormalized])
 async def read_tasks_endpoint(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: TaskSort = TaskSort.priority,
+    shape: TaskShape = TaskShape.full,
+    filters: TaskFilter = Depends(task_filters),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user) 
+    current_user: UserOut = Depends(get_current_user) 
 ):
-    return await tasks_service.get_tasks(db)
+    """
+    Возвращает страницу задач с фильтрами, поиском и сортировкой.
+    Курсор следующей страницы передается в заголовке X-Next-Cursor.
+    С ?shape=normalized пользователи отдаются один раз в словаре users, а задачи ссылаются на них по id.
+    Повторный запрос с If-None-Match получает 304, пока доска не менялась.
+    """
+    version = await board_version.read(db)
+    if not_modified := check_not_modified(request, response, version):
+        return not_modified
+    return await _list_tasks(db, response, version, limit, cursor, filters, sort, shape)
+
+@router.get("/tasks/export", response_class=StreamingResponse)
+async def export_tasks_endpoint(
+    format: ExportFormat = ExportFormat.csv,
+    report: ExportReport = ExportReport.tasks,
+    sort: TaskSort = TaskSort.priority,
+    filters: TaskFilter = Depends(task_filters),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user)
+):
+    """
+    Выгружает все задачи (или отчет по времени, ?report=time) в CSV или NDJSON потоком,
+    без пагинации. Фильтры и сортировка — как у /tasks/.
+    Сессия из get_db закрывается после отправки ответа (FastAPI >= 0.118, см. requirements.txt),
+    поэтому генератор может читать из нее.
+    """
+    body = export_service.export_tasks(db, format, report=report, filters=filters, sort=sort)
+    filename = f"{report.value}.{format.value}"
+    return StreamingResponse(
+        body,
+        media_type=export_service.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/board", response_model=BoardOut)
+async def read_board_endpoint(
+    request: Request,
+    response: Response,
+    per_column: int = Query(20, ge=1, le=100),
+    sort: TaskSort = TaskSort.priority,
+    filters: TaskFilter = Depends(task_filters),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user)
+):
+    """
+    Возвращает колонки доски со счетчиками, суммарным временем и первыми карточками.
+    Остальные карточки колонки догружаются через /tasks/ с курсором колонки.
+    """
+    version = await board_version.read(db)
+    if not_modified := check_not_modified(request, response, version):
+        return not_modified
+    if not settings.COALESCE_READS:
+        return await board_service.get_board(db, per_column=per_column, filters=filters, sort=sort)
+
+    async def render() -> bytes:
+        board = await board_service.get_board(db, per_column=per_column, filters=filters, sort=sort)
+        return board.model_dump_json().encode()
+
+    body = await _coalesced(("board", tuple(sorted(request.query_params.multi_items()))), version, render)
+    return Response(body, media_type="application/json", headers=dict(response.headers))
+
+@router.get("/sync", response_model=SyncOut)
+async def sync_endpoint(
+    request: Request,
+    response: Response,
+    since: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user)
+):
+    """
+    Дельта-синхронизация: задачи и пользователи, измененные после версии since, и id удаленных.
+    Клиент сохраняет version из ответа и передает ее в следующем запросе; since=0 — полная загрузка.
+    """
+    if not_modified := check_not_modified(request, response, await board_version.read(db)):
+        return not_modified
+    return await sync_service.get_changes(db, since, limit)
+
 
 @router.get("/tasks/{task_id}", response_model=TaskOut)
 async def read_task_endpoint(
     task_id: int, 
     db: AsyncSession = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    current_user: UserOut = Depends(get_current_user)
 ):
     db_task = await tasks_service.get_task(db, task_id=task_id)
     if db_task is None:
@@ -111,37 +375,145 @@ async def update_task_endpoint(
     task_id: int, 
     task: TaskUpdate, 
     db: AsyncSession = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
-):
-    # ИСПРАВЛЕНО: Проверяем assignee_ids (во множественном числе)
-    if task.assignee_ids is not None:
-        for user_id in task.assignee_ids:
-            assignee = await users_service.get_user(db, user_id=user_id)
-            if not assignee:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"User with id {user_id} not found to be an assignee."
-                )
-    
-    updated_task = await tasks_service.update_task(db, task_id=task_id, task_data=task, current_user=current_user)
+    current_user: UserOut = Depends(get_current_user),
+    users: users_service.UserLoader = Depends(users_service.get_user_loader),
+):
+    # Исполнители проверяются одним запросом: 404 перечисляет всех ненайденных
+    updated_task = await tasks_service.update_task(
+        db, task_id=task_id, task_data=task, current_user=current_user, users=users
+    )
     if updated_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     return updated_task
 
+@router.post("/tasks/{task_id}/move", response_model=TaskOut)
+async def move_task_endpoint(
+    task_id: int,
+    placement: TaskPlacement,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user)
+):
+    """
+    Переносит карточку между соседями after_id (выше) и before_id (ниже) в колонке status.
+    Порядок колонки отдает /tasks/?sort=position (и /board?sort=position).
+    """
+    task = await tasks_service.move_task(db, task_id=task_id, placement=placement, current_user=current_user)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+@router.post("/tasks/{task_id}/time", response_model=TaskOut)
+async def log_time_endpoint(
+    task_id: int,
+    time_log: TimeLog,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user)
+):
+    """Списывает время на задачу атомарным приращением time_spent."""
+    task = await tasks_service.log_time_for_task(db, task_id=task_id, time_to_add=time_log.hours, user_id=current_user.id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+@router.post("/tasks/{task_id}/time/heartbeat", status_code=status.HTTP_202_ACCEPTED)
+async def time_heartbeat_endpoint(
+    task_id: int,
+    time_log: TimeLog,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user)
+):
+    """
+    Heartbeat таймера: дешевая вставка в журнал времени.
+    time_spent задачи обновляется периодическим rollup'ом.
+    """
+    if not await tasks_service.record_time_heartbeat(db, task_id=task_id, user_id=current_user.id, hours=time_log.hours):
+        raise HTTPException(status_code=404, detail="Task not found")
+    return Response(status_code=status.HTTP_202_ACCEPTED)
+
+@router.get("/tasks/{task_id}/time", response_model=List[UserTimeTotal])
+async def read_time_totals_endpoint(
+    task_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user)
+):
+    """Возвращает время по задаче в разбивке по пользователям."""
+    return await tasks_service.get_time_totals(db, task_id=task_id)
+
+@router.get("/tasks/{task_id}/activity", response_model=List[ActivityOut])
+async def read_task_activity_endpoint(
+    task_id: int,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user)
+):
+    """
+    История задачи (кто и что менял) от новых записей к старым; остается и после удаления задачи.
+    Журнал пишется в фоне, поэтому последние действия появляются с задержкой до ACTIVITY_FLUSH_INTERVAL_SECONDS.
+    Курсор следующей страницы передается в заголовке X-Next-Cursor.
+    """
+    entries = await activity_service.get_task_activity(db, task_id, limit=limit, cursor=cursor)
+    if next_page := activity_service.activity_next_cursor(entries, limit):
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    return entries
+
 @router.delete("/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_task_endpoint(
     task_id: int, 
     db: AsyncSession = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    current_user: UserOut = Depends(get_current_user)
 ):
-    deleted_task = await tasks_service.delete_task(db, task_id=task_id)
+    deleted_task = await tasks_service.delete_task(db, task_id=task_id, user_id=current_user.id)
     if deleted_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 @router.get("/users/me", response_model=UserOut)
-async def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: UserOut = Depends(get_current_user)):
     """
     Возвращает данные о текущем аутентифицированном пользователе.
     """
-    return current_user
\ No newline at end of file
+    return current_user
+
+@router.websocket("/ws/board")
+async def board_events_websocket(websocket: WebSocket, token: str = Query(...)):
+    """
+    Поток изменений доски: task.created, task.updated, task.moved, task.deleted.
+    Отстающий клиент получает событие resync и должен перечитать доску.
+    Токен передается query-параметром: браузер не умеет слать заголовки для WebSocket.
+    """
+    # Сессия нужна только на время аутентификации, чтобы не держать соединение из пула
+    async with SessionLocal() as db:
+        try:
+            await get_current_user(token=token, db=db)
+        except HTTPException:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+
+    async def forward_events():
+        while True:
+            await websocket.send_json(await subscription.get())
+
+    # Подписываемся до accept, чтобы не пропустить события сразу после подключения
+    subscription = broker.subscribe()
+    sender = None
+    try:
+        await websocket.accept()
+        sender = asyncio.create_task(forward_events())
+        while True:
+            # Клиент ничего не отправляет; ждем, пока он закроет соединение
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if sender is not None:
+            sender.cancel()
+            # Дожидаемся отправителя, чтобы его ошибка не потерялась
+            try:
+                await sender
+            except (asyncio.CancelledError, WebSocketDisconnect):
+                pass
+            except Exception:
+                logger.exception("Failed to send board events")
+        broker.unsubscribe(subscription)
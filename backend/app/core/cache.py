@@ -0,0 +1,167 @@
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+
+
+class TTLCache:
+    """
+    LRU-кэш в памяти процесса с ограничением на число записей и временем жизни.
+    Не потокобезопасен: рассчитан на использование из одного event loop.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> Any:
+        item = self._data.pop(key, None)
+        return item[1] if item is not None else None
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class MemoryCacheBackend:
+    """
+    Бэкенд GenerationalCache в памяти процесса: записи в TTLCache, поколения в словаре.
+    Инвалидация видна только этому процессу, поэтому при нескольких воркерах нужен Redis.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.entries = TTLCache(max_size=max_size, ttl=ttl)
+        self.generations: Dict[str, int] = {}
+
+    @property
+    def evictions(self) -> int:
+        return self.entries.evictions
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.entries.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.entries.set(key, value, ttl)
+
+    async def get_generations(self, names: List[str]) -> List[int]:
+        return [self.generations.get(name, 0) for name in names]
+
+    async def bump(self, names: Iterable[str]) -> None:
+        for name in names:
+            self.generations[name] = self.generations.get(name, 0) + 1
+
+    async def clear(self) -> None:
+        self.entries.clear()
+        self.generations.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class RedisCacheBackend:
+    """
+    Бэкенд GenerationalCache поверх Redis-совместимого сервера (GET/SET EX/MGET/INCR):
+    записи и поколения общие для всех воркеров. Вытеснение выполняет сам сервер, поэтому
+    счетчик evictions здесь всегда 0. Политика должна быть volatile-*: записи живут с TTL,
+    а счетчики поколений без него, и их вытеснение вернуло бы к жизни устаревшие записи.
+    """
+
+    evictions = 0
+
+    def __init__(self, client=None, url: Optional[str] = None, prefix: str = "kanban:cache:"):
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError:
+                raise RuntimeError("TASK_CACHE_BACKEND=redis requires the redis package to be installed")
+            client = redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(self.prefix + key, value, ex=max(int(ttl), 1))
+
+    async def get_generations(self, names: List[str]) -> List[int]:
+        values = await self.client.mget([f"{self.prefix}gen:{name}" for name in names])
+        return [int(value or 0) for value in values]
+
+    async def bump(self, names: Iterable[str]) -> None:
+        for name in names:
+            await self.client.incr(f"{self.prefix}gen:{name}")
+
+    async def clear(self) -> None:
+        # Поколения не удаляем: после bump старые записи и так недостижимы
+        pass
+
+    def __len__(self) -> int:
+        return 0
+
+
+class GenerationalCache:
+    """
+    Read-through кэш с инвалидацией по поколениям. Запись принадлежит областям (scopes),
+    и в ее ключ входят текущие номера их поколений: bump области делает все ее записи
+    недостижимыми сразу, без перебора ключей; старые записи уходят по LRU/TTL.
+    Ключ вычисляется до загрузки, поэтому данные, прочитанные до инвалидации,
+    сохраняются под старым поколением и уже не будут выданы.
+    """
+
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def _key(self, scopes: List[str], key: str) -> str:
+        generations = await self.backend.get_generations(scopes)
+        return ":".join([*(f"{scope}@{generation}" for scope, generation in zip(scopes, generations)), key])
+
+    async def get_or_load(self, scopes: List[str], key: str, loader: Callable[[], Awaitable[bytes]]) -> bytes:
+        full_key = await self._key(scopes, key)
+        value = await self.backend.get(full_key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = await loader()
+        await self.backend.set(full_key, value, self.ttl)
+        return value
+
+    async def invalidate(self, scopes: Iterable[str]) -> None:
+        scopes = list(dict.fromkeys(scopes))
+        if scopes:
+            self.invalidations += 1
+            await self.backend.bump(scopes)
+
+    async def clear(self) -> None:
+        await self.backend.clear()
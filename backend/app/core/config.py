@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -13,6 +14,83 @@ class Settings(BaseSettings):
     DATABASE_URL: str # URL базы данных для основного приложения
     TEST_DATABASE_URL: str # URL базы данных для тестов
 
+    # Кэш аутентифицированных пользователей (в памяти процесса)
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_SIZE: int = 10000
+    # Класть имя и аватар пользователя в токен, чтобы аутентификация не ходила в БД.
+    # Изменения профиля на других воркерах станут видны только с новым токеном.
+    AUTH_USER_CLAIMS: bool = False
+
+    # Хеширование паролей: bcrypt выполняется в пуле потоков, чтобы не блокировать event loop
+    BCRYPT_ROUNDS: int = 12 # При изменении старые хеши пересчитываются при следующем входе
+    PASSWORD_HASH_WORKERS: int = 4 # Сколько хешей считается одновременно
+
+    # Как часто heartbeat-записи журнала времени переносятся в tasks.time_spent
+    TIME_ROLLUP_INTERVAL_SECONDS: int = 30
+
+    # События доски для WebSocket: "memory" — только внутри процесса,
+    # "postgres" — еще и между воркерами через LISTEN/NOTIFY
+    EVENT_BROKER: str = "memory"
+    EVENT_QUEUE_SIZE: int = 100 # Сколько событий копится для медленного клиента до resync
+
+    # Настройки engine и пула соединений (для SQLite пул не настраивается)
+    DB_ECHO: bool = False # Логирование SQL дорого под нагрузкой, включать только для отладки
+    DB_POOL_SIZE: int = 10 # Рассчитывайте на число воркеров: воркеры * (size + overflow) <= max_connections
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0 # Сколько ждать свободного соединения, секунд
+    DB_POOL_RECYCLE: int = 1800 # Пересоздавать соединения старше N секунд; -1 — никогда
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100 # Кэш подготовленных выражений asyncpg на соединение
+    # Совместимость с pgbouncer в режиме transaction pooling: без кэша подготовленных выражений
+    DB_PGBOUNCER_MODE: bool = False
+
+    # Быстрый путь для списков задач: строки собираются из кортежей колонок без моделей
+    # ORM и TaskOut и кодируются orjson. Формат ответа тот же.
+    FAST_TASK_LISTS: bool = False
+
+    # Хранилище загрузок: "local" — каталог UPLOADS_DIR, отдается как /api/uploads;
+    # "s3" — S3-совместимый бакет (нужен boto3), файлы отдаются редиректом на presigned URL
+    STORAGE_BACKEND: str = "local"
+    UPLOADS_DIR: str = "uploads"
+    S3_BUCKET: Optional[str] = None
+    S3_ENDPOINT_URL: Optional[str] = None # Например, http://minio:9000
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_PUBLIC_URL: Optional[str] = None # Публичный URL бакета или CDN; без него выдаются presigned URL
+    S3_PRESIGN_EXPIRES_SECONDS: int = 3600
+    AVATAR_MAX_BYTES: int = 5 * 1024 * 1024 # Больше — 413
+    AVATAR_THUMBNAIL_SIZES: List[int] = [64, 128] # Стороны миниатюр в пикселях (нужен Pillow)
+    AVATAR_WORKERS: int = 2 # Потоки для проверки изображений и генерации миниатюр
+
+    # Запросы дольше этого порога пишутся в лог вместе с их SQL; 0 — не логировать
+    SLOW_REQUEST_SECONDS: float = 0
+
+    # Ручной порядок карточек: колонка перебалансируется в фоне, когда ключ порядка
+    # после переноса становится длиннее POSITION_REBALANCE_LENGTH символов
+    POSITION_REBALANCE_LENGTH: int = 12
+    POSITION_REBALANCE_INTERVAL_SECONDS: int = 5
+
+    # Одинаковые одновременные чтения списков задач и доски выполняют один запрос к БД
+    # и получают одно и то же готовое тело ответа
+    COALESCE_READS: bool = True
+
+    # Кэш готовых ответов списков задач: "none" — выключен, "memory" — LRU в процессе
+    # (инвалидация видна только этому воркеру), "redis" — общий для воркеров (нужен пакет redis)
+    TASK_CACHE_BACKEND: str = "none"
+    TASK_CACHE_TTL_SECONDS: int = 60
+    TASK_CACHE_MAX_SIZE: int = 1000
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Журнал действий над задачами пишется в фоне: события копятся в очереди процесса
+    # (при переполнении новые отбрасываются) и вставляются пакетами не реже чем раз в интервал
+    ACTIVITY_QUEUE_SIZE: int = 10000
+    ACTIVITY_BATCH_SIZE: int = 500
+    ACTIVITY_FLUSH_INTERVAL_SECONDS: float = 1.0
+
+    # Выгрузка задач (/tasks/export) читает строки из базы порциями такого размера
+    EXPORT_BATCH_SIZE: int = 1000
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 # Создаем экземпляр настроек
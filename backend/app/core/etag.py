@@ -0,0 +1,65 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.change import latest_change_seq
+
+
+class BoardVersion:
+    """
+    Версия доски — последнее окончательное значение change_seq в базе (ниже change_horizon,
+    см. app/models/change.py). Его увеличивает любая зафиксированная запись задач и пользователей,
+    в том числе зафиксированная позже записи с большей версией, поэтому версия одна для всех
+    воркеров и не зависит от брокера событий. Чтение — максимум по индексам change_seq.
+    Last-Modified — момент, когда процесс впервые увидел текущую версию.
+    """
+
+    def __init__(self):
+        self.value: Optional[int] = None
+        self.last_modified = datetime.now(timezone.utc)
+
+    async def read(self, db: AsyncSession) -> int:
+        value = (await db.execute(latest_change_seq())).scalar()
+        if value != self.value:
+            self.value = value
+            self.last_modified = datetime.now(timezone.utc)
+        return value
+
+    @staticmethod
+    def etag(version: int, *scope) -> str:
+        key = ":".join([str(version), *map(str, scope)])
+        return f'W/"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+
+
+board_version = BoardVersion()
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # Слабое сравнение: префикс W/ не учитывается
+    bare = etag.removeprefix("W/")
+    return "*" in candidates or any(candidate.removeprefix("W/") == bare for candidate in candidates)
+
+
+def check_not_modified(request: Request, response: Response, version: int, *scope) -> Optional[Response]:
+    """
+    Проверяет If-None-Match по версии доски (board_version.read). Возвращает готовый ответ 304,
+    если данные не менялись, иначе проставляет ETag и Last-Modified в response и возвращает None.
+    Путь и query-параметры учитываются автоматически; scope — остальное, от чего зависит ответ
+    (например, id пользователя для «моих задач»).
+    """
+    etag = board_version.etag(version, request.url.path, sorted(request.query_params.multi_items()), *scope)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(board_version.last_modified, usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
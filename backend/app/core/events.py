@@ -0,0 +1,152 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import Callable, Optional, Set
+
+from app.core.config import settings
+from app.core.metrics import counter, gauge, registry
+
+logger = logging.getLogger(__name__)
+
+# Событие, которое получает отстающий клиент вместо потерянных: ему нужно перечитать доску
+RESYNC_EVENT = {"type": "resync"}
+
+# Ограничение Postgres на размер payload у NOTIFY (8000 байт) с запасом
+MAX_NOTIFY_PAYLOAD = 7900
+
+
+class Subscription:
+    """
+    Очередь событий одного клиента. Очередь ограничена: если клиент не успевает читать,
+    накопленные события отбрасываются и вместо них отправляется одно событие resync.
+    """
+
+    def __init__(self, max_size: int, on_drop: Optional[Callable[[int], None]] = None):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.dropped = 0
+        self._on_drop = on_drop
+
+    def deliver(self, event: dict) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            dropped = self.queue.qsize()
+            self.dropped += dropped
+            if self._on_drop is not None:
+                self._on_drop(dropped)
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+
+class PostgresNotifyBackend:
+    """Пересылает события между воркерами через Postgres LISTEN/NOTIFY."""
+
+    channel = "kanban_events"
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._connection = None
+        self._lock = asyncio.Lock()
+
+    async def start(self, on_message: Callable[[str], None]) -> None:
+        import asyncpg
+
+        self._connection = await asyncpg.connect(self.dsn)
+        await self._connection.add_listener(
+            self.channel, lambda connection, pid, channel, payload: on_message(payload)
+        )
+
+    async def send(self, payload: str) -> None:
+        # Одно asyncpg-соединение не выполняет запросы параллельно
+        async with self._lock:
+            await self._connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    async def stop(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+class EventBroker:
+    """
+    Раздает события изменений доски подписчикам внутри процесса.
+    С подключенным backend события также уходят другим воркерам и приходят от них.
+    """
+
+    def __init__(self, max_queue_size: int = 100):
+        self.max_queue_size = max_queue_size
+        self.origin = uuid.uuid4().hex
+        self.backend: Optional[PostgresNotifyBackend] = None
+        self._subscriptions: Set[Subscription] = set()
+        self.published = 0
+        self.dropped = 0
+
+    def _count_dropped(self, count: int) -> None:
+        self.dropped += count
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.max_queue_size, on_drop=self._count_dropped)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    async def publish(self, event: dict) -> None:
+        self.published += 1
+        self._fan_out(event)
+        if self.backend is not None:
+            message = {"origin": self.origin, "event": event}
+            payload = json.dumps(message)
+            if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+                # Крупные события уходят без данных задачи: клиенты перечитают ее сами
+                message["event"] = {"type": event["type"], "id": event.get("id"), "task": None}
+                payload = json.dumps(message)
+            try:
+                await self.backend.send(payload)
+            except Exception:
+                logger.exception("Failed to forward event to other workers")
+
+    def _fan_out(self, event: dict) -> None:
+        for subscription in list(self._subscriptions):
+            subscription.deliver(event)
+
+    def _on_remote(self, payload: str) -> None:
+        message = json.loads(payload)
+        if message.get("origin") != self.origin:
+            self._fan_out(message["event"])
+
+    async def start(self) -> None:
+        if self.backend is not None:
+            await self.backend.start(self._on_remote)
+
+    async def stop(self) -> None:
+        if self.backend is not None:
+            await self.backend.stop()
+
+
+broker = EventBroker(max_queue_size=settings.EVENT_QUEUE_SIZE)
+
+
+@registry.register
+def _broker_metrics():
+    return [
+        gauge("kanban_events_subscribers", "Connected board event subscribers", broker.subscriber_count),
+        counter("kanban_events_published_total", "Board events published by this worker", broker.published),
+        counter("kanban_events_dropped_total", "Board events dropped for slow subscribers", broker.dropped),
+    ]
+
+
+def configure_broker(database_url: Optional[str]) -> None:
+    """Подключает межпроцессный backend, если он выбран в настройках."""
+    if settings.EVENT_BROKER == "postgres" and database_url:
+        broker.backend = PostgresNotifyBackend(database_url.replace("+asyncpg", ""))
@@ -0,0 +1,133 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.metrics import Histogram, registry
+
+logger = logging.getLogger(__name__)
+
+# Сколько SQL-выражений запроса сохранять для лога медленных запросов
+MAX_LOGGED_STATEMENTS = 50
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+request_duration = Histogram("kanban_http_request_duration_seconds", "HTTP request latency by route")
+request_queries = Histogram(
+    "kanban_http_request_db_queries", "Database queries per HTTP request", buckets=QUERY_COUNT_BUCKETS
+)
+request_db_time = Histogram("kanban_http_request_db_seconds", "Time spent in database queries per HTTP request")
+query_duration = Histogram("kanban_db_query_duration_seconds", "Database query latency")
+pool_wait = Histogram("kanban_db_pool_wait_seconds", "Time spent waiting for a free pooled connection")
+
+for _histogram in (request_duration, request_queries, request_db_time, query_duration, pool_wait):
+    registry.register(_histogram.collect)
+
+
+class RequestStats:
+    """Счетчики одного HTTP-запроса: запросы к БД, их время, ожидание пула и (для лога) сами SQL."""
+
+    __slots__ = ("queries", "db_seconds", "pool_wait_seconds", "statements")
+
+    def __init__(self, keep_statements: bool):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.statements: Optional[List[str]] = [] if keep_statements else None
+
+
+# Статистика текущего запроса; SQLAlchemy выполняет курсоры в greenlet с тем же контекстом
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Время старта хранится в контексте выполнения, а не в соединении: after_cursor_execute
+    # не вызывается для упавших запросов, и метка осталась бы в соединении пула навсегда
+    context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_start
+    query_duration.observe(elapsed)
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        if stats.statements is not None and len(stats.statements) < MAX_LOGGED_STATEMENTS:
+            stats.statements.append(f"[{elapsed * 1000:.1f} ms] {statement}")
+
+
+def instrument_engine(engine) -> None:
+    """Подключает учет запросов к engine (AsyncEngine или синхронному); повторный вызов ничего не делает."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def record_pool_wait(seconds: float) -> None:
+    """Учитывает ожидание свободного соединения в исчерпанном пуле (вызывается из InstrumentedQueuePool)."""
+    pool_wait.observe(seconds)
+    stats = current_request.get()
+    if stats is not None:
+        stats.pool_wait_seconds += seconds
+
+
+def _route_label(scope) -> str:
+    # Шаблон маршрута (/api/tasks/{task_id}), а не путь: иначе число серий метрики не ограничено
+    route = scope.get("route")
+    path_format = getattr(route, "path", None)
+    if path_format is None:
+        return "unmatched"
+    path, regex = scope["path"], getattr(route, "path_regex", None)
+    if regex is not None and not regex.match(path):
+        # Маршруты из include_router(prefix=...) могут хранить путь без префикса: восстанавливаем его
+        for index, char in enumerate(path):
+            if char == "/" and index and regex.match(path[index:]):
+                return path[:index] + path_format
+    return path_format
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: длительность HTTP-запросов, число и время запросов к БД на запрос.
+    Запросы дольше SLOW_REQUEST_SECONDS пишутся в лог вместе с их SQL.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        slow_threshold = settings.SLOW_REQUEST_SECONDS
+        stats = RequestStats(keep_statements=slow_threshold > 0)
+        token = current_request.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            route = _route_label(scope)
+            request_duration.observe(elapsed, method=scope["method"], route=route, status=f"{status_code // 100}xx")
+            request_queries.observe(stats.queries, route=route)
+            request_db_time.observe(stats.db_seconds, route=route)
+            if slow_threshold > 0 and elapsed >= slow_threshold:
+                logger.warning(
+                    "Slow request %s %s: %.3f s, status %s, %d queries in %.3f s, pool wait %.3f s\n%s",
+                    scope["method"], scope["path"], elapsed, status_code, stats.queries, stats.db_seconds,
+                    stats.pool_wait_seconds, "\n".join(stats.statements or []),
+                )
@@ -0,0 +1,49 @@
+from typing import Callable, Dict
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+
+# Запас на границы и заголовки частей multipart поверх размера самого файла
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware: ограничивает размер тела запросов к загрузочным маршрутам до того,
+    как multipart-парсер Starlette примет и сохранит во временный файл все тело.
+    Запрос с большим Content-Length получает 413 без чтения тела; тело без Content-Length
+    (chunked) считается по мере чтения и обрывается 413 на превышении.
+    limits: путь -> функция, возвращающая лимит в байтах (читается на каждый запрос).
+    """
+
+    def __init__(self, app, limits: Dict[str, Callable[[], int]]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit_for = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit_for is None:
+            await self.app(scope, receive, send)
+            return
+
+        limit = limit_for()
+        too_large_detail = f"Request body is larger than {limit} bytes"
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse({"detail": too_large_detail}, status_code=status.HTTP_413_CONTENT_TOO_LARGE)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # FastAPI пробрасывает HTTPException из разбора тела как есть
+                    raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail=too_large_detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,105 @@
+import bisect
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Метрика для экспорта: (имя, тип, описание, [(метки, значение), ...]).
+# У гистограмм сэмплы с суффиксом имени: (суффикс, метки, значение), например ("_bucket", {"le": "0.1"}, 3).
+Metric = Tuple[str, str, str, List[tuple]]
+
+# Границы корзин по умолчанию для длительностей в секундах
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def gauge(name: str, help_text: str, value: float, **labels: str) -> Metric:
+    return (name, "gauge", help_text, [(labels, value)])
+
+
+def counter(name: str, help_text: str, value: float, **labels: str) -> Metric:
+    return (name, "counter", help_text, [(labels, value)])
+
+
+class Histogram:
+    """
+    Гистограмма Prometheus с набором меток: для каждого набора хранятся счетчики по корзинам,
+    сумма и количество наблюдений. Используется из одного event loop, без блокировок.
+    """
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[Tuple[str, str], ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        series = self._series.get(key)
+        if series is None:
+            # Счетчики корзин (без +Inf), сумма, количество
+            series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def collect(self) -> List[Metric]:
+        samples = []
+        for key, (counts, total, count) in self._series.items():
+            labels = dict(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append(("_bucket", {**labels, "le": _format_bound(bound)}, cumulative))
+            samples.append(("_bucket", {**labels, "le": "+Inf"}, count))
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, count))
+        return [(self.name, "histogram", self.help_text, samples)]
+
+    def clear(self) -> None:
+        self._series.clear()
+
+
+def _format_bound(bound: float) -> str:
+    return str(int(bound)) if float(bound).is_integer() else str(bound)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in sorted(labels.items()):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class MetricsRegistry:
+    """
+    Собирает метрики из зарегистрированных коллекторов и отдает их в текстовом формате Prometheus.
+    Коллектор — функция без аргументов, возвращающая список Metric на момент вызова.
+    """
+
+    def __init__(self):
+        self._collectors: List[Callable[[], Iterable[Metric]]] = []
+
+    def register(self, collector: Callable[[], Iterable[Metric]]) -> Callable[[], Iterable[Metric]]:
+        self._collectors.append(collector)
+        return collector
+
+    def collect(self) -> List[Metric]:
+        metrics = []
+        for collector in self._collectors:
+            metrics.extend(collector())
+        return metrics
+
+    def render(self) -> str:
+        lines = []
+        for name, kind, help_text, samples in self.collect():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample in samples:
+                suffix, labels, value = sample if len(sample) == 3 else ("", *sample)
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
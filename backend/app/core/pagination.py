@@ -0,0 +1,78 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+# Ключ сортировки: (атрибут модели, сортировать по убыванию)
+SortKey = Tuple[Any, bool]
+
+
+def order_by_keys(keys: Sequence[SortKey]) -> list:
+    """Превращает ключи сортировки в выражения для ORDER BY."""
+    return [column.desc() if descending else column.asc() for column, descending in keys]
+
+
+def cursor_values(row: Any, keys: Sequence[SortKey]) -> list:
+    """Достает из строки значения ключей сортировки для курсора."""
+    return [getattr(row, column.key) for column, _ in keys]
+
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+    """Упаковывает позицию в списке в непрозрачный курсор."""
+    payload = {
+        "s": sort,
+        "v": [value.isoformat() if isinstance(value, datetime) else value for value in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _cursor_value(column: Any, value: Any) -> Any:
+    """Значение ключа из курсора, приведенное к типу колонки; ValueError, если тип не тот."""
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if isinstance(value, bool) or not isinstance(value, python_type):
+        raise ValueError(f"Cursor value {value!r} does not match {column.key}")
+    return value
+
+
+def decode_cursor(cursor: str, sort: str, keys: Sequence[SortKey]) -> list:
+    """
+    Распаковывает курсор. Вызывает 400, если курсор поврежден, от другой сортировки
+    или его значения не подходят по типу к ключам (иначе подделанный курсор дошел бы до запроса).
+    """
+    invalid_cursor = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = payload["v"]
+        if payload["s"] != sort or len(values) != len(keys):
+            raise invalid_cursor
+        return [_cursor_value(column, value) for (column, _), value in zip(keys, values)]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise invalid_cursor
+
+
+def keyset_after(keys: Sequence[SortKey], values: Sequence[Any]):
+    """
+    Условие «строка идет после курсора» для заданного порядка сортировки:
+    (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... с учетом направления каждого ключа.
+    """
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        equal_prefix = [keys[j][0] == values[j] for j in range(i)]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+def next_cursor(rows: List[Any], limit: int, sort: str, keys: Sequence[SortKey]) -> Optional[str]:
+    """Возвращает курсор следующей страницы или None, если страница неполная."""
+    if not rows or len(rows) < limit:
+        return None
+    return encode_cursor(sort, cursor_values(rows[-1], keys))
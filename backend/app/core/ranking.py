@@ -0,0 +1,62 @@
+"""
+Дробные строковые ключи порядка карточек (в духе LexoRank): между любыми двумя ключами
+всегда есть третий, поэтому перенос карточки меняет одну строку, а не нумерацию колонки.
+Ключи сравниваются побайтово, состоят из цифр и строчных латинских букв и никогда
+не заканчиваются на "0" (иначе перед ключом могло бы не найтись места).
+"""
+from typing import List, Optional
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+
+def _midpoint(lower: str, upper: Optional[str]) -> str:
+    """Ключ строго между lower и upper (upper=None — бесконечность); lower может быть пустым."""
+    if upper is not None:
+        # Общий префикс (lower дополняется нулями) переносится как есть
+        common = 0
+        while common < len(upper) and (lower[common] if common < len(lower) else "0") == upper[common]:
+            common += 1
+        if common:
+            return upper[:common] + _midpoint(lower[common:], upper[common:])
+
+    lower_digit = DIGITS.index(lower[0]) if lower else 0
+    upper_digit = DIGITS.index(upper[0]) if upper is not None else BASE
+    if upper_digit - lower_digit > 1:
+        return DIGITS[(lower_digit + upper_digit) // 2]
+    # Соседние цифры: берем первую цифру upper, если после нее что-то есть, иначе уходим на разряд глубже
+    if upper is not None and len(upper) > 1:
+        return upper[0]
+    return DIGITS[lower_digit] + _midpoint(lower[1:], None)
+
+
+def rank_between(lower: Optional[str], upper: Optional[str]) -> str:
+    """
+    Ключ между соседями: lower — карточка выше, upper — ниже; None — край колонки.
+    ValueError, если lower >= upper (соседи из устаревшего представления клиента или дубли).
+    """
+    if lower is not None and upper is not None and lower >= upper:
+        raise ValueError(f"Rank {lower!r} is not below {upper!r}")
+    return _midpoint(lower or "", upper)
+
+
+def spread_ranks(count: int) -> List[str]:
+    """
+    count равномерно распределенных ключей одинаковой (минимальной) длины — для начальной
+    расстановки и перебалансировки колонки. Между соседями остается запас для переносов.
+    """
+    width = 1
+    while BASE ** width <= count * 2:
+        width += 1
+    step = BASE ** width // (count + 1)
+    ranks = []
+    for index in range(1, count + 1):
+        value, digits = index * step, []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        ranks.append("".join(reversed(digits)).rstrip("0"))
+    return ranks
+
+
+FIRST_RANK = rank_between(None, None)
@@ -0,0 +1,33 @@
+import json
+from datetime import datetime
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson не установлен: тот же формат через стандартный json
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Кодирует dict/list в JSON: orjson, если он установлен, иначе стандартный json в том же формате."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON-ответ для уже готовых dict/list без валидации через Pydantic.
+    Кодируется orjson, если он установлен; даты — в ISO 8601, как у моделей Pydantic.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
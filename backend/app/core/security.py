@@ -1,5 +1,7 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -10,16 +12,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
 from app.services import users as users_service
 from app.models.user import User
+from app.schemas.user import UserOut
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import counter, gauge, registry
 
 
-SECRET_KEY = "a_very_secret_key_that_should_be_in_env_vars"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
+# Кэш аутентифицированных пользователей по id: избавляет get_current_user от запроса в БД
+auth_cache = TTLCache(max_size=settings.AUTH_CACHE_MAX_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -29,17 +34,98 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def user_claims(user: User) -> dict:
+    """Возвращает claims токена для пользователя: всегда email и id, опционально отображаемые поля."""
+    claims = {"sub": user.email, "uid": user.id}
+    if settings.AUTH_USER_CLAIMS:
+        claims["usr"] = {
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "avatar_url": user.avatar_url,
+        }
+    return claims
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    """Сбрасывает кэшированного пользователя после изменения его данных."""
+    auth_cache.pop(user_id)
+
+
+class PasswordHasher:
+    """
+    Выполняет bcrypt в ограниченном пуле потоков, чтобы вход и регистрация не блокировали event loop.
+    bcrypt отпускает GIL, поэтому потоки дают настоящий параллелизм.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+
+    async def _run(self, func, *args):
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Проверяет пароль; вторым значением возвращает новый хеш, если изменилась стоимость bcrypt."""
+        return await self._run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+        }
+
+
+password_hasher = PasswordHasher(max_workers=settings.PASSWORD_HASH_WORKERS)
+
+
+@registry.register
+def _security_metrics():
+    hasher = password_hasher.stats()
+    return [
+        gauge("kanban_password_hash_workers", "Password hashing concurrency limit", hasher["max_workers"]),
+        gauge("kanban_password_hash_waiting", "Password hash operations waiting for a worker", hasher["waiting"]),
+        gauge("kanban_password_hash_in_flight", "Password hash operations running", hasher["in_flight"]),
+        counter("kanban_password_hash_completed_total", "Password hash operations completed", hasher["completed"]),
+        gauge("kanban_auth_cache_size", "Cached authenticated users", len(auth_cache)),
+        counter("kanban_auth_cache_hits_total", "Authenticated user cache hits", auth_cache.hits),
+        counter("kanban_auth_cache_misses_total", "Authenticated user cache misses", auth_cache.misses),
+        counter("kanban_auth_cache_evictions_total", "Authenticated user cache evictions", auth_cache.evictions),
+    ]
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> UserOut:
     """
-    Декодирует JWT токен и возвращает текущего пользователя из базы данных.
+    Декодирует JWT токен и возвращает текущего пользователя.
+    Сначала смотрит в кэш по id из токена, затем в claims токена (если включено AUTH_USER_CLAIMS)
+    и только потом идет в базу данных.
     Вызывает исключение, если токен невалиден или пользователь не найден.
     """
     credentials_exception = HTTPException(
@@ -48,14 +134,26 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    
+
+    user_id = payload.get("uid")
+    if user_id is not None:
+        principal = auth_cache.get(user_id)
+        if principal is not None and principal.email == email:
+            return principal
+        if settings.AUTH_USER_CLAIMS and "usr" in payload:
+            principal = UserOut(id=user_id, email=email, **payload["usr"])
+            auth_cache.set(user_id, principal)
+            return principal
+
     user = await users_service.get_user_by_email(db, email=email)
-    if user is None:
+    if user is None or (user_id is not None and user.id != user_id):
         raise credentials_exception
-    return user
\ No newline at end of file
+    principal = UserOut.model_validate(user)
+    auth_cache.set(user.id, principal)
+    return principal
\ No newline at end of file
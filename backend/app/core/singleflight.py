@@ -0,0 +1,66 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from app.core.metrics import counter, gauge, registry
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых одновременных вызовов: пока вызов с ключом выполняется,
+    остальные с тем же ключом ждут его результата (или исключения) вместо повторной работы.
+    Если первый вызов отменен (клиент отключился), ожидающие выполняют работу заново сами.
+    Рассчитан на один event loop.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.shared = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        if future is not None:
+            self.shared += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                return await self.do(key, func)
+
+        future = asyncio.get_running_loop().create_future()
+        # Исключение без ожидающих не должно давать предупреждение "never retrieved"
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._calls[key] = future
+        self.executed += 1
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+
+# Общие на процесс вызовы чтения списков задач и доски (см. app/api/routers.py)
+read_flights = SingleFlight()
+
+
+@registry.register
+def _singleflight_metrics():
+    return [
+        gauge("kanban_coalesced_reads_in_flight", "Distinct coalesced reads running", read_flights.in_flight),
+        counter("kanban_coalesced_reads_executed_total", "Coalesced reads that ran the query", read_flights.executed),
+        counter("kanban_coalesced_reads_shared_total", "Requests served by another request's query", read_flights.shared),
+    ]
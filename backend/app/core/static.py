@@ -0,0 +1,19 @@
+from starlette.staticfiles import StaticFiles
+
+from app.core.storage import IMMUTABLE_CACHE_CONTROL
+from app.services.avatars import AVATARS_SUBDIR
+
+
+class UploadsStaticFiles(StaticFiles):
+    """
+    Раздает загрузки. Аватары по хешу содержимого кэшируются навсегда,
+    остальные (старые) файлы — с проверкой по ETag/Last-Modified.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if self.get_path(scope).replace("\\", "/").startswith(f"{AVATARS_SUBDIR}/"):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
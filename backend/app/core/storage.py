@@ -0,0 +1,173 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+import posixpath
+import shutil
+import uuid
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+# Объекты хранилища адресуются по хешу содержимого и не меняются
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _check_key(key: str) -> str:
+    """Ключ — относительный POSIX-путь без выходов за пределы хранилища."""
+    normalized = posixpath.normpath(key)
+    if not key or key.startswith("/") or normalized != key or normalized.startswith(".."):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    return key
+
+
+class Storage(ABC):
+    """
+    Хранилище загруженных файлов. Ключи — относительные пути вида avatars/ab/<sha256>.png.
+    url() возвращает адрес для клиентов относительно /api/ (как avatar_url в профиле),
+    download_url() — куда перенаправить GET /api/files/{key}.
+    """
+
+    # Сколько браузер может кэшировать редирект на download_url()
+    redirect_max_age = 3600
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def put_file(self, key: str, path: str, content_type: Optional[str] = None) -> None:
+        """Сохраняет локальный файл под ключом; исходный файл после этого можно удалить."""
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        ...
+
+    @abstractmethod
+    async def download_url(self, key: str) -> str:
+        ...
+
+
+class LocalStorage(Storage):
+    """Файлы на локальном диске; раздаются смонтированным StaticFiles (/api/uploads)."""
+
+    url_prefix = "uploads"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, *_check_key(key).split("/"))
+
+    async def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    async def put_file(self, key: str, path: str, content_type: Optional[str] = None) -> None:
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Через временное имя: параллельные читатели не увидят недописанный файл
+        temp_target = f"{target}.{uuid.uuid4().hex}.tmp"
+        await asyncio.to_thread(shutil.move, path, temp_target)
+        os.replace(temp_target, target)
+
+    def url(self, key: str) -> str:
+        return f"{self.url_prefix}/{_check_key(key)}"
+
+    async def download_url(self, key: str) -> str:
+        return f"/api/{self.url(key)}"
+
+
+def _is_not_found(error: Exception) -> bool:
+    code = getattr(error, "response", {}).get("Error", {}).get("Code")
+    return code in ("404", "NoSuchKey", "NotFound")
+
+
+class S3Storage(Storage):
+    """
+    S3-совместимое хранилище (AWS S3, MinIO). Байты файлов не проходят через приложение:
+    клиенты получают presigned URL (или публичный URL бакета/CDN) через редирект /api/files/{key}.
+    Вызовы boto3 синхронные и выполняются в потоках.
+    """
+
+    url_prefix = "files"
+
+    def __init__(
+        self,
+        bucket: str,
+        client=None,
+        public_url: Optional[str] = None,
+        presign_expires: int = 3600,
+    ):
+        if client is None:
+            try:
+                import boto3
+            except ImportError:
+                raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 to be installed")
+            client = boto3.client(
+                "s3",
+                endpoint_url=settings.S3_ENDPOINT_URL,
+                region_name=settings.S3_REGION,
+                aws_access_key_id=settings.S3_ACCESS_KEY_ID,
+                aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            )
+        self.bucket = bucket
+        self.client = client
+        self.public_url = public_url.rstrip("/") if public_url else None
+        self.presign_expires = presign_expires
+        if not self.public_url:
+            # Редирект не должен пережить presigned URL, на который он ведет
+            self.redirect_max_age = min(self.redirect_max_age, presign_expires // 2)
+
+    async def exists(self, key: str) -> bool:
+        try:
+            await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=_check_key(key))
+        except Exception as error:
+            if _is_not_found(error):
+                return False
+            raise
+        return True
+
+    async def put_file(self, key: str, path: str, content_type: Optional[str] = None) -> None:
+        extra_args = {"CacheControl": IMMUTABLE_CACHE_CONTROL}
+        if content_type:
+            extra_args["ContentType"] = content_type
+        await asyncio.to_thread(self.client.upload_file, path, self.bucket, _check_key(key), ExtraArgs=extra_args)
+        os.remove(path)
+
+    def url(self, key: str) -> str:
+        return f"{self.url_prefix}/{_check_key(key)}"
+
+    async def download_url(self, key: str) -> str:
+        if self.public_url:
+            return f"{self.public_url}/{_check_key(key)}"
+        return await asyncio.to_thread(
+            self.client.generate_presigned_url,
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": _check_key(key)},
+            ExpiresIn=self.presign_expires,
+        )
+
+
+def create_storage() -> Storage:
+    """Создает хранилище по настройкам STORAGE_BACKEND; неполные настройки — ошибка при старте."""
+    if settings.STORAGE_BACKEND == "s3":
+        if not settings.S3_BUCKET:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires S3_BUCKET to be set")
+        return S3Storage(
+            settings.S3_BUCKET,
+            public_url=settings.S3_PUBLIC_URL,
+            presign_expires=settings.S3_PRESIGN_EXPIRES_SECONDS,
+        )
+    return LocalStorage(settings.UPLOADS_DIR)
+
+
+_storage: Optional[Storage] = None
+
+
+def get_storage() -> Storage:
+    """Зависимость FastAPI: хранилище создается при первом обращении и переиспользуется."""
+    global _storage
+    if _storage is None:
+        _storage = create_storage()
+    return _storage
@@ -1,10 +1,83 @@
 import os
+import time
+import uuid
+from typing import Optional
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+from app.core.metrics import counter, gauge, registry
+from app.core.instrumentation import instrument_engine, record_pool_wait
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, который считает выдачи соединений и время ожидания свободного соединения.
+    Учитывается только блокирующее ожидание в очереди пула (пул исчерпан), а не открытие
+    нового соединения: иначе метрика росла бы как раз тогда, когда пул расширяется.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+        queue_get = self._pool.get
+
+        def timed_get(block: bool = True, timeout: Optional[float] = None):
+            if not block:
+                return queue_get(block, timeout)
+            started = time.perf_counter()
+            try:
+                return queue_get(block, timeout)
+            finally:
+                self._record_wait(time.perf_counter() - started)
+
+        self._pool.get = timed_get
+
+    def _record_wait(self, waited: float) -> None:
+        self.wait_seconds_total += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        record_pool_wait(waited)
+
+    def _do_get(self):
+        self.checkouts += 1
+        return super()._do_get()
+
+
+def engine_options(url: str) -> dict:
+    """Параметры create_async_engine из настроек приложения."""
+    options = {"echo": settings.DB_ECHO}
+    if url.startswith("sqlite"):
+        return options
+
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    if url.startswith("postgresql+asyncpg"):
+        if settings.DB_PGBOUNCER_MODE:
+            # pgbouncer может отдать другое серверное соединение, поэтому подготовленные выражения
+            # не кэшируются, а их имена делаются уникальными
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            }
+        else:
+            options["connect_args"] = {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    return options
+
+
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+instrument_engine(engine)
 
 
 SessionLocal = sessionmaker(
@@ -17,10 +90,43 @@ SessionLocal = sessionmaker(
 
 Base = declarative_base()
 
+
+def pool_stats() -> dict:
+    """Текущее состояние пула соединений основного engine."""
+    pool = engine.pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "checkouts": pool.checkouts,
+        "wait_seconds_total": pool.wait_seconds_total,
+        "max_wait_seconds": pool.max_wait_seconds,
+    }
+
+
+@registry.register
+def _pool_metrics():
+    stats = pool_stats()
+    if not stats:
+        return []
+    return [
+        gauge("kanban_db_pool_size", "Configured pool size", stats["size"]),
+        gauge("kanban_db_pool_checked_out", "Connections currently checked out", stats["checked_out"]),
+        gauge("kanban_db_pool_checked_in", "Idle connections in the pool", stats["checked_in"]),
+        gauge("kanban_db_pool_overflow", "Overflow connections currently open", stats["overflow"]),
+        counter("kanban_db_pool_checkouts_total", "Connection checkouts", stats["checkouts"]),
+        counter("kanban_db_pool_wait_seconds_total", "Time spent waiting for a connection", stats["wait_seconds_total"]),
+        gauge("kanban_db_pool_max_wait_seconds", "Longest wait for a connection", stats["max_wait_seconds"]),
+    ]
+
+
 async def get_db() -> AsyncSession:
     """
     Эта функция-генератор создает и предоставляет сессию базы данных для каждого запроса,
     а затем закрывает ее после выполнения запроса.
     """
     async with SessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
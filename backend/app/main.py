@@ -1,23 +1,76 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles # Import StaticFiles
+from fastapi.responses import PlainTextResponse
+import asyncio
+import contextlib
+import logging
 import os
 from contextlib import asynccontextmanager
 
 from app.api.routers import router as api_router
-from app.db.session import engine, Base
+from app.core.config import settings
+from app.core.events import broker, configure_broker
+from app.core.metrics import registry
+from app.core.instrumentation import MetricsMiddleware
+from app.core.limits import MULTIPART_OVERHEAD, UploadSizeLimitMiddleware
+from app.core.static import UploadsStaticFiles
+from app.core.storage import get_storage
+from app.db.session import SessionLocal, DATABASE_URL
+from app.services import tasks as tasks_service
+from app.services.activity import activity_log
+
+logger = logging.getLogger(__name__)
+
+
+async def rollup_time_periodically():
+    """Периодически переносит heartbeat-записи журнала времени в tasks.time_spent."""
+    while True:
+        await asyncio.sleep(settings.TIME_ROLLUP_INTERVAL_SECONDS)
+        try:
+            async with SessionLocal() as db:
+                await tasks_service.rollup_time_entries(db)
+        except Exception:
+            logger.exception("Time entries rollup failed")
+
+
+async def rebalance_positions_periodically():
+    """Перебалансирует колонки, в которых ключи ручного порядка стали слишком длинными."""
+    while True:
+        await asyncio.sleep(settings.POSITION_REBALANCE_INTERVAL_SECONDS)
+        if not tasks_service.pending_rebalance:
+            continue
+        try:
+            async with SessionLocal() as db:
+                await tasks_service.rebalance_pending_columns(db)
+        except Exception:
+            logger.exception("Task positions rebalance failed")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Управляет жизненным циклом приложения.
+    Схема базы создается и обновляется миграциями Alembic (alembic upgrade head), а не при старте.
     """
-    print("Application startup...")
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    print("Database tables checked/created.")
+    logger.info("Application startup")
+    # Хранилище создается сразу: ошибка в его настройках должна остановить запуск, а не первый запрос
+    get_storage()
+    configure_broker(DATABASE_URL)
+    await broker.start()
+    background_tasks = [
+        asyncio.create_task(rollup_time_periodically()),
+        asyncio.create_task(rebalance_positions_periodically()),
+        asyncio.create_task(activity_log.run(SessionLocal)),
+    ]
     yield
-    print("Application shutdown.")
+    for background_task in background_tasks:
+        background_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await background_task
+    # Дописываем журнал действий, накопленный с последней фоновой записи
+    await activity_log.flush(SessionLocal)
+    await broker.stop()
+    logger.info("Application shutdown")
 
 app = FastAPI(title="Kanban Board API", lifespan=lifespan)
 
@@ -29,21 +82,28 @@ origins = [
     "http://127.0.0.1:5173",
 ]
 
+# Аватар больше AVATAR_MAX_BYTES отклоняется до того, как тело будет принято целиком
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={"/api/users/me/avatar": lambda: settings.AVATAR_MAX_BYTES + MULTIPART_OVERHEAD},
+)
+
+# Латентность, число и время SQL-запросов на HTTP-запрос (см. /metrics)
+app.add_middleware(MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"], # Разрешаем все методы (GET, POST, PUT, DELETE и т.д.)
     allow_headers=["*"], # Разрешаем все заголовки
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"], # Курсор пагинации и заголовки кэширования должны быть доступны фронтенду
 )
 
-# Define the uploads directory for main.py context
-UPLOADS_DIR_MAIN = "uploads" 
-# Ensure the directory exists (though routers.py also does this, belt and suspenders)
-os.makedirs(UPLOADS_DIR_MAIN, exist_ok=True) 
+os.makedirs(settings.UPLOADS_DIR, exist_ok=True)
 
-# Mount static files for uploads - this path should now be /api/uploads
-app.mount("/api/uploads", StaticFiles(directory=UPLOADS_DIR_MAIN), name="api_uploads")
+# Загрузки (аватары) отдаются как /api/uploads; аватары по хешу кэшируются как неизменяемые
+app.mount("/api/uploads", UploadsStaticFiles(directory=settings.UPLOADS_DIR), name="api_uploads")
 
 
 
@@ -51,4 +111,9 @@ app.include_router(api_router, prefix="/api")
 
 @app.get("/")
 def read_root():
-    return {"message": "Welcome to Kanban Board API"}
\ No newline at end of file
+    return {"message": "Welcome to Kanban Board API"}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def read_metrics():
+    """Метрики в текстовом формате Prometheus."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
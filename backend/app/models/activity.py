@@ -0,0 +1,23 @@
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, String
+from app.db.session import Base
+from datetime import datetime
+
+
+class TaskActivity(Base):
+    """
+    Журнал действий над задачами: кто и когда создал, изменил, перенес, удалил задачу
+    или списал на нее время. Пишется пакетами в фоне (см. app/services/activity.py).
+    """
+    __tablename__ = "task_activity"
+    id = Column(Integer, primary_key=True)
+    # Без внешних ключей: история остается после удаления задачи или пользователя,
+    # а запись может дойти до базы уже после удаления
+    task_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=True)  # None — действие системы
+    action = Column(String, nullable=False)  # created, updated, moved, time_logged, deleted
+    changes = Column(JSON, nullable=False, default=dict)  # Новые значения измененных полей
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+# История задачи читается от новых записей к старым
+Index("ix_task_activity_task_id_created_at", TaskActivity.task_id, TaskActivity.created_at, TaskActivity.id)
@@ -0,0 +1,78 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, column, func, select, table, union_all
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from app.db.session import Base
+from datetime import datetime
+
+# Таблицы, в которых хранится change_seq; по ним считается max + 1 там, где нет id транзакций
+CHANGE_TABLES = ("tasks", "users", "tombstones")
+
+
+class next_change_seq(FunctionElement):
+    """
+    Следующее значение change_seq как SQL-выражение для default/onupdate колонок.
+    В Postgres это id пишущей транзакции (xid8): все изменения транзакции получают одну версию;
+    в SQLite (тесты) — max(change_seq) + 1 по всем таблицам (запись в SQLite и так одна).
+    """
+    type = BigInteger()
+    inherit_cache = True
+
+
+@compiles(next_change_seq, "postgresql")
+def _next_change_seq_postgresql(element, compiler, **kw):
+    return "pg_current_xact_id()::text::bigint"
+
+
+@compiles(next_change_seq)
+def _next_change_seq_default(element, compiler, **kw):
+    maxes = " UNION ALL ".join(f"SELECT max(change_seq) AS seq FROM {table}" for table in CHANGE_TABLES)
+    return f"(SELECT coalesce(max(seq), 0) + 1 FROM ({maxes}))"
+
+
+class change_horizon(FunctionElement):
+    """
+    Граница зафиксированных версий: все change_seq меньше нее окончательны.
+    Версия выдается при записи, а видна после commit, и транзакция с меньшей версией может
+    зафиксироваться позже той, что клиент уже получил. В Postgres граница — xmin текущего
+    снимка: все транзакции с меньшим id завершены, а новые получат id не меньше него.
+    В SQLite записи идут по одной, и окончательно все, что уже видно: граница не нужна.
+    """
+    type = BigInteger()
+    inherit_cache = True
+
+
+@compiles(change_horizon, "postgresql")
+def _change_horizon_postgresql(element, compiler, **kw):
+    return "pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+
+
+@compiles(change_horizon)
+def _change_horizon_default(element, compiler, **kw):
+    # Верхняя граница BIGINT: без ограничения
+    return str(2 ** 63 - 1)
+
+
+def latest_change_seq():
+    """
+    SELECT последней окончательной версии по всем таблицам (0 для пустой базы, см. change_horizon);
+    читает только индексы.
+    """
+    seq = column("change_seq")
+    horizon = change_horizon()
+    maxes = union_all(*(
+        select(func.max(seq).label("seq")).select_from(table(name)).where(seq < horizon)
+        for name in CHANGE_TABLES
+    )).subquery()
+    return select(func.coalesce(func.max(maxes.c.seq), 0))
+
+
+class Tombstone(Base):
+    """Запись об удаленном объекте, чтобы клиенты синхронизации узнали об удалении."""
+    __tablename__ = "tombstones"
+    id = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)  # "task" или "user"
+    entity_id = Column(Integer, nullable=False)
+    change_seq = Column(BigInteger, default=next_change_seq(), nullable=False, index=True)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __mapper_args__ = {"eager_defaults": True}
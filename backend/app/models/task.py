@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum as SQLAlchemyEnum, Float, Table, DateTime # Added DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum as SQLAlchemyEnum, Float, Table, DateTime, Index, DDL, event, BigInteger # Added DateTime
+from sqlalchemy.orm import relationship, validates
 from app.db.session import Base
 from app.models.user import User
+from app.models.change import next_change_seq
+from app.core.ranking import FIRST_RANK
 import enum
 from datetime import datetime # Added datetime import
 
@@ -10,6 +12,8 @@ task_assignees_table = Table(
     Base.metadata,
     Column("task_id", Integer, ForeignKey("tasks.id"), primary_key=True),
     Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    # Первичный ключ (task_id, user_id) не помогает искать задачи исполнителя («мои задачи», фильтр assignee_id)
+    Index("ix_task_assignees_user_id_task_id", "user_id", "task_id"),
 )
 
 class TaskStatus(str, enum.Enum):
@@ -23,21 +27,71 @@ class TaskType(str, enum.Enum):
     documentation = "documentation"
     testing = "testing"
 
+# Ранг приоритета для сортировки: чем меньше, тем выше задача в списке
+PRIORITY_RANKS = {"high": 0, "medium": 1, "low": 2}
+DEFAULT_PRIORITY_RANK = 3
+
+
+def rank_for_priority(priority: str) -> int:
+    """Возвращает числовой ранг для строкового приоритета."""
+    return PRIORITY_RANKS.get(priority, DEFAULT_PRIORITY_RANK)
+
+
+# В Postgres ключи порядка сравниваются в collation "C" (побайтово), а не по правилам локали
+POSITION_TYPE = String().with_variant(String(collation="C"), "postgresql")
+
+
 class Task(Base):
     __tablename__ = "tasks"
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     description = Column(String)
-    status = Column(SQLAlchemyEnum(TaskStatus), default=TaskStatus.todo) # Use SQLAlchemyEnum
+    status = Column(SQLAlchemyEnum(TaskStatus), default=TaskStatus.todo, index=True) # Use SQLAlchemyEnum
     type = Column(SQLAlchemyEnum(TaskType), default=TaskType.development) # Use SQLAlchemyEnum
     priority = Column(String, default='medium', nullable=False, index=True) # Added priority field
+    priority_rank = Column(Integer, default=PRIORITY_RANKS["medium"], nullable=False) # Stored rank of priority, kept in sync by _sync_priority_rank
     time_spent = Column(Float, default=0.0)
+    # Ручной порядок карточки в колонке: дробный ключ (app/core/ranking.py), сравнивается побайтово
+    position = Column(POSITION_TYPE, default=FIRST_RANK, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False) # Added created_at field
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Номер последнего изменения для дельта-синхронизации (/api/sync); растет при каждом INSERT/UPDATE
+    change_seq = Column(BigInteger, default=next_change_seq(), onupdate=next_change_seq(), nullable=False, index=True)
 
-    creator_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    creator_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     
     creator = relationship("User", foreign_keys=[creator_id], backref="created_tasks")
     
     assignees = relationship(
         "User", secondary=task_assignees_table, backref="assigned_tasks"
     )
+
+    # change_seq вычисляется в SQL; забираем его через RETURNING, чтобы атрибут не устаревал после flush
+    __mapper_args__ = {"eager_defaults": True}
+
+    @validates("priority")
+    def _sync_priority_rank(self, key, value):
+        self.priority_rank = rank_for_priority(value)
+        return value
+
+
+# Составной индекс под сортировку списков задач и keyset-пагинацию
+Index(
+    "ix_tasks_priority_rank_created_at_id",
+    Task.priority_rank,
+    Task.created_at.desc(),
+    Task.id.desc(),
+)
+Index("ix_tasks_created_at_id", Task.created_at, Task.id)
+# Карточки колонки в ручном порядке и поиск соседей при переносе
+Index("ix_tasks_status_position", Task.status, Task.position)
+
+# Поиск по подстроке (ILIKE) в Postgres обслуживают триграммные GIN-индексы.
+# В рабочей базе их создает миграция Alembic; эти DDL нужны для create_all (тесты, бенчмарки).
+# На SQLite они пропускаются, а ILIKE работает полным сканированием.
+for _ddl in (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_title_trgm ON tasks USING gin (title gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_description_trgm ON tasks USING gin (description gin_trgm_ops)",
+):
+    event.listen(Task.__table__, "after_create", DDL(_ddl).execute_if(dialect="postgresql"))
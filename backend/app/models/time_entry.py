@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, Float, Boolean, ForeignKey, DateTime, Index
+from app.db.session import Base
+from datetime import datetime
+
+
+class TimeEntry(Base):
+    """
+    Журнал учета времени: только вставки, по записи на каждое списание или heartbeat таймера.
+    Записи с rolled_up=False еще не учтены в tasks.time_spent.
+    """
+    __tablename__ = "time_entries"
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    hours = Column(Float, nullable=False)
+    rolled_up = Column(Boolean, default=False, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+# Частичный индекс по неучтенным записям для rollup
+Index(
+    "ix_time_entries_pending",
+    TimeEntry.id,
+    postgresql_where=TimeEntry.rolled_up.is_(False),
+    sqlite_where=TimeEntry.rolled_up.is_(False),
+)
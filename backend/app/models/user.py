@@ -1,5 +1,7 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
 from app.db.session import Base
+from app.models.change import next_change_seq
+from datetime import datetime
 
 class User(Base):
     __tablename__ = "users"
@@ -8,4 +10,8 @@ class User(Base):
     last_name = Column(String, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
-    avatar_url = Column(String, nullable=True)
\ No newline at end of file
+    avatar_url = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    change_seq = Column(BigInteger, default=next_change_seq(), onupdate=next_change_seq(), nullable=False, index=True)
+
+    __mapper_args__ = {"eager_defaults": True}
@@ -0,0 +1,16 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class ActivityOut(BaseModel):
+    id: int
+    task_id: int
+    user_id: Optional[int] = None
+    action: str
+    # Новые значения измененных полей, например {"status": "done"} или {"hours": 1.5}
+    changes: Dict[str, Any] = {}
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
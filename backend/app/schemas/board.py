@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from .task import TaskOut
+from app.models.task import TaskStatus
+
+
+class BoardColumn(BaseModel):
+    status: TaskStatus
+    count: int
+    time_spent: float
+    tasks: List[TaskOut] = []
+    # Курсор для догрузки колонки через GET /api/tasks/?status=...&cursor=...
+    next_cursor: Optional[str] = None
+
+
+class BoardOut(BaseModel):
+    columns: List[BoardColumn]
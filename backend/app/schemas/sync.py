@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List
+from .task import TaskOut
+from .user import UserOut
+
+
+class SyncOut(BaseModel):
+    # Версия, которую клиент передает в следующем запросе как ?since=
+    version: int
+    tasks: List[TaskOut] = []
+    users: List[UserOut] = []
+    deleted_tasks: List[int] = []
+    deleted_users: List[int] = []
+    # True, если изменений больше limit: клиенту нужно запросить следующую порцию
+    has_more: bool = False
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, List
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+from typing import Dict, Optional, List
 from datetime import datetime # Added datetime import
+import enum
 from .user import UserOut
 from app.models.task import TaskStatus, TaskType
 
@@ -27,7 +28,109 @@ class TaskOut(TaskBase):
     # priority is inherited from TaskBase and will be included here
     time_spent: float
     created_at: datetime # Added created_at field
+    position: str  # ключ ручного порядка в колонке (см. app/core/ranking.py)
     creator: UserOut
     assignees: List[UserOut] = []
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TaskRef(TaskBase):
+    """Задача в нормализованном списке: пользователи заданы id, сами они — в TaskListNormalized.users."""
+    id: int
+    status: TaskStatus
+    time_spent: float
+    created_at: datetime
+    position: str
+    creator_id: int
+    assignee_ids: List[int] = []
+
+
+class TaskListNormalized(BaseModel):
+    tasks: List[TaskRef]
+    users: Dict[int, UserOut]
+
+
+class TaskShape(str, enum.Enum):
+    full = "full"  # TaskOut с вложенными пользователями
+    normalized = "normalized"  # TaskListNormalized
+
+
+class TaskSort(str, enum.Enum):
+    priority = "priority"  # приоритет, затем новые
+    newest = "newest"
+    oldest = "oldest"
+    position = "position"  # ручной порядок карточек в колонке
+
+
+class ExportFormat(str, enum.Enum):
+    csv = "csv"
+    ndjson = "ndjson"  # один JSON-объект на строку
+
+
+class ExportReport(str, enum.Enum):
+    tasks = "tasks"  # задачи с именами создателя и исполнителей
+    time = "time"  # время по задачам в разбивке по пользователям
+
+
+class TaskFilter(BaseModel):
+    """Параметры фильтрации и поиска для списков задач."""
+    status: Optional[List[TaskStatus]] = None
+    type: Optional[List[TaskType]] = None
+    priority: Optional[List[str]] = None
+    assignee_id: Optional[int] = None
+    creator_id: Optional[int] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    q: Optional[str] = Field(None, min_length=1, max_length=100, description="Поиск по заголовку и описанию")
+
+
+# Максимальное число операций в одном пакетном запросе
+MAX_BATCH_SIZE = 500
+
+
+class TaskBatchUpdate(TaskUpdate):
+    id: int
+
+
+class TaskMove(BaseModel):
+    id: int
+    status: TaskStatus
+
+
+class TaskPlacement(BaseModel):
+    """
+    Куда перенести карточку: колонка (по умолчанию текущая) и соседи в ней.
+    after_id — карточка, которая окажется выше, before_id — ниже; без соседей — в конец колонки.
+    """
+    status: Optional[TaskStatus] = None
+    after_id: Optional[int] = None
+    before_id: Optional[int] = None
+
+
+class TaskBatch(BaseModel):
+    """Пакет операций над задачами, применяемый в одной транзакции."""
+    create: List[TaskCreate] = []
+    update: List[TaskBatchUpdate] = []
+    move: List[TaskMove] = []
+    delete: List[int] = []
+
+    @model_validator(mode="after")
+    def check_size(self):
+        size = len(self.create) + len(self.update) + len(self.move) + len(self.delete)
+        if size > MAX_BATCH_SIZE:
+            raise ValueError(f"Batch is limited to {MAX_BATCH_SIZE} operations")
+        return self
+
+
+class TaskBatchItemResult(BaseModel):
+    op: str
+    index: int
+    id: Optional[int] = None
+    status_code: int
+    detail: Optional[str] = None
+    task: Optional[TaskOut] = None
+
+
+class TaskBatchResult(BaseModel):
+    results: List[TaskBatchItemResult]
@@ -0,0 +1,10 @@
+from pydantic import BaseModel, Field
+
+
+class TimeLog(BaseModel):
+    hours: float = Field(..., gt=0, le=24, description="Сколько часов списать на задачу")
+
+
+class UserTimeTotal(BaseModel):
+    user_id: int
+    hours: float
@@ -0,0 +1,155 @@
+"""
+Журнал действий над задачами с отложенной записью. Мутации tasks_service только кладут
+событие в очередь процесса (без запросов к базе), а фоновый писатель вставляет накопленные
+события пакетами — многострочным INSERT. Очередь ограничена: при переполнении новые события
+отбрасываются и учитываются в метрике, запросы пользователей не ждут базу журнала.
+"""
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from pydantic_core import to_jsonable_python
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.core.metrics import counter, gauge, registry
+from app.core.pagination import SortKey, decode_cursor, keyset_after, next_cursor, order_by_keys
+from app.models.activity import TaskActivity
+
+logger = logging.getLogger(__name__)
+
+# История задачи отдается от новых записей к старым
+ACTIVITY_SORT = "activity"
+ACTIVITY_KEYS: List[SortKey] = [(TaskActivity.created_at, True), (TaskActivity.id, True)]
+
+
+class ActivityLog:
+    """
+    Очередь событий журнала и ее писатель. run() работает фоновой задачей (см. app/main.py),
+    flush() дописывает остаток при остановке приложения. Вместо asyncio.Queue — deque и Event,
+    создаваемый в run(): очередь живет дольше одного event loop (например, в тестах).
+    """
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float):
+        self.max_size = max_size
+        self._events: Deque[dict] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Пакет, забранный из очереди, но еще не записанный: его допишет flush() после отмены run()
+        self._pending: List[dict] = []
+        self._overflowing = False
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def record(self, task_id: int, user_id: Optional[int], action: str, changes: Optional[Dict[str, Any]] = None) -> None:
+        """Ставит событие в очередь; время действия фиксируется сейчас, а не при записи."""
+        event = {
+            "task_id": task_id, "user_id": user_id, "action": action,
+            "changes": to_jsonable_python(changes or {}), "created_at": datetime.utcnow(),
+        }
+        if len(self._events) >= self.max_size:
+            self.dropped += 1
+            if not self._overflowing:
+                logger.warning("Activity queue is full, dropping events")
+                self._overflowing = True
+            return
+        self._events.append(event)
+        self.recorded += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def _take(self, count: int) -> None:
+        while len(self._pending) < count and self._events:
+            self._pending.append(self._events.popleft())
+
+    async def _write_pending(self, session_factory: Callable[[], AsyncSession]) -> int:
+        batch, written = self._pending, len(self._pending)
+        try:
+            async with session_factory() as db:
+                await db.execute(insert(TaskActivity).values(batch))
+                await db.commit()
+            self.written += written
+        except Exception:
+            # Пакет не повторяем: ошибка, скорее всего, повторится и заблокирует очередь
+            logger.exception("Failed to write %s activity events", written)
+            self.failed += written
+        self._pending = []
+        self._overflowing = False
+        return written
+
+    async def flush(self, session_factory: Callable[[], AsyncSession]) -> int:
+        """Записывает все накопленные события пакетами по batch_size; возвращает их число."""
+        written = 0
+        self._take(self.batch_size)
+        while self._pending:
+            written += await self._write_pending(session_factory)
+            self._take(self.batch_size)
+        return written
+
+    async def run(self, session_factory: Callable[[], AsyncSession]) -> None:
+        """
+        Фоновый писатель: дождавшись события, ждет flush_interval, чтобы собрать пакет
+        из соседних запросов (если пакет уже полон — пишет сразу).
+        """
+        self._wakeup = asyncio.Event()
+        try:
+            while True:
+                if not self._pending and not self._events:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                if len(self._pending) + len(self._events) < self.batch_size:
+                    await asyncio.sleep(self.flush_interval)
+                self._take(self.batch_size)
+                await self._write_pending(session_factory)
+        finally:
+            self._wakeup = None
+
+    def clear(self) -> None:
+        self._pending = []
+        self._events.clear()
+
+
+activity_log = ActivityLog(
+    max_size=settings.ACTIVITY_QUEUE_SIZE,
+    batch_size=settings.ACTIVITY_BATCH_SIZE,
+    flush_interval=settings.ACTIVITY_FLUSH_INTERVAL_SECONDS,
+)
+
+
+@registry.register
+def _activity_metrics():
+    return [
+        gauge("kanban_activity_queue_size", "Activity events waiting to be written", len(activity_log)),
+        counter("kanban_activity_recorded_total", "Activity events queued", activity_log.recorded),
+        counter("kanban_activity_written_total", "Activity events written to the database", activity_log.written),
+        counter("kanban_activity_dropped_total", "Activity events dropped on a full queue", activity_log.dropped),
+        counter("kanban_activity_failed_total", "Activity events lost on write errors", activity_log.failed),
+    ]
+
+
+async def get_task_activity(
+    db: AsyncSession, task_id: int, limit: int = 50, cursor: Optional[str] = None
+) -> List[TaskActivity]:
+    """
+    История задачи от новых записей к старым с keyset-пагинацией. Доступна и для удаленной задачи.
+    События последней секунды могут еще не дойти до базы.
+    """
+    query = select(TaskActivity).where(TaskActivity.task_id == task_id).order_by(*order_by_keys(ACTIVITY_KEYS))
+    if cursor:
+        query = query.where(keyset_after(ACTIVITY_KEYS, decode_cursor(cursor, ACTIVITY_SORT, ACTIVITY_KEYS)))
+    result = await db.execute(query.limit(limit))
+    return result.scalars().all()
+
+
+def activity_next_cursor(entries: List[TaskActivity], limit: int) -> Optional[str]:
+    return next_cursor(entries, limit, ACTIVITY_SORT, ACTIVITY_KEYS)
@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+import mimetypes
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import anyio
+from fastapi import HTTPException, UploadFile, status
+
+from app.core.config import settings
+from app.core.storage import Storage
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow не установлен: аватары сохраняются без проверки и миниатюр
+    Image = None
+
+CHUNK_SIZE = 64 * 1024
+AVATAR_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+# Аватары хранятся по хешу содержимого: ключ однозначно задает файл
+AVATARS_SUBDIR = "avatars"
+
+_executor = ThreadPoolExecutor(max_workers=settings.AVATAR_WORKERS, thread_name_prefix="avatar")
+
+
+def avatar_key(digest: str, extension: str) -> str:
+    """Ключ аватара в хранилище: avatars/ab/abcdef....png."""
+    return f"{AVATARS_SUBDIR}/{digest[:2]}/{digest}{extension}"
+
+
+def thumbnail_key(key: str, size: int) -> str:
+    """Ключ миниатюры рядом с оригиналом: avatars/ab/abcdef..._64.png."""
+    return f"{os.path.splitext(key)[0]}_{size}.png"
+
+
+def avatar_thumbnail_url(avatar_url: Optional[str], size: int) -> Optional[str]:
+    """URL миниатюры для avatar_url из профиля; None для старых аватаров без миниатюр."""
+    if not avatar_url or f"/{AVATARS_SUBDIR}/" not in avatar_url:
+        return None
+    return thumbnail_key(avatar_url, size)
+
+
+def _verify_image(path: str) -> None:
+    with Image.open(path) as image:
+        image.verify()
+
+
+def _make_thumbnails(source: str, directory: str) -> Dict[int, str]:
+    paths = {}
+    with Image.open(source) as image:
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        for size in settings.AVATAR_THUMBNAIL_SIZES:
+            thumbnail = image.copy()
+            thumbnail.thumbnail((size, size))
+            paths[size] = os.path.join(directory, f"{size}.png")
+            thumbnail.save(paths[size], format="PNG")
+    return paths
+
+
+async def _run_in_pool(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+async def save_avatar(upload: UploadFile, storage: Storage) -> str:
+    """
+    Сохраняет принятый аватар в хранилище; возвращает URL относительно /api/.
+    Слишком большие тела отсекает UploadSizeLimitMiddleware еще до разбора multipart;
+    здесь файл читается порциями с подсчетом sha256 и точной проверкой размера (413).
+    Одинаковые файлы хранятся один раз. Если установлен Pillow, изображение проверяется,
+    а миниатюры AVATAR_THUMBNAIL_SIZES готовятся в пуле потоков.
+    """
+    extension = os.path.splitext(upload.filename or "")[1].lower()
+    if extension not in AVATAR_EXTENSIONS:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Unsupported image type")
+
+    work_dir = tempfile.mkdtemp(prefix="avatar-")
+    try:
+        original = os.path.join(work_dir, f"original{extension}")
+        digest = hashlib.sha256()
+        size = 0
+        async with await anyio.open_file(original, "wb") as buffer:
+            while chunk := await upload.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.AVATAR_MAX_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                        detail=f"Avatar is larger than {settings.AVATAR_MAX_BYTES} bytes",
+                    )
+                digest.update(chunk)
+                await buffer.write(chunk)
+
+        key = avatar_key(digest.hexdigest(), extension)
+        # Оригинал загружается последним, поэтому если он есть, миниатюры тоже есть
+        if await storage.exists(key):
+            return storage.url(key)
+
+        if Image is not None:
+            try:
+                await _run_in_pool(_verify_image, original)
+            except Exception:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image")
+            thumbnails = await _run_in_pool(_make_thumbnails, original, work_dir)
+            for thumbnail_size, path in thumbnails.items():
+                await storage.put_file(thumbnail_key(key, thumbnail_size), path, "image/png")
+
+        await storage.put_file(key, original, mimetypes.guess_type(original)[0])
+        return storage.url(key)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,60 @@
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+from typing import Optional
+from app.core.pagination import next_cursor, order_by_keys
+from app.models.task import Task, TaskStatus
+from app.schemas.board import BoardColumn, BoardOut
+from app.schemas.task import TaskFilter, TaskSort
+from app.services.tasks import TASK_SORTS, apply_filters
+
+
+async def get_board(
+    db: AsyncSession,
+    per_column: int = 20,
+    filters: Optional[TaskFilter] = None,
+    sort: TaskSort = TaskSort.priority,
+) -> BoardOut:
+    """
+    Собирает доску за два запроса: агрегаты по колонкам (GROUP BY status)
+    и первые per_column карточек каждой колонки (ROW_NUMBER() OVER (PARTITION BY status)).
+    """
+    keys = TASK_SORTS[sort]
+
+    totals = await db.execute(
+        apply_filters(
+            select(Task.status, func.count(Task.id), func.coalesce(func.sum(Task.time_spent), 0.0)),
+            filters,
+        ).group_by(Task.status)
+    )
+    stats = {task_status: (count, time_spent) for task_status, count, time_spent in totals.all()}
+
+    row_number = func.row_number().over(
+        partition_by=Task.status, order_by=order_by_keys(keys)
+    ).label("row_number")
+    ranked = apply_filters(select(Task.id, row_number), filters).subquery()
+    result = await db.execute(
+        select(Task)
+        .join(ranked, Task.id == ranked.c.id)
+        .where(ranked.c.row_number <= per_column)
+        .options(selectinload(Task.creator), selectinload(Task.assignees))
+        .order_by(Task.status, *order_by_keys(keys))
+    )
+    cards = {task_status: [] for task_status in TaskStatus}
+    for task in result.scalars().all():
+        cards[task.status].append(task)
+
+    statuses = filters.status if filters is not None and filters.status else list(TaskStatus)
+    columns = []
+    for task_status in statuses:
+        count, time_spent = stats.get(task_status, (0, 0.0))
+        column_tasks = cards[task_status]
+        columns.append(BoardColumn(
+            status=task_status,
+            count=count,
+            time_spent=time_spent,
+            tasks=column_tasks,
+            next_cursor=next_cursor(column_tasks, per_column, sort.value, keys) if count > per_column else None,
+        ))
+    return BoardOut(columns=columns)
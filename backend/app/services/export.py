@@ -0,0 +1,153 @@
+"""
+Потоковая выгрузка задач и отчета по времени в CSV и NDJSON. Строки читаются из базы
+серверным курсором порциями по EXPORT_BATCH_SIZE и сразу кодируются, поэтому память
+не зависит от размера выгрузки. Имена исполнителей собираются в том же запросе.
+"""
+import csv
+import enum
+import io
+from datetime import datetime
+from typing import Any, AsyncIterator, List, Optional, Sequence
+
+from sqlalchemy import String, func, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.future import select
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql.functions import FunctionElement
+
+from app.core.config import settings
+from app.core.pagination import order_by_keys
+from app.core.responses import dumps
+from app.models.task import Task, task_assignees_table
+from app.models.time_entry import TimeEntry
+from app.models.user import User
+from app.schemas.task import ExportFormat, ExportReport, TaskFilter, TaskSort
+from app.services.tasks import TASK_SORTS, apply_filters
+
+MEDIA_TYPES = {
+    ExportFormat.csv: "text/csv; charset=utf-8",
+    ExportFormat.ndjson: "application/x-ndjson",
+}
+
+
+class string_agg(FunctionElement):
+    """
+    Склейка строк группы через разделитель: string_agg(expr, sep) в Postgres,
+    group_concat(expr, sep) в SQLite (тесты).
+    """
+    type = String()
+    inherit_cache = True
+
+
+@compiles(string_agg, "postgresql")
+def _string_agg_postgresql(element, compiler, **kw):
+    return f"string_agg({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(string_agg)
+def _string_agg_default(element, compiler, **kw):
+    return f"group_concat({compiler.process(element.clauses, **kw)})"
+
+
+def full_name(user) -> Any:
+    """«Имя Фамилия» пользователя как SQL-выражение."""
+    return func.trim(func.coalesce(user.first_name, "") + " " + func.coalesce(user.last_name, ""))
+
+
+def _tasks_query(filters: Optional[TaskFilter], sort: TaskSort):
+    creator = aliased(User)
+    assignee = aliased(User)
+    # Коррелированный подзапрос по индексу task_assignees: без GROUP BY по всей таблице,
+    # поэтому первые строки уходят клиенту сразу
+    assignees = (
+        select(string_agg(full_name(assignee), literal_column("', '")))
+        .select_from(task_assignees_table.join(assignee, assignee.id == task_assignees_table.c.user_id))
+        .where(task_assignees_table.c.task_id == Task.id)
+        .scalar_subquery()
+    )
+    query = (
+        select(
+            Task.id, Task.title, Task.description, Task.type, Task.status, Task.priority,
+            Task.time_spent, Task.created_at, full_name(creator).label("creator"),
+            # Без исполнителей — пустая строка, а не NULL: одинаково в CSV и NDJSON
+            func.coalesce(assignees, "").label("assignees"),
+        )
+        .join(creator, creator.id == Task.creator_id)
+    )
+    return apply_filters(query, filters).order_by(*order_by_keys(TASK_SORTS[sort]))
+
+
+def _time_query(filters: Optional[TaskFilter]):
+    query = (
+        select(
+            Task.id.label("task_id"), Task.title, TimeEntry.user_id, full_name(User).label("user"),
+            func.sum(TimeEntry.hours).label("hours"),
+        )
+        .join(TimeEntry, TimeEntry.task_id == Task.id)
+        .join(User, User.id == TimeEntry.user_id)
+        .group_by(Task.id, Task.title, TimeEntry.user_id, User.first_name, User.last_name)
+    )
+    return apply_filters(query, filters).order_by(Task.id, TimeEntry.user_id)
+
+
+# Начала ячеек, которые табличные редакторы считают формулой (=HYPERLINK(...) и т.п.)
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv_cell(value: Any) -> Any:
+    """Значение ячейки CSV; строки, похожие на формулу, экранируются апострофом (CSV injection)."""
+    value = _plain(value)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+async def _partitions(db: AsyncSession, query) -> AsyncIterator[Sequence[Any]]:
+    result = await db.stream(query.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+    async for partition in result.partitions():
+        yield partition
+
+
+async def _encode_csv(columns: List[str], partitions: AsyncIterator[Sequence[Any]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for partition in partitions:
+        writer.writerows([_csv_cell(value) for value in row] for row in partition)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    # Заголовок пустой выгрузки
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def _encode_ndjson(columns: List[str], partitions: AsyncIterator[Sequence[Any]]) -> AsyncIterator[bytes]:
+    async for partition in partitions:
+        yield b"".join(dumps(dict(zip(columns, map(_plain, row)))) + b"\n" for row in partition)
+
+
+def export_tasks(
+    db: AsyncSession,
+    export_format: ExportFormat,
+    report: ExportReport = ExportReport.tasks,
+    filters: Optional[TaskFilter] = None,
+    sort: TaskSort = TaskSort.priority,
+) -> AsyncIterator[bytes]:
+    """
+    Генератор тела выгрузки: по куску на порцию строк. Фильтры те же, что у списка задач;
+    отчет по времени суммирует журнал времени по задаче и пользователю.
+    """
+    query = _tasks_query(filters, sort) if report == ExportReport.tasks else _time_query(filters)
+    columns = [column.name for column in query.selected_columns]
+    encode = _encode_csv if export_format == ExportFormat.csv else _encode_ndjson
+    return encode(columns, _partitions(db, query))
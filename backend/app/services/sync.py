@@ -0,0 +1,59 @@
+from sqlalchemy import union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+from app.models.change import Tombstone, change_horizon
+from app.models.task import Task
+from app.models.user import User
+from app.schemas.sync import SyncOut
+from app.schemas.task import TaskOut
+from app.schemas.user import UserOut
+
+
+async def get_changes(db: AsyncSession, since: int = 0, limit: int = 500) -> SyncOut:
+    """
+    Возвращает задачи и пользователей, измененные после версии since, и id удаленных объектов.
+    Все таблицы читаются по индексу change_seq, поэтому стоимость зависит от числа изменений,
+    а не от размера доски. Изменения отдаются порциями по limit версий.
+    Отдаются только версии ниже change_horizon: изменение с меньшей версией, еще не
+    зафиксированное к моменту чтения, не окажется позади версии, которую получил клиент.
+    """
+    horizon = change_horizon()
+    changes = union_all(
+        select(Task.change_seq.label("seq")).where(Task.change_seq > since, Task.change_seq < horizon),
+        select(User.change_seq).where(User.change_seq > since, User.change_seq < horizon),
+        select(Tombstone.change_seq).where(Tombstone.change_seq > since, Tombstone.change_seq < horizon),
+    ).subquery()
+    # Различные версии, а не строки: изменения с одинаковым change_seq не разрываются между
+    # порциями, а лишняя (limit + 1)-я версия показывает, что следующая порция не пуста
+    seqs = (await db.execute(
+        select(changes.c.seq).distinct().order_by(changes.c.seq).limit(limit + 1)
+    )).scalars().all()
+    if not seqs:
+        return SyncOut(version=since)
+    has_more = len(seqs) > limit
+    upto = seqs[limit - 1] if has_more else seqs[-1]
+
+    tasks = (await db.execute(
+        select(Task)
+        .options(selectinload(Task.creator), selectinload(Task.assignees))
+        .where(Task.change_seq > since, Task.change_seq <= upto)
+        .order_by(Task.change_seq)
+    )).scalars().all()
+    users = (await db.execute(
+        select(User).where(User.change_seq > since, User.change_seq <= upto).order_by(User.change_seq)
+    )).scalars().all()
+    tombstones = (await db.execute(
+        select(Tombstone.entity, Tombstone.entity_id)
+        .where(Tombstone.change_seq > since, Tombstone.change_seq <= upto)
+        .order_by(Tombstone.change_seq)
+    )).all()
+
+    return SyncOut(
+        version=upto,
+        tasks=[TaskOut.model_validate(task) for task in tasks],
+        users=[UserOut.model_validate(user) for user in users],
+        deleted_tasks=[entity_id for entity, entity_id in tombstones if entity == "task"],
+        deleted_users=[entity_id for entity, entity_id in tombstones if entity == "user"],
+        has_more=has_more,
+    )
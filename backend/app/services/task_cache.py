@@ -0,0 +1,84 @@
+import hashlib
+from typing import Awaitable, Callable, Iterable, Optional, Tuple
+
+from app.core.cache import GenerationalCache, MemoryCacheBackend, RedisCacheBackend
+from app.core.config import settings
+from app.core.metrics import counter, gauge, registry
+from app.schemas.task import TaskFilter, TaskShape, TaskSort
+
+# Области инвалидации: общий список задач, «мои задачи» пользователя и все списки сразу
+# (смена данных пользователя, например аватара, видна в карточках любого списка)
+ALL_TASKS_SCOPE = "tasks"
+EVERYTHING_SCOPE = "*"
+
+
+def user_scope(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def create_task_list_cache() -> Optional[GenerationalCache]:
+    """Создает кэш списков задач по настройкам TASK_CACHE_BACKEND ("none" — без кэша)."""
+    if settings.TASK_CACHE_BACKEND == "memory":
+        backend = MemoryCacheBackend(max_size=settings.TASK_CACHE_MAX_SIZE, ttl=settings.TASK_CACHE_TTL_SECONDS)
+    elif settings.TASK_CACHE_BACKEND == "redis":
+        backend = RedisCacheBackend(url=settings.REDIS_URL)
+    else:
+        return None
+    return GenerationalCache(backend, ttl=settings.TASK_CACHE_TTL_SECONDS)
+
+
+task_list_cache = create_task_list_cache()
+
+
+def task_list_key(
+    limit: int, cursor: Optional[str], filters: Optional[TaskFilter], sort: TaskSort, shape: TaskShape, fast: bool
+) -> str:
+    """Ключ формы запроса: все параметры, от которых зависит тело ответа."""
+    shape_key = "|".join([
+        shape.value, "fast" if fast else "orm", sort.value, str(limit), cursor or "",
+        filters.model_dump_json() if filters is not None else "",
+    ])
+    return hashlib.sha1(shape_key.encode()).hexdigest()
+
+
+async def cached_task_list(
+    user_id: Optional[int], key: str, render: Callable[[], Awaitable[Tuple[bytes, Optional[str]]]]
+) -> Tuple[bytes, Optional[str]]:
+    """
+    Возвращает тело ответа и курсор следующей страницы из кэша или из render().
+    user_id задает список «моих задач»; None — общий список.
+    """
+    async def load() -> bytes:
+        body, next_page = await render()
+        # Курсор не содержит перевода строки, поэтому хранится первой строкой значения
+        return (next_page or "").encode() + b"\n" + body
+
+    scopes = [EVERYTHING_SCOPE, ALL_TASKS_SCOPE if user_id is None else user_scope(user_id)]
+    value = await task_list_cache.get_or_load(scopes, key, load)
+    next_page, body = value.split(b"\n", 1)
+    return body, next_page.decode() or None
+
+
+async def invalidate_task_lists(user_ids: Iterable[int]) -> None:
+    """Сбрасывает общий список и «мои задачи» перечисленных пользователей (создатель и исполнители)."""
+    if task_list_cache is not None:
+        await task_list_cache.invalidate([ALL_TASKS_SCOPE, *(user_scope(user_id) for user_id in user_ids)])
+
+
+async def invalidate_all_task_lists() -> None:
+    """Сбрасывает все списки задач: после смены данных пользователя или массовых изменений."""
+    if task_list_cache is not None:
+        await task_list_cache.invalidate([EVERYTHING_SCOPE])
+
+
+@registry.register
+def _task_cache_metrics():
+    if task_list_cache is None:
+        return []
+    return [
+        gauge("kanban_task_cache_size", "Cached task list responses in this worker", len(task_list_cache.backend)),
+        counter("kanban_task_cache_hits_total", "Task list cache hits", task_list_cache.hits),
+        counter("kanban_task_cache_misses_total", "Task list cache misses", task_list_cache.misses),
+        counter("kanban_task_cache_evictions_total", "Task list cache evictions", task_list_cache.backend.evictions),
+        counter("kanban_task_cache_invalidations_total", "Task list cache invalidations", task_list_cache.invalidations),
+    ]
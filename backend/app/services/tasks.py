@@ -1,81 +1,329 @@
+from collections import Counter, defaultdict
+from datetime import datetime
 from fastapi import HTTPException
+from sqlalchemy import and_, bindparam, delete, func, insert, literal, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
-from app.models.task import Task
+from sqlalchemy.orm import joinedload, selectinload
+from app.models.task import Task, TaskStatus, rank_for_priority, task_assignees_table
+from app.models.change import Tombstone
+from app.models.time_entry import TimeEntry
 from app.models.user import User
-from app.schemas.task import TaskCreate, TaskUpdate
-from typing import List
+from app.schemas.task import (
+    TaskBatch, TaskBatchItemResult, TaskCreate, TaskFilter, TaskOut, TaskPlacement, TaskSort, TaskUpdate,
+)
+from app.schemas.user import UserOut
+from app.services.users import UserLoader, users_not_found_detail
+from app.services import task_cache
+from app.services.activity import activity_log
+from app.schemas.time_entry import UserTimeTotal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app.core.pagination import decode_cursor, encode_cursor, keyset_after, next_cursor, order_by_keys
+from app.core.config import settings
+from app.core.events import broker
+from app.core.ranking import rank_between, spread_ranks
 
 
 async def get_task(db: AsyncSession, task_id: int):
-    result = await db.execute(select(Task).options(selectinload(Task.creator), selectinload(Task.assignees)).filter(Task.id == task_id))
+    # Создатель подтягивается JOIN'ом, исполнители — одним дополнительным запросом
+    result = await db.execute(select(Task).options(joinedload(Task.creator), selectinload(Task.assignees)).filter(Task.id == task_id))
     return result.scalars().first()
 
 
-from sqlalchemy import case # Import case
+# Ключи сортировки списков; последний ключ (id) делает порядок однозначным для курсора
+TASK_SORTS = {
+    TaskSort.priority: [(Task.priority_rank, False), (Task.created_at, True), (Task.id, True)],
+    TaskSort.newest: [(Task.created_at, True), (Task.id, True)],
+    TaskSort.oldest: [(Task.created_at, False), (Task.id, False)],
+    TaskSort.position: [(Task.position, False), (Task.id, False)],
+}
 
-async def get_tasks(db: AsyncSession, skip: int = 0, limit: int = 100):
-    """Получает список всех задач с пагинацией, отсортированных по приоритету и дате создания."""
-    
-    priority_order = case(
-        (Task.priority == 'high', 0),
-        (Task.priority == 'medium', 1),
-        (Task.priority == 'low', 2),
-        else_=3 
-    )
 
-    result = await db.execute(
-        select(Task)
-        .options(selectinload(Task.creator), selectinload(Task.assignees))
-        .order_by(priority_order, Task.created_at.desc()) # Sort by priority, then by creation date
-        .offset(skip)
-        .limit(limit)
-    )
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def apply_filters(query, filters: Optional[TaskFilter]):
+    """Добавляет в запрос условия из TaskFilter."""
+    if filters is None:
+        return query
+    if filters.status:
+        query = query.where(Task.status.in_(filters.status))
+    if filters.type:
+        query = query.where(Task.type.in_(filters.type))
+    if filters.priority:
+        query = query.where(Task.priority.in_(filters.priority))
+    if filters.creator_id is not None:
+        query = query.where(Task.creator_id == filters.creator_id)
+    if filters.assignee_id is not None:
+        query = query.where(Task.assignees.any(User.id == filters.assignee_id))
+    if filters.created_from is not None:
+        query = query.where(Task.created_at >= filters.created_from)
+    if filters.created_to is not None:
+        query = query.where(Task.created_at < filters.created_to)
+    if filters.q:
+        # В Postgres ILIKE по подстроке использует триграммные индексы (см. app/models/task.py)
+        pattern = f"%{_escape_like(filters.q)}%"
+        query = query.where(
+            Task.title.ilike(pattern, escape="\\") | Task.description.ilike(pattern, escape="\\")
+        )
+    return query
+
+
+def _paginate(query, skip: int, limit: int, cursor: Optional[str], sort: TaskSort):
+    """Применяет сортировку и пагинацию: keyset по курсору или OFFSET/LIMIT."""
+    keys = TASK_SORTS[sort]
+    query = query.order_by(*order_by_keys(keys))
+    if cursor:
+        query = query.where(keyset_after(keys, decode_cursor(cursor, sort.value, keys)))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def tasks_next_cursor(tasks: List[Task], limit: int, sort: TaskSort = TaskSort.priority) -> Optional[str]:
+    """Курсор для следующей страницы списка задач."""
+    return next_cursor(tasks, limit, sort.value, TASK_SORTS[sort])
+
+
+async def get_tasks(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    filters: Optional[TaskFilter] = None,
+    sort: TaskSort = TaskSort.priority,
+):
+    """Получает список задач с фильтрами и пагинацией, по умолчанию отсортированных по приоритету и дате создания."""
+    query = select(Task).options(selectinload(Task.creator), selectinload(Task.assignees))
+    result = await db.execute(_paginate(apply_filters(query, filters), skip, limit, cursor, sort))
     return result.scalars().all()
 
-async def get_tasks_by_assignee(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100):
+async def get_tasks_by_assignee(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    filters: Optional[TaskFilter] = None,
+    sort: TaskSort = TaskSort.priority,
+):
     """
     Получает список задач, созданных пользователем или назначенных ему,
-    отсортированных по приоритету и дате создания.
+    по умолчанию отсортированных по приоритету и дате создания.
     """
-    priority_order = case(
-        (Task.priority == 'high', 0),
-        (Task.priority == 'medium', 1),
-        (Task.priority == 'low', 2),
-        else_=3 
-    )
-
-    result = await db.execute(
+    query = (
         select(Task)
         .options(selectinload(Task.creator), selectinload(Task.assignees))
         .filter(
             (Task.creator_id == user_id) | (Task.assignees.any(User.id == user_id))
         )
-        .order_by(priority_order, Task.created_at.desc())
-        .offset(skip)
-        .limit(limit)
     )
+    result = await db.execute(_paginate(apply_filters(query, filters), skip, limit, cursor, sort))
     return result.scalars().all()
 
 
-async def create_task(db: AsyncSession, task: TaskCreate, creator_id: int):
-    assignee_ids = task.assignee_ids
+# Колонки для быстрого пути в порядке полей TaskOut и UserOut
+TASK_ROW_COLUMNS = (
+    Task.title, Task.description, Task.type, Task.priority,
+    Task.id, Task.status, Task.time_spent, Task.created_at, Task.position,
+)
+USER_ROW_COLUMNS = (User.email, User.first_name, User.last_name, User.id, User.avatar_url)
+
+
+def _task_row(row) -> dict:
+    (title, description, task_type, priority, task_id, task_status,
+     time_spent, created_at, position) = row[:len(TASK_ROW_COLUMNS)]
+    return {
+        "title": title, "description": description, "type": task_type.value, "priority": priority,
+        "id": task_id, "status": task_status.value, "time_spent": time_spent, "created_at": created_at,
+        "position": position,
+    }
+
+
+def _user_row(row, offset: int = 0) -> dict:
+    email, first_name, last_name, user_id, avatar_url = row[offset:offset + len(USER_ROW_COLUMNS)]
+    return {"email": email, "first_name": first_name, "last_name": last_name, "id": user_id, "avatar_url": avatar_url}
+
+
+async def _select_task_rows(
+    db: AsyncSession,
+    extra_columns: list,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    filters: Optional[TaskFilter],
+    sort: TaskSort,
+    user_id: Optional[int],
+    join_creator: bool = False,
+):
+    """
+    Общая часть быстрых путей: строки задач (TASK_ROW_COLUMNS + extra_columns) с теми же
+    фильтрами, сортировкой и пагинацией, что у get_tasks/get_tasks_by_assignee (при user_id).
+    Возвращает строки и курсор следующей страницы.
+    """
+    keys = TASK_SORTS[sort]
+    sort_columns = [column.label(f"sort_{column.key}") for column, _ in keys]
+    query = select(*TASK_ROW_COLUMNS, *extra_columns, *sort_columns)
+    if join_creator:
+        query = query.join(User, User.id == Task.creator_id)
+    if user_id is not None:
+        query = query.where((Task.creator_id == user_id) | Task.assignees.any(User.id == user_id))
+    result = (await db.execute(_paginate(apply_filters(query, filters), skip, limit, cursor, sort))).all()
+
+    next_page = None
+    if result and len(result) >= limit:
+        next_page = encode_cursor(sort.value, [getattr(result[-1], column.name) for column in sort_columns])
+    return result, next_page
+
+
+async def get_task_rows(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    filters: Optional[TaskFilter] = None,
+    sort: TaskSort = TaskSort.priority,
+    user_id: Optional[int] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Быстрый путь списков задач: те же строки, что у get_tasks/get_tasks_by_assignee
+    (при user_id), но собранные в dict прямо из кортежей колонок, без объектов ORM и TaskOut.
+    Задачи с создателем читаются одним JOIN, исполнители — вторым запросом; одинаковые
+    пользователи собираются один раз. Возвращает строки и курсор следующей страницы.
+    """
+    creator_columns = [column.label(f"creator_{column.key}") for column in USER_ROW_COLUMNS]
+    result, next_page = await _select_task_rows(
+        db, creator_columns, skip, limit, cursor, filters, sort, user_id, join_creator=True
+    )
+
+    users = {}
+
+    def user_dict(row, offset: int) -> dict:
+        user_key = row[offset + 3]
+        if user_key not in users:
+            users[user_key] = _user_row(row, offset)
+        return users[user_key]
+
+    rows = [
+        {**_task_row(row), "creator": user_dict(row, len(TASK_ROW_COLUMNS)), "assignees": []}
+        for row in result
+    ]
+    if rows:
+        by_id = {row["id"]: row for row in rows}
+        assignees = await db.execute(
+            select(task_assignees_table.c.task_id, *USER_ROW_COLUMNS)
+            .join(User, User.id == task_assignees_table.c.user_id)
+            .where(task_assignees_table.c.task_id.in_(by_id))
+        )
+        for row in assignees:
+            by_id[row[0]]["assignees"].append(user_dict(row, 1))
+    return rows, next_page
+
+
+async def get_task_rows_normalized(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    filters: Optional[TaskFilter] = None,
+    sort: TaskSort = TaskSort.priority,
+    user_id: Optional[int] = None,
+) -> Tuple[dict, Optional[str]]:
+    """
+    Нормализованный список (?shape=normalized): задачи ссылаются на пользователей по id
+    (creator_id, assignee_ids), а сами пользователи отдаются один раз в словаре users.
+    Три запроса: задачи, связи с исполнителями и различные пользователи страницы.
+    """
+    result, next_page = await _select_task_rows(
+        db, [Task.creator_id], skip, limit, cursor, filters, sort, user_id
+    )
+    tasks = [
+        {**_task_row(row), "creator_id": row[len(TASK_ROW_COLUMNS)], "assignee_ids": []}
+        for row in result
+    ]
+    users = {}
+    if tasks:
+        by_id = {task["id"]: task for task in tasks}
+        links = await db.execute(
+            select(task_assignees_table.c.task_id, task_assignees_table.c.user_id)
+            .where(task_assignees_table.c.task_id.in_(by_id))
+        )
+        for task_id, assignee_id in links:
+            by_id[task_id]["assignee_ids"].append(assignee_id)
+
+        user_ids = {task["creator_id"] for task in tasks}
+        user_ids.update(user_id for task in tasks for user_id in task["assignee_ids"])
+        user_rows = await db.execute(select(*USER_ROW_COLUMNS).where(User.id.in_(user_ids)).order_by(User.id))
+        # Ключи JSON-объекта — строки
+        users = {str(row.id): _user_row(row) for row in user_rows}
+    return {"tasks": tasks, "users": users}, next_page
+
+
+NOT_ASSIGNED_DETAIL = "Вы не назначены на выполнение этой задачи"
+
+
+def task_user_ids(task: TaskOut) -> Set[int]:
+    """Пользователи, в чьих списках «моих задач» есть задача: создатель и исполнители."""
+    return {task.creator.id, *(assignee.id for assignee in task.assignees)}
+
+
+async def load_task_user_ids(db: AsyncSession, task_ids: Iterable[int]) -> Set[int]:
+    """Создатели и исполнители задач одним запросом (для инвалидации кэша без загрузки задач)."""
+    task_ids = list(task_ids)
+    if not task_ids:
+        return set()
+    result = await db.execute(
+        select(Task.creator_id.label("user_id")).where(Task.id.in_(task_ids))
+        .union(select(task_assignees_table.c.user_id).where(task_assignees_table.c.task_id.in_(task_ids)))
+    )
+    return set(result.scalars())
+
+
+async def publish_task_event(event_type: str, task_id: int, task: Optional[TaskOut] = None):
+    """Рассылает событие изменения задачи подписчикам доски (см. app/core/events.py)."""
+    await broker.publish({
+        "type": event_type,
+        "id": task_id,
+        "task": task.model_dump(mode="json") if task is not None else None,
+    })
+
+
+def created_changes(task: TaskOut) -> dict:
+    """Поля новой задачи для журнала действий."""
+    return {"title": task.title, "status": task.status, "assignee_ids": [assignee.id for assignee in task.assignees]}
+
+
+async def create_task(
+    db: AsyncSession, task: TaskCreate, creator_id: int, users: Optional[UserLoader] = None
+) -> TaskOut:
+    """
+    Создает задачу в конце колонки todo. Создатель и исполнители загружаются одним запросом
+    (несуществующие исполнители — 404 со всеми id), а ответ собирается из уже загруженных
+    объектов без повторного чтения задачи.
+    """
+    users = users or UserLoader(db)
+    assignee_ids = task.assignee_ids or []
     task_data = task.model_dump(exclude={"assignee_ids"})
-    
-    db_task = Task(**task_data, creator_id=creator_id)
-    
-    if assignee_ids:
-        result = await db.execute(select(User).where(User.id.in_(assignee_ids)))
-        assignees = result.scalars().all()
-        db_task.assignees = assignees
+
+    await users.load_many([creator_id, *assignee_ids])
+    db_task = Task(**task_data, creator_id=creator_id, status=TaskStatus.todo)
+    db_task.position = rank_between((await column_ends(db, [TaskStatus.todo]))[TaskStatus.todo], None)
+    db_task.creator = (await users.require([creator_id]))[0]
+    db_task.assignees = await users.require(assignee_ids)
 
     db.add(db_task)
+    await db.flush()
+    task_out = TaskOut.model_validate(db_task)
     await db.commit()
-    await db.refresh(db_task)
-    return await get_task(db, db_task.id)
+    await task_cache.invalidate_task_lists(task_user_ids(task_out))
+    await publish_task_event("task.created", task_out.id, task_out)
+    activity_log.record(task_out.id, creator_id, "created", created_changes(task_out))
+    return task_out
 
-async def update_task(db: AsyncSession, task_id: int, task_data: TaskUpdate, current_user: User):
+async def update_task(
+    db: AsyncSession, task_id: int, task_data: TaskUpdate, current_user: UserOut, users: Optional[UserLoader] = None
+) -> Optional[TaskOut]:
     db_task = await get_task(db, task_id)
     if not db_task:
         return None
@@ -83,47 +331,575 @@ async def update_task(db: AsyncSession, task_id: int, task_data: TaskUpdate, cur
     update_data = task_data.model_dump(exclude_unset=True)
 
     if "status" in update_data and current_user.id not in [assignee.id for assignee in db_task.assignees]:
-        raise HTTPException(status_code=403, detail="Вы не назначены на выполнение этой задачи")
+        raise HTTPException(status_code=403, detail=NOT_ASSIGNED_DETAIL)
+    previous_assignee_ids = {assignee.id for assignee in db_task.assignees}
+    # В журнал попадают только поля, значение которых действительно меняется
+    changes = {
+        key: value for key, value in update_data.items()
+        if key != "assignee_ids" and getattr(db_task, key) != value
+    }
+    if update_data.get("assignee_ids") is not None and set(update_data["assignee_ids"]) != previous_assignee_ids:
+        changes["assignee_ids"] = update_data["assignee_ids"]
 
     if "assignee_ids" in update_data:
         assignee_ids = update_data.pop("assignee_ids")
         if assignee_ids is not None:
-            result = await db.execute(select(User).where(User.id.in_(assignee_ids)))
-            assignees = result.scalars().all()
-            db_task.assignees = assignees
-        
+            db_task.assignees = await (users or UserLoader(db)).require(assignee_ids)
+            # Смена исполнителей не меняет строку задачи; отмечаем изменение для синхронизации
+            db_task.updated_at = datetime.utcnow()
+
+    moved = "status" in update_data and update_data["status"] != db_task.status
+    if moved:
+        # Карточка, перенесенная сменой статуса, встает в конец новой колонки
+        last = (await column_ends(db, [update_data["status"]]))[update_data["status"]]
+        db_task.position = rank_between(last, None)
     for key, value in update_data.items():
         setattr(db_task, key, value)
-        
+
+    # Ответ строится из объекта в identity map: после flush в нем уже новые значения
+    await db.flush()
+    task_out = TaskOut.model_validate(db_task)
     await db.commit()
-    await db.refresh(db_task)
-    return await get_task(db, db_task.id)
+    await task_cache.invalidate_task_lists(task_user_ids(task_out) | previous_assignee_ids)
+    await publish_task_event("task.moved" if moved else "task.updated", task_out.id, task_out)
+    if changes:
+        activity_log.record(task_out.id, current_user.id, "moved" if moved else "updated", changes)
+    return task_out
 
 
-async def delete_task(db: AsyncSession, task_id: int):
+async def column_ends(db: AsyncSession, statuses: Iterable[TaskStatus]) -> Dict[TaskStatus, Optional[str]]:
+    """Ключ последней карточки каждой из колонок одним запросом (None для пустой колонки)."""
+    statuses = set(statuses)
+    result = await db.execute(
+        select(Task.status, func.max(Task.position)).where(Task.status.in_(statuses)).group_by(Task.status)
+    )
+    return {**dict.fromkeys(statuses), **dict(result.all())}
+
+
+# Колонки, где ключи порядка стали длиннее POSITION_REBALANCE_LENGTH; их перебалансирует
+# фоновая задача (см. app/main.py)
+pending_rebalance: Set[TaskStatus] = set()
+
+NEIGHBOURS_CONFLICT_DETAIL = "Соседние карточки изменились, обновите колонку"
+
+
+async def _neighbour_position(
+    db: AsyncSession, task_status: TaskStatus, position: str, task_id: int, below: bool
+) -> Optional[str]:
+    """Ключ ближайшей карточки колонки ниже (below) или выше position, не считая переносимой."""
+    query = select(Task.position).where(Task.status == task_status, Task.id != task_id)
+    if below:
+        query = query.where(Task.position > position).order_by(Task.position)
+    else:
+        query = query.where(Task.position < position).order_by(Task.position.desc())
+    return (await db.execute(query.limit(1))).scalar()
+
+
+async def _placement_keys(
+    db: AsyncSession, task_id: int, target: TaskStatus, placement: TaskPlacement
+) -> Tuple[Optional[str], Optional[str]]:
+    """Ключи карточек, между которыми встает переносимая: (выше, ниже); None — край колонки."""
+    neighbour_ids = {placement.after_id, placement.before_id} - {None}
+    neighbours = {}
+    if neighbour_ids:
+        # FOR UPDATE: перебалансировка колонки не должна поменять ключи соседей между чтением и записью
+        result = await db.execute(
+            select(Task.id, Task.status, Task.position).where(Task.id.in_(neighbour_ids)).with_for_update()
+        )
+        neighbours = {row.id: row for row in result}
+        if len(neighbours) != len(neighbour_ids):
+            raise HTTPException(status_code=404, detail="Neighbour task not found")
+        if any(row.status != target for row in neighbours.values()):
+            raise HTTPException(status_code=409, detail=NEIGHBOURS_CONFLICT_DETAIL)
+
+    lower = neighbours[placement.after_id].position if placement.after_id else None
+    upper = neighbours[placement.before_id].position if placement.before_id else None
+    if lower is not None and placement.before_id is None:
+        upper = await _neighbour_position(db, target, lower, task_id, below=True)
+    elif upper is not None and placement.after_id is None:
+        lower = await _neighbour_position(db, target, upper, task_id, below=False)
+    elif not neighbours:
+        lower = (await column_ends(db, [target]))[target]
+    return lower, upper
+
+
+async def move_task(
+    db: AsyncSession, task_id: int, placement: TaskPlacement, current_user: UserOut
+) -> Optional[TaskOut]:
+    """
+    Переносит карточку между соседями (в той же или другой колонке), записывая одну строку:
+    новый ключ порядка берется между ключами соседей. Если указан только один сосед,
+    второй находится запросом. Смена колонки, как и смена статуса, доступна только исполнителю.
+    Соседи в неверном порядке (устаревшее представление клиента) — 409.
+    """
     db_task = await get_task(db, task_id)
     if not db_task:
         return None
-    await db.delete(db_task)
+    target = placement.status or db_task.status
+    if target != db_task.status and current_user.id not in [assignee.id for assignee in db_task.assignees]:
+        raise HTTPException(status_code=403, detail=NOT_ASSIGNED_DETAIL)
+
+    if task_id in {placement.after_id, placement.before_id}:
+        raise HTTPException(status_code=400, detail="A task cannot be its own neighbour")
+    lower, upper = await _placement_keys(db, task_id, target, placement)
+    if lower is not None and lower == upper and placement.after_id != placement.before_id:
+        # У двух разных соседей одинаковый ключ (одновременные вставки в конец колонки):
+        # колонка перебалансируется сразу (со своим commit), карточка и ключи соседей читаются заново
+        await rebalance_positions(db, target)
+        db_task = await get_task(db, task_id)
+        if not db_task:
+            return None
+        lower, upper = await _placement_keys(db, task_id, target, placement)
+    try:
+        position = rank_between(lower, upper)
+    except ValueError:
+        raise HTTPException(status_code=409, detail=NEIGHBOURS_CONFLICT_DETAIL)
+
+    previous_status = db_task.status
+    db_task.status = target
+    db_task.position = position
+    await db.flush()
+    task_out = TaskOut.model_validate(db_task)
     await db.commit()
-    return db_task
+    if len(position) > settings.POSITION_REBALANCE_LENGTH:
+        pending_rebalance.add(target)
+    await task_cache.invalidate_task_lists(task_user_ids(task_out))
+    await publish_task_event("task.moved" if target != previous_status else "task.updated", task_out.id, task_out)
+    # Перестановка внутри колонки в журнал не пишется: это не изменение задачи
+    if target != previous_status:
+        activity_log.record(task_out.id, current_user.id, "moved", {"status": target})
+    return task_out
 
 
-async def assign_task_to_user(db: AsyncSession, task_id: int, user_id: int):
-    db_task = await get_task(db, task_id)
-    if not db_task:
+async def rebalance_positions(db: AsyncSession, task_status: TaskStatus) -> int:
+    """
+    Заново раздает ключи колонки равномерно и минимальной длины, сохраняя порядок карточек.
+    Все строки обновляются одним пакетным UPDATE. Возвращает число карточек в колонке.
+    """
+    task_ids = (await db.execute(
+        select(Task.id).where(Task.status == task_status).order_by(Task.position, Task.id).with_for_update()
+    )).scalars().all()
+    if task_ids:
+        await db.execute(
+            update(Task),
+            [{"id": task_id, "position": rank} for task_id, rank in zip(task_ids, spread_ranks(len(task_ids)))],
+        )
+    await db.commit()
+    if task_ids:
+        await task_cache.invalidate_all_task_lists()
+        # Ключи поменялись у всей колонки: клиенты перечитывают ее целиком
+        await broker.publish({"type": "column.rebalanced", "status": task_status.value})
+    return len(task_ids)
+
+
+async def rebalance_pending_columns(db: AsyncSession) -> int:
+    """Перебалансирует колонки из pending_rebalance; возвращает число обработанных колонок."""
+    columns = list(pending_rebalance)
+    pending_rebalance.clear()
+    for task_status in columns:
+        await rebalance_positions(db, task_status)
+    return len(columns)
+
+
+async def record_tombstones(db: AsyncSession, entity: str, entity_ids: List[int]) -> None:
+    """Записывает надгробия удаленных объектов для дельта-синхронизации (см. app/services/sync.py)."""
+    await db.execute(insert(Tombstone), [{"entity": entity, "entity_id": entity_id} for entity_id in entity_ids])
+
+
+async def delete_task(db: AsyncSession, task_id: int, user_id: Optional[int] = None) -> Optional[int]:
+    """Удаляет задачу без предварительной загрузки; возвращает id или None, если задачи нет."""
+    assignees = await db.execute(
+        delete(task_assignees_table).where(task_assignees_table.c.task_id == task_id)
+        .returning(task_assignees_table.c.user_id)
+    )
+    user_ids = set(assignees.scalars())
+    result = await db.execute(
+        delete(Task).where(Task.id == task_id).returning(Task.id, Task.creator_id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = result.first()
+    if deleted is None:
+        await db.commit()
         return None
-    db_task.assignee_id = user_id
+    deleted_id, creator_id = deleted
+    await record_tombstones(db, "task", [deleted_id])
     await db.commit()
-    await db.refresh(db_task)
-    return await get_task(db, db_task.id)
+    await task_cache.invalidate_task_lists(user_ids | {creator_id})
+    await publish_task_event("task.deleted", deleted_id)
+    activity_log.record(deleted_id, user_id, "deleted")
+    return deleted_id
 
 
-async def log_time_for_task(db: AsyncSession, task_id: int, time_to_add: float):
+async def assign_task_to_user(
+    db: AsyncSession, task_id: int, user_id: int, actor_id: Optional[int] = None
+) -> Optional[TaskOut]:
     db_task = await get_task(db, task_id)
+    user = await db.get(User, user_id)
+    if not db_task or not user:
+        return None
+    assigned = user not in db_task.assignees
+    if assigned:
+        db_task.assignees.append(user)
+        db_task.updated_at = datetime.utcnow()
+    await db.flush()
+    task_out = TaskOut.model_validate(db_task)
+    await db.commit()
+    await task_cache.invalidate_task_lists(task_user_ids(task_out))
+    await publish_task_event("task.updated", task_out.id, task_out)
+    if assigned:
+        assignee_ids = [assignee.id for assignee in task_out.assignees]
+        activity_log.record(task_out.id, actor_id, "updated", {"assignee_ids": assignee_ids})
+    return task_out
+
+
+async def log_time_for_task(
+    db: AsyncSession, task_id: int, time_to_add: float, user_id: Optional[int] = None
+) -> Optional[TaskOut]:
+    """
+    Атомарно увеличивает time_spent (UPDATE ... SET time_spent = time_spent + :x), поэтому
+    параллельные списания не теряются. Задача возвращается тем же UPDATE ... RETURNING.
+    Если указан user_id, списание также пишется в журнал времени как уже учтенное.
+    """
+    result = await db.execute(
+        update(Task)
+        .where(Task.id == task_id)
+        .values(time_spent=Task.time_spent + time_to_add)
+        .returning(Task)
+        .options(selectinload(Task.creator), selectinload(Task.assignees))
+        .execution_options(populate_existing=True)
+    )
+    db_task = result.scalars().first()
     if not db_task:
         return None
-    db_task.time_spent += time_to_add
+    if user_id is not None:
+        await db.execute(
+            insert(TimeEntry).values(task_id=task_id, user_id=user_id, hours=time_to_add, rolled_up=True)
+        )
+    task_out = TaskOut.model_validate(db_task)
+    await db.commit()
+    await task_cache.invalidate_task_lists(task_user_ids(task_out))
+    await publish_task_event("task.updated", task_out.id, task_out)
+    activity_log.record(task_out.id, user_id, "time_logged", {"hours": time_to_add})
+    return task_out
+
+
+async def record_time_heartbeat(db: AsyncSession, task_id: int, user_id: int, hours: float) -> bool:
+    """
+    Частые heartbeat'ы таймера только добавляют запись в журнал, не переписывая строку задачи.
+    В time_spent они попадут при следующем rollup_time_entries. Возвращает False, если задачи нет.
+    """
+    result = await db.execute(
+        insert(TimeEntry).from_select(
+            ["task_id", "user_id", "hours", "rolled_up", "created_at"],
+            select(Task.id, literal(user_id), literal(hours), literal(False), literal(datetime.utcnow()))
+            .where(Task.id == task_id),
+        )
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def rollup_time_entries(db: AsyncSession) -> int:
+    """
+    Переносит неучтенные записи журнала в tasks.time_spent. Записи сначала «забираются»
+    через UPDATE ... RETURNING, поэтому параллельные rollup'ы не посчитают их дважды.
+    Возвращает число перенесенных записей.
+    """
+    time_entries = TimeEntry.__table__
+    claimed = (await db.execute(
+        update(time_entries)
+        .where(time_entries.c.rolled_up.is_(False))
+        .values(rolled_up=True)
+        .returning(time_entries.c.task_id, time_entries.c.user_id, time_entries.c.hours)
+    )).all()
+
+    totals, by_user = defaultdict(float), defaultdict(float)
+    for task_id, user_id, hours in claimed:
+        totals[task_id] += hours
+        by_user[task_id, user_id] += hours
+    if totals:
+        tasks_table = Task.__table__
+        await db.execute(
+            update(tasks_table)
+            .where(tasks_table.c.id == bindparam("b_task_id"))
+            .values(time_spent=tasks_table.c.time_spent + bindparam("b_hours")),
+            [{"b_task_id": task_id, "b_hours": hours} for task_id, hours in totals.items()],
+        )
+    await db.commit()
+    if totals and task_cache.task_list_cache is not None:
+        await task_cache.invalidate_task_lists(await load_task_user_ids(db, totals))
+    # Задачи не перечитываем: клиенты получат id и сами обновят карточки
+    for task_id in totals:
+        await publish_task_event("task.updated", task_id)
+    # Время таймера попадает в журнал одной записью на задачу и пользователя за rollup
+    for (task_id, user_id), hours in by_user.items():
+        activity_log.record(task_id, user_id, "time_logged", {"hours": hours})
+    return len(claimed)
+
+
+async def get_time_totals(db: AsyncSession, task_id: int) -> List[UserTimeTotal]:
+    """Суммы времени по пользователям, включая еще не перенесенные heartbeat'ы."""
+    result = await db.execute(
+        select(TimeEntry.user_id, func.sum(TimeEntry.hours))
+        .where(TimeEntry.task_id == task_id)
+        .group_by(TimeEntry.user_id)
+        .order_by(TimeEntry.user_id)
+    )
+    return [UserTimeTotal(user_id=user_id, hours=hours) for user_id, hours in result.all()]
+
+
+BATCH_OPS = ("create", "update", "move", "delete")
+
+BATCH_CONFLICT_DETAIL = "Task appears in more than one operation of the batch"
+
+# Поля TaskUpdate, прежние значения которых нужны журналу действий
+BATCH_LOGGED_FIELDS = ("title", "description", "type", "status", "priority")
+
+
+async def apply_task_batch(
+    db: AsyncSession, batch: TaskBatch, current_user: UserOut, users: Optional[UserLoader] = None
+) -> List[TaskBatchItemResult]:
+    """
+    Применяет пакет операций в одной транзакции set-based запросами:
+    INSERT ... RETURNING для создания, UPDATE/DELETE ... WHERE id IN (...) для остального.
+    Операции, не прошедшие проверку (нет задачи или исполнителя, нет прав на смену статуса),
+    пропускаются и возвращаются с кодом ошибки; остальные применяются. Задача, которая встречается
+    в пакете больше одного раза (две правки, правка и удаление), не меняется: порядок таких операций
+    не определен, и все они получают 409.
+    """
+    results = []
+
+    def add_result(op: str, index: int, task_id: Optional[int], status_code: int, detail: Optional[str] = None):
+        results.append(TaskBatchItemResult(op=op, index=index, id=task_id, status_code=status_code, detail=detail))
+
+    # Одним запросом узнаем, какие задачи существуют, на какие назначен текущий пользователь
+    # и прежние значения полей (для журнала пишутся только действительно измененные)
+    task_ids = {item.id for item in batch.update} | {item.id for item in batch.move} | set(batch.delete)
+    existing, assigned, previous = {}, set(), {}
+    if task_ids:
+        rows = await db.execute(
+            select(*(getattr(Task, field) for field in BATCH_LOGGED_FIELDS), Task.id, task_assignees_table.c.user_id)
+            .outerjoin(
+                task_assignees_table,
+                and_(task_assignees_table.c.task_id == Task.id, task_assignees_table.c.user_id == current_user.id),
+            )
+            .where(Task.id.in_(task_ids))
+        )
+        for row in rows:
+            existing[row.id] = row.status
+            previous[row.id] = {field: getattr(row, field) for field in BATCH_LOGGED_FIELDS}
+            if row.user_id is not None:
+                assigned.add(row.id)
+    reassigned_ids = {item.id for item in batch.update if item.assignee_ids is not None} & existing.keys()
+    if reassigned_ids:
+        for task_id in reassigned_ids:
+            previous[task_id]["assignee_ids"] = set()
+        rows = await db.execute(
+            select(task_assignees_table.c.task_id, task_assignees_table.c.user_id)
+            .where(task_assignees_table.c.task_id.in_(reassigned_ids))
+        )
+        for task_id, user_id in rows:
+            previous[task_id]["assignee_ids"].add(user_id)
+
+    id_counts = Counter([*(item.id for item in batch.update), *(item.id for item in batch.move), *batch.delete])
+    conflicting = {task_id for task_id, count in id_counts.items() if count > 1}
+
+    requested_users = {
+        user_id for item in [*batch.create, *batch.update] for user_id in item.assignee_ids or []
+    }
+    known_users = set(await (users or UserLoader(db)).load_many(requested_users))
+
+    def missing_users(user_ids) -> Optional[str]:
+        missing = set(user_ids or []) - known_users
+        return users_not_found_detail(missing) if missing else None
+
+    creates = []
+    for index, item in enumerate(batch.create):
+        if detail := missing_users(item.assignee_ids):
+            add_result("create", index, None, 404, detail)
+        else:
+            creates.append((index, item))
+
+    updates = []
+    for index, item in enumerate(batch.update):
+        data = item.model_dump(exclude_unset=True, exclude={"id"})
+        if item.id in conflicting:
+            add_result("update", index, item.id, 409, BATCH_CONFLICT_DETAIL)
+        elif item.id not in existing:
+            add_result("update", index, item.id, 404, "Task not found")
+        elif "status" in data and item.id not in assigned:
+            add_result("update", index, item.id, 403, NOT_ASSIGNED_DETAIL)
+        elif detail := missing_users(data.get("assignee_ids")):
+            add_result("update", index, item.id, 404, detail)
+        else:
+            updates.append((index, item.id, data))
+
+    moves = []
+    for index, item in enumerate(batch.move):
+        if item.id in conflicting:
+            add_result("move", index, item.id, 409, BATCH_CONFLICT_DETAIL)
+        elif item.id not in existing:
+            add_result("move", index, item.id, 404, "Task not found")
+        elif item.id not in assigned:
+            add_result("move", index, item.id, 403, NOT_ASSIGNED_DETAIL)
+        else:
+            moves.append((index, item))
+
+    deletes = []
+    for index, task_id in enumerate(batch.delete):
+        if task_id in conflicting:
+            add_result("delete", index, task_id, 409, BATCH_CONFLICT_DETAIL)
+        elif task_id not in existing:
+            add_result("delete", index, task_id, 404, "Task not found")
+        else:
+            deletes.append((index, task_id))
+
+    # Прежних исполнителей и создателей меняемых составом и удаляемых задач запоминаем для кэша списков
+    previous_user_ids = set()
+    if task_cache.task_list_cache is not None:
+        previous_user_ids = await load_task_user_ids(db, [
+            *(task_id for _, task_id, data in updates if data.get("assignee_ids") is not None),
+            *(task_id for _, task_id in deletes),
+        ])
+
+    # Новые карточки и перенесенные в другую колонку встают в конец колонки в порядке операций
+    relocated = [
+        (task_id, data["status"]) for _, task_id, data in updates
+        if data.get("status") is not None and data["status"] != existing[task_id]
+    ]
+    relocated += [(item.id, item.status) for _, item in moves if item.status != existing[item.id]]
+    create_positions, positions = [], {}
+    if creates or relocated:
+        ends = await column_ends(db, [TaskStatus.todo, *(task_status for _, task_status in relocated)])
+
+        def next_position(task_status: TaskStatus) -> str:
+            ends[task_status] = rank_between(ends[task_status], None)
+            return ends[task_status]
+
+        create_positions = [next_position(TaskStatus.todo) for _ in creates]
+        positions = {task_id: next_position(task_status) for task_id, task_status in relocated}
+
+    links = []
+    created_ids = []
+    if creates:
+        rows = [
+            {**item.model_dump(exclude={"assignee_ids"}), "creator_id": current_user.id,
+             "priority_rank": rank_for_priority(item.priority), "position": position}
+            for (_, item), position in zip(creates, create_positions)
+        ]
+        result = await db.execute(insert(Task).returning(Task.id, sort_by_parameter_order=True), rows)
+        created_ids = list(result.scalars())
+        for task_id, (_, item) in zip(created_ids, creates):
+            links.extend({"task_id": task_id, "user_id": user_id} for user_id in set(item.assignee_ids or []))
+
+    if updates:
+        values, reassigned = [], []
+        for _, task_id, data in updates:
+            if "assignee_ids" in data:
+                assignee_ids = data.pop("assignee_ids")
+                if assignee_ids is not None:
+                    reassigned.append(task_id)
+                    data["updated_at"] = datetime.utcnow()
+                    links.extend({"task_id": task_id, "user_id": user_id} for user_id in set(assignee_ids))
+            if "priority" in data:
+                data["priority_rank"] = rank_for_priority(data["priority"])
+            if task_id in positions and data.get("status") is not None:
+                data["position"] = positions[task_id]
+            if data:
+                values.append({"id": task_id, **data})
+        if values:
+            await db.execute(update(Task), values)
+        if reassigned:
+            await db.execute(delete(task_assignees_table).where(task_assignees_table.c.task_id.in_(reassigned)))
+
+    if links:
+        await db.execute(insert(task_assignees_table), links)
+
+    moves_by_status = defaultdict(list)
+    for _, item in moves:
+        if item.id in positions:
+            continue
+        moves_by_status[item.status].append(item.id)
+    for task_status, ids in moves_by_status.items():
+        await db.execute(
+            update(Task).where(Task.id.in_(ids)).values(status=task_status)
+            .execution_options(synchronize_session=False)
+        )
+    relocated_moves = {item.id: item.status for _, item in moves if item.id in positions}
+    if relocated_moves:
+        await db.execute(update(Task), [
+            {"id": task_id, "status": task_status, "position": positions[task_id]}
+            for task_id, task_status in relocated_moves.items()
+        ])
+
+    if deletes:
+        deleted_ids = [task_id for _, task_id in deletes]
+        await db.execute(delete(task_assignees_table).where(task_assignees_table.c.task_id.in_(deleted_ids)))
+        await db.execute(delete(Task).where(Task.id.in_(deleted_ids)).execution_options(synchronize_session=False))
+        await record_tombstones(db, "task", deleted_ids)
+
     await db.commit()
-    await db.refresh(db_task)
-    return await get_task(db, db_task.id)
\ No newline at end of file
+
+    # Все затронутые задачи перечитываем одним запросом (плюс загрузка связей)
+    touched = set(created_ids) | {task_id for _, task_id, _ in updates} | {item.id for _, item in moves}
+    touched -= {task_id for _, task_id in deletes}
+    tasks = {}
+    if touched:
+        result = await db.execute(
+            select(Task)
+            .options(selectinload(Task.creator), selectinload(Task.assignees))
+            .where(Task.id.in_(touched))
+            .execution_options(populate_existing=True)
+        )
+        tasks = {task.id: task for task in result.scalars()}
+
+    def task_out(task_id: int) -> Optional[TaskOut]:
+        return TaskOut.model_validate(tasks[task_id]) if task_id in tasks else None
+
+    for task_id, (index, _) in zip(created_ids, creates):
+        results.append(TaskBatchItemResult(op="create", index=index, id=task_id, status_code=201, task=task_out(task_id)))
+    for index, task_id, _ in updates:
+        results.append(TaskBatchItemResult(op="update", index=index, id=task_id, status_code=200, task=task_out(task_id)))
+    for index, item in moves:
+        results.append(TaskBatchItemResult(op="move", index=index, id=item.id, status_code=200, task=task_out(item.id)))
+    for index, task_id in deletes:
+        add_result("delete", index, task_id, 204)
+
+    results.sort(key=lambda result: (BATCH_OPS.index(result.op), result.index))
+
+    if any(result.status_code < 400 for result in results):
+        await task_cache.invalidate_task_lists(
+            previous_user_ids.union(*(task_user_ids(result.task) for result in results if result.task is not None))
+        )
+
+    event_types = {"create": "task.created", "update": "task.updated", "move": "task.moved", "delete": "task.deleted"}
+    for result in results:
+        if result.status_code < 400:
+            await publish_task_event(event_types[result.op], result.id, result.task)
+            _record_batch_activity(batch, result, previous, current_user.id)
+    return results
+
+
+def _record_batch_activity(
+    batch: TaskBatch, result: TaskBatchItemResult, previous: Dict[int, dict], user_id: int
+) -> None:
+    """
+    Пишет в журнал действий успешную операцию пакета. Как и в update_task, в журнал попадают
+    только поля, значение которых меняется; прежние значения прочитаны до применения пакета.
+    """
+    before = previous.get(result.id, {})
+    if result.op == "create":
+        activity_log.record(result.id, user_id, "created", created_changes(result.task))
+    elif result.op == "update":
+        data = batch.update[result.index].model_dump(exclude_unset=True, exclude={"id"})
+        changes = {key: value for key, value in data.items() if key != "assignee_ids" and before[key] != value}
+        if data.get("assignee_ids") is not None and set(data["assignee_ids"]) != before["assignee_ids"]:
+            changes["assignee_ids"] = data["assignee_ids"]
+        if changes:
+            moved = "status" in changes and changes["status"] is not None
+            activity_log.record(result.id, user_id, "moved" if moved else "updated", changes)
+    elif result.op == "move":
+        if batch.move[result.index].status != before["status"]:
+            activity_log.record(result.id, user_id, "moved", {"status": batch.move[result.index].status})
+    else:
+        activity_log.record(result.id, user_id, "deleted")
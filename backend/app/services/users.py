@@ -1,8 +1,54 @@
+from typing import Dict, Iterable, List
+from fastapi import Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from app.db.session import get_db
 from app.models.user import User
-from app.schemas.user import UserCreate
-from app.core.security import get_password_hash
+from app.schemas.user import UserCreate, UserOut
+from app.core.events import broker
+from app.core.security import password_hasher, invalidate_cached_user
+from app.services import task_cache
+
+
+def users_not_found_detail(missing: Iterable[int]) -> str:
+    return f"Users not found: {sorted(missing)}"
+
+
+class UserLoader:
+    """
+    Загрузка пользователей по id с кэшем на время запроса: все еще не загруженные id
+    читаются одним запросом, повторные обращения к тем же id в БД не ходят.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._users: Dict[int, User] = {}
+        self._missing: set = set()
+
+    async def load_many(self, user_ids: Iterable[int]) -> Dict[int, User]:
+        """Возвращает найденных пользователей по id; отсутствующих в результате нет."""
+        user_ids = set(user_ids)
+        pending = user_ids - self._users.keys() - self._missing
+        if pending:
+            result = await self.db.execute(select(User).where(User.id.in_(pending)))
+            for user in result.scalars():
+                self._users[user.id] = user
+            self._missing |= pending - self._users.keys()
+        return {user_id: self._users[user_id] for user_id in user_ids if user_id in self._users}
+
+    async def require(self, user_ids: Iterable[int]) -> List[User]:
+        """Как load_many, но все отсутствующие id сообщаются одной ошибкой 404. Порядок id сохраняется."""
+        user_ids = list(dict.fromkeys(user_ids))
+        users = await self.load_many(user_ids)
+        missing = [user_id for user_id in user_ids if user_id not in users]
+        if missing:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=users_not_found_detail(missing))
+        return [users[user_id] for user_id in user_ids]
+
+
+def get_user_loader(db: AsyncSession = Depends(get_db)) -> UserLoader:
+    """Зависимость FastAPI: один загрузчик (и кэш) на запрос."""
+    return UserLoader(db)
 
 
 async def get_user_by_email(db: AsyncSession, email: str):
@@ -11,9 +57,14 @@ async def get_user_by_email(db: AsyncSession, email: str):
     return result.scalars().first()
 
 
+async def publish_user_event(event_type: str, user: User):
+    """Рассылает событие изменения пользователя подписчикам доски."""
+    await broker.publish({"type": event_type, "id": user.id, "user": UserOut.model_validate(user).model_dump(mode="json")})
+
+
 async def create_user(db: AsyncSession, user: UserCreate):
     """Создает нового пользователя."""
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_hasher.hash(user.password)
     db_user = User(
         email=user.email,
         first_name=user.first_name,
@@ -23,9 +74,16 @@ async def create_user(db: AsyncSession, user: UserCreate):
     db.add(db_user)
     await db.commit()
     await db.refresh(db_user)
+    await publish_user_event("user.created", db_user)
     return db_user
 
 
+async def update_password_hash(db: AsyncSession, user: User, hashed_password: str) -> None:
+    """Сохраняет пересчитанный хеш пароля (например, после смены стоимости bcrypt)."""
+    user.hashed_password = hashed_password
+    await db.commit()
+
+
 async def get_user(db: AsyncSession, user_id: int):
     """Получает пользователя по его ID."""
     result = await db.execute(select(User).filter(User.id == user_id))
@@ -37,9 +95,16 @@ async def get_users(db: AsyncSession):
     result = await db.execute(select(User))
     return result.scalars().all()
 
-async def update_avatar(db: AsyncSession, user: User, avatar_path: str) -> User:
-    """Обновляет путь к аватару для пользователя."""
+async def update_avatar(db: AsyncSession, user_id: int, avatar_path: str) -> User:
+    """
+    Обновляет путь к аватару для пользователя и сбрасывает его в кэше аутентификации
+    и в кэше списков задач (аватар входит в карточки любого списка).
+    """
+    user = await get_user(db, user_id)
     user.avatar_url = avatar_path
     await db.commit()
     await db.refresh(user)
+    invalidate_cached_user(user_id)
+    await task_cache.invalidate_all_task_lists()
+    await publish_user_event("user.updated", user)
     return user
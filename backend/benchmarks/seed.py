@@ -0,0 +1,72 @@
+"""
+Генератор воспроизводимого набора данных для бенчмарков: N пользователей, M задач
+и K исполнителей на задачу. Данные вставляются пакетными INSERT без ORM-объектов.
+"""
+import random
+from typing import List
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.ranking import spread_ranks
+from app.models.task import Task, TaskStatus, TaskType, rank_for_priority, task_assignees_table
+from app.models.user import User
+
+# Пароль всех сгенерированных пользователей (хэш считается один раз)
+BENCHMARK_PASSWORD = "benchmark-password"
+
+# Размер пакета для INSERT: укладывается в лимит параметров SQLite
+CHUNK_SIZE = 500
+
+
+def benchmark_email(index: int) -> str:
+    return f"user{index}@example.com"
+
+
+async def _insert_chunked(session: AsyncSession, target, rows: List[dict]) -> None:
+    for start in range(0, len(rows), CHUNK_SIZE):
+        await session.execute(insert(target), rows[start:start + CHUNK_SIZE])
+
+
+async def seed(
+    session: AsyncSession,
+    task_count: int,
+    user_count: int,
+    assignees_per_task: int,
+    hashed_password: str = "x",
+    rng_seed: int = 42,
+) -> None:
+    """
+    Заполняет пустую базу. Id пользователей и задач идут подряд с 1, поэтому
+    сценарии могут выбирать их без дополнительных запросов.
+    """
+    users = [
+        {"email": benchmark_email(i), "first_name": f"First{i}", "last_name": f"Last{i}",
+         "hashed_password": hashed_password, "avatar_url": f"uploads/avatars/{i:02d}/{i:064d}.png"}
+        for i in range(user_count)
+    ]
+    await _insert_chunked(session, User, users)
+    rng = random.Random(rng_seed)
+    priorities = ["high", "medium", "low"]
+    tasks = []
+    for i in range(task_count):
+        priority = rng.choice(priorities)
+        tasks.append({
+            "title": f"Task {i}", "description": "Lorem ipsum dolor sit amet " * 3,
+            "status": rng.choice(list(TaskStatus)), "type": rng.choice(list(TaskType)),
+            "priority": priority, "priority_rank": rank_for_priority(priority),
+            "time_spent": rng.random() * 10, "creator_id": rng.randint(1, user_count),
+        })
+    # Ручной порядок: карточки каждой колонки в порядке создания
+    for task_status in TaskStatus:
+        column = [task for task in tasks if task["status"] == task_status]
+        for task, position in zip(column, spread_ranks(len(column))):
+            task["position"] = position
+    await _insert_chunked(session, Task, tasks)
+    links = [
+        {"task_id": task_id, "user_id": user_id}
+        for task_id in range(1, task_count + 1)
+        for user_id in rng.sample(range(1, user_count + 1), min(assignees_per_task, user_count))
+    ]
+    await _insert_chunked(session, task_assignees_table, links)
+    await session.commit()
@@ -0,0 +1,84 @@
+"""
+Сравнение сериализации списков задач: путь через ORM и TaskOut (как в response_model),
+быстрый путь из кортежей колонок с FastJSONResponse и нормализованная форма (?shape=normalized).
+
+Запуск из каталога backend:
+    python -m benchmarks.serialization --tasks 500 --users 50 --repeat 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import List
+
+# Приложение создает engine при импорте; бенчмарку достаточно SQLite в памяти
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("TEST_DATABASE_URL", os.environ["DATABASE_URL"])
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.responses import FastJSONResponse
+from app.db.session import Base
+from app.schemas.task import TaskOut
+from app.services import tasks as tasks_service
+from benchmarks.seed import seed
+
+
+async def measure(name: str, func, repeat: int) -> List[float]:
+    await func()  # прогрев
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        timings.append((time.perf_counter() - started) * 1000)
+    print(f"{name:<28} median {statistics.median(timings):8.2f} ms   p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:8.2f} ms")
+    return timings
+
+
+async def main(task_count: int, user_count: int, assignees_per_task: int, repeat: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        await seed(session, task_count, user_count, assignees_per_task)
+
+    adapter = TypeAdapter(List[TaskOut])
+
+    async def model_path():
+        async with session_factory() as session:
+            tasks = await tasks_service.get_tasks(session, limit=task_count)
+            return adapter.dump_json(adapter.validate_python(tasks, from_attributes=True))
+
+    async def fast_path():
+        async with session_factory() as session:
+            rows, _ = await tasks_service.get_task_rows(session, limit=task_count)
+            return FastJSONResponse(rows).body
+
+    async def normalized_path():
+        async with session_factory() as session:
+            payload, _ = await tasks_service.get_task_rows_normalized(session, limit=task_count)
+            return FastJSONResponse(payload).body
+
+    print(f"{task_count} tasks, {user_count} users, {assignees_per_task} assignees per task, {repeat} runs")
+    model = await measure("ORM + TaskOut + dump_json", model_path, repeat)
+    fast = await measure("columns + FastJSONResponse", fast_path, repeat)
+    normalized = await measure("?shape=normalized", normalized_path, repeat)
+    print(f"speedup x{statistics.median(model) / statistics.median(fast):.2f} (columns), "
+          f"x{statistics.median(model) / statistics.median(normalized):.2f} (normalized)")
+    print(f"payload {len(await model_path())} bytes, normalized {len(await normalized_path())} bytes")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--assignees", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.users, args.assignees, args.repeat))
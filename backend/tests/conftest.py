@@ -4,6 +4,7 @@ from typing import AsyncGenerator
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy import event
 
 # --- ВАЖНО: Загружаем переменные окружения из .env файла ---
 # Это нужно сделать ДО импорта кода вашего приложения (app.main).
@@ -14,10 +15,15 @@ load_dotenv()
 # Используем SQLite в памяти для тестов
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 os.environ["DATABASE_URL"] = TEST_DATABASE_URL # Set DATABASE_URL for the app code
+os.environ["TEST_DATABASE_URL"] = TEST_DATABASE_URL
+# Обязательная настройка без значения по умолчанию; в тестах ключ подписи токенов любой
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
 
 # Теперь, когда переменные загружены, импорт пройдет успешно
 from app.main import app
 from app.db.session import Base, get_db
+from app.core.security import auth_cache
+from app.services.activity import activity_log
 
 
 engine = create_async_engine(TEST_DATABASE_URL, echo=True) # This engine is for test session management
@@ -25,6 +31,32 @@ TestingSessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=engine, class_=AsyncSession
 )
 
+@pytest.fixture(scope="function", autouse=True)
+def clear_auth_cache():
+    # Кэш живет на уровне процесса, а база пересоздается для каждого теста
+    auth_cache.clear()
+    yield
+    auth_cache.clear()
+
+@pytest.fixture(scope="function", autouse=True)
+def clear_activity_log():
+    # Очередь журнала действий тоже общая для процесса: события прошлых тестов не должны попасть в базу
+    activity_log.clear()
+    yield
+    activity_log.clear()
+
+@pytest.fixture(scope="function")
+def query_counter():
+    """Собирает SQL-запросы, выполненные через тестовый engine."""
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _record)
+    yield statements
+    event.remove(engine.sync_engine, "before_cursor_execute", _record)
+
 @pytest.fixture(scope="function")
 async def db_session() -> AsyncGenerator[AsyncSession, None]:
     async with engine.begin() as conn:
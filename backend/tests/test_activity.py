@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+from sqlalchemy import func, select
+
+from app.models.activity import TaskActivity
+from app.services.activity import ActivityLog, activity_log
+from tests.conftest import TestingSessionLocal
+from tests.test_tasks import get_auth_token
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestActivityWriter:
+    async def test_bounded_queue_and_batched_flush(self, db_session, query_counter):
+        log = ActivityLog(max_size=5, batch_size=2, flush_interval=0)
+        for i in range(7):
+            log.record(1, 1, "updated", {"title": f"Title {i}"})
+        assert (log.recorded, log.dropped) == (5, 2)
+
+        query_counter.clear()
+        assert await log.flush(TestingSessionLocal) == 5
+        inserts = [q for q in query_counter if q.startswith("INSERT INTO task_activity")]
+        # Пакеты по batch_size, каждый — один многострочный INSERT
+        assert len(inserts) == 3
+        assert (await db_session.execute(select(func.count(TaskActivity.id)))).scalar() == 5
+        assert log.written == 5
+
+        # Новые события снова принимаются после записи
+        log.record(1, 1, "updated")
+        assert log.dropped == 2 and len(log) == 1
+
+    async def test_background_writer(self, db_session):
+        log = ActivityLog(max_size=100, batch_size=10, flush_interval=0.01)
+        writer = asyncio.create_task(log.run(TestingSessionLocal))
+        try:
+            for task_id in range(3):
+                log.record(task_id, None, "deleted")
+            for _ in range(50):
+                await asyncio.sleep(0.01)
+                if log.written == 3:
+                    break
+        finally:
+            writer.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await writer
+        assert log.written == 3
+        assert await log.flush(TestingSessionLocal) == 0
+
+    async def test_write_error_does_not_block_queue(self):
+        log = ActivityLog(max_size=10, batch_size=10, flush_interval=0)
+
+        def broken_session():
+            raise RuntimeError("database is down")
+
+        log.record(1, 1, "deleted")
+        assert await log.flush(broken_session) == 1
+        assert (log.written, log.failed, len(log)) == (0, 1, 0)
+
+
+class TestTaskActivityEndpoint:
+    """Мутации задач пишут журнал в фоне, история отдается постранично от новых к старым."""
+
+    @pytest.fixture(scope="function", autouse=True)
+    async def setup_user(self, async_client: AsyncClient):
+        response = await async_client.post(
+            "/api/users/", json={"email": "audit@example.com", "first_name": "Аудит", "last_name": "Тест", "password": "password123"}
+        )
+        self.user_id = response.json()["id"]
+        token = await get_auth_token(async_client, "audit@example.com", "password123")
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    async def activity(self, async_client: AsyncClient, task_id: int, **params):
+        response = await async_client.get(f"/api/tasks/{task_id}/activity", headers=self.headers, params=params)
+        assert response.status_code == status.HTTP_200_OK
+        return response
+
+    async def test_task_history(self, async_client: AsyncClient, query_counter):
+        query_counter.clear()
+        response = await async_client.post(
+            "/api/tasks/", headers=self.headers,
+            json={"title": "Audited", "type": "development", "assignee_ids": [self.user_id]},
+        )
+        task_id = response.json()["id"]
+        await async_client.put(f"/api/tasks/{task_id}", headers=self.headers, json={"status": "in_progress", "title": "Audited"})
+        await async_client.post(f"/api/tasks/{task_id}/time", headers=self.headers, json={"hours": 1.5})
+        await async_client.post(f"/api/tasks/{task_id}/move", headers=self.headers, json={"status": "done"})
+        await async_client.delete(f"/api/tasks/{task_id}", headers=self.headers)
+        # Запросы пользователей в базу журнала не пишут
+        assert not [q for q in query_counter if "task_activity" in q]
+
+        assert (await self.activity(async_client, task_id)).json() == []
+        assert await activity_log.flush(TestingSessionLocal) == 5
+
+        entries = (await self.activity(async_client, task_id)).json()
+        assert [entry["action"] for entry in entries] == ["deleted", "moved", "time_logged", "moved", "created"]
+        assert {entry["user_id"] for entry in entries} == {self.user_id}
+        # Неизменившийся заголовок в журнал не попадает
+        assert entries[3]["changes"] == {"status": "in_progress"}
+        assert entries[2]["changes"] == {"hours": 1.5}
+        assert entries[4]["changes"] == {"title": "Audited", "status": "todo", "assignee_ids": [self.user_id]}
+
+    async def test_pagination(self, async_client: AsyncClient):
+        response = await async_client.post("/api/tasks/", headers=self.headers, json={"title": "Paged", "type": "development"})
+        task_id = response.json()["id"]
+        for i in range(4):
+            await async_client.put(f"/api/tasks/{task_id}", headers=self.headers, json={"title": f"Paged {i}"})
+        await activity_log.flush(TestingSessionLocal)
+
+        titles, cursor = [], None
+        while True:
+            response = await self.activity(async_client, task_id, limit=2, **({"cursor": cursor} if cursor else {}))
+            titles += [entry["changes"].get("title") for entry in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert titles == ["Paged 3", "Paged 2", "Paged 1", "Paged 0", "Paged"]
+
+        response = await async_client.get(f"/api/tasks/{task_id}/activity", headers=self.headers, params={"cursor": "garbage"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    async def test_batch_operations_are_logged(self, async_client: AsyncClient):
+        response = await async_client.post(
+            "/api/tasks/batch", headers=self.headers,
+            json={"create": [{"title": "Batched", "type": "development", "assignee_ids": [self.user_id]}]},
+        )
+        task_id = response.json()["results"][0]["id"]
+        await async_client.post("/api/tasks/batch", headers=self.headers, json={"update": [{"id": task_id, "priority": "high"}]})
+        await async_client.post("/api/tasks/batch", headers=self.headers, json={"move": [{"id": task_id, "status": "done"}]})
+        await activity_log.flush(TestingSessionLocal)
+
+        entries = (await self.activity(async_client, task_id)).json()
+        assert [(entry["action"], entry["changes"]) for entry in entries[:2]] == [
+            ("moved", {"status": "done"}), ("updated", {"priority": "high"}),
+        ]
+        assert entries[2]["action"] == "created"
+
+    async def test_batch_logs_only_changed_fields(self, async_client: AsyncClient):
+        response = await async_client.post(
+            "/api/tasks/", headers=self.headers,
+            json={"title": "Resubmitted", "type": "development", "assignee_ids": [self.user_id]},
+        )
+        task = response.json()
+        unchanged = {
+            "id": task["id"], "title": task["title"], "type": task["type"], "priority": task["priority"],
+            "status": task["status"], "assignee_ids": [self.user_id],
+        }
+        # Клиент отправляет форму целиком: сначала без изменений, затем с новым приоритетом
+        for item in (unchanged, {**unchanged, "priority": "high"}):
+            response = await async_client.post("/api/tasks/batch", headers=self.headers, json={"update": [item]})
+            assert response.json()["results"][0]["status_code"] == status.HTTP_200_OK
+        await activity_log.flush(TestingSessionLocal)
+
+        entries = (await self.activity(async_client, task["id"])).json()
+        assert [(entry["action"], entry["changes"]) for entry in entries[:-1]] == [("updated", {"priority": "high"})]
+        assert entries[-1]["action"] == "created"
@@ -1,6 +1,13 @@
+import asyncio
 import pytest
 from httpx import AsyncClient
 from fastapi import status
+from jose import jwt
+
+from app.core.config import settings
+from app.core.security import auth_cache, password_hasher, pwd_context
+from app.models.user import User
+from app.services import users as users_service
 
 # Пометка для pytest-asyncio, что все тесты в файле асинхронные
 pytestmark = pytest.mark.asyncio
@@ -72,6 +79,23 @@ class TestAuthRoutes:
         assert "access_token" in data
         assert data["token_type"] == "bearer"
 
+    async def test_token_signed_with_configured_key(self, async_client: AsyncClient, monkeypatch):
+        """Токены подписываются ключом из настроек: смена SECRET_KEY делает старые токены недействительными."""
+        await async_client.post(
+            "/api/users/",
+            json={"email": "key_test@example.com", "first_name": "Ключ", "last_name": "Тест", "password": "password123"},
+        )
+        response = await async_client.post(
+            "/api/auth/token", data={"username": "key_test@example.com", "password": "password123"}
+        )
+        token = response.json()["access_token"]
+        assert jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])["sub"] == "key_test@example.com"
+
+        auth_cache.clear()
+        monkeypatch.setattr(settings, "SECRET_KEY", "rotated-secret-key")
+        response = await async_client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
     @pytest.mark.parametrize(
         "username, password, expected_status, expected_detail",
         [
@@ -99,4 +123,87 @@ class TestAuthRoutes:
         )
         assert response.status_code == expected_status
         # ИСПРАВЛЕНО: Убрана лишняя часть 'import pytest'
-        assert expected_detail in response.json()["detail"]
\ No newline at end of file
+        assert expected_detail in response.json()["detail"]
+
+
+class TestCurrentUserCache:
+    """Тесты кэша аутентифицированных пользователей."""
+
+    @pytest.fixture(scope="function", autouse=True)
+    async def setup_user_and_token(self, async_client: AsyncClient):
+        response = await async_client.post(
+            "/api/users/",
+            json={"email": "cached@example.com", "first_name": "Кэш", "last_name": "Тест", "password": "password123"},
+        )
+        self.user_id = response.json()["id"]
+        login_response = await async_client.post(
+            "/api/auth/token", data={"username": "cached@example.com", "password": "password123"}
+        )
+        self.auth_headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+    async def test_repeated_requests_skip_user_lookup(self, async_client: AsyncClient, query_counter):
+        first = await async_client.get("/api/users/me", headers=self.auth_headers)
+        assert first.status_code == status.HTTP_200_OK
+        assert len(query_counter) == 1
+
+        second = await async_client.get("/api/users/me", headers=self.auth_headers)
+        assert second.json() == first.json()
+        assert len(query_counter) == 1
+
+    async def test_avatar_update_invalidates_cache(self, async_client: AsyncClient, db_session):
+        await async_client.get("/api/users/me", headers=self.auth_headers)
+        await users_service.update_avatar(db_session, user_id=self.user_id, avatar_path="uploads/new.png")
+
+        response = await async_client.get("/api/users/me", headers=self.auth_headers)
+        assert response.json()["avatar_url"] == "uploads/new.png"
+
+    async def test_user_claims_in_token_skip_database(self, async_client: AsyncClient, query_counter, monkeypatch):
+        monkeypatch.setattr(settings, "AUTH_USER_CLAIMS", True)
+        login_response = await async_client.post(
+            "/api/auth/token", data={"username": "cached@example.com", "password": "password123"}
+        )
+        headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+        auth_cache.clear()
+        query_counter.clear()
+
+        response = await async_client.get("/api/users/me", headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["first_name"] == "Кэш"
+        assert query_counter == []
+
+
+class TestPasswordHashing:
+    """Тесты хеширования паролей вне event loop."""
+
+    async def test_login_rehashes_password_with_new_cost(self, async_client: AsyncClient, db_session):
+        old_hash = pwd_context.handler("bcrypt").using(rounds=4).hash("rehash_password")
+        user = User(email="rehash@example.com", first_name="Старый", last_name="Хеш", hashed_password=old_hash)
+        db_session.add(user)
+        await db_session.commit()
+
+        response = await async_client.post(
+            "/api/auth/token", data={"username": "rehash@example.com", "password": "rehash_password"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        user = await users_service.get_user_by_email(db_session, "rehash@example.com")
+        assert user.hashed_password != old_hash
+        assert user.hashed_password.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+        assert pwd_context.verify("rehash_password", user.hashed_password)
+
+    async def test_hashing_does_not_block_event_loop(self):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        ticker_task = asyncio.create_task(ticker())
+        hashes = await asyncio.gather(*(password_hasher.hash(f"password{i}") for i in range(2)))
+        ticker_task.cancel()
+
+        assert len(set(hashes)) == 2
+        assert ticks > 10
+        assert password_hasher.stats()["in_flight"] == 0
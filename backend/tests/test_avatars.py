@@ -0,0 +1,207 @@
+import io
+import os
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.limits import MULTIPART_OVERHEAD
+from app.core.static import UploadsStaticFiles
+from app.core.storage import IMMUTABLE_CACHE_CONTROL, LocalStorage, S3Storage, create_storage, get_storage
+from app.main import app
+from app.services import avatars as avatars_service
+from app.services.avatars import avatar_thumbnail_url, thumbnail_key
+from tests.test_tasks import get_auth_token
+
+pytestmark = pytest.mark.asyncio
+
+
+def png_bytes(color=(255, 0, 0), size=(300, 200)) -> bytes:
+    Image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TestAvatarUpload:
+    """Тесты загрузки аватаров."""
+
+    @pytest.fixture(scope="function", autouse=True)
+    async def setup_user_and_token(self, async_client: AsyncClient, tmp_path):
+        self.uploads_dir = tmp_path
+        app.dependency_overrides[get_storage] = lambda: LocalStorage(str(tmp_path))
+        await async_client.post(
+            "/api/users/",
+            json={"email": "avatar@example.com", "first_name": "Аватар", "last_name": "Тест", "password": "password123"},
+        )
+        token = await get_auth_token(async_client, "avatar@example.com", "password123")
+        self.auth_headers = {"Authorization": f"Bearer {token}"}
+        yield
+        app.dependency_overrides.pop(get_storage, None)
+
+    async def upload(self, async_client: AsyncClient, content: bytes, filename: str = "me.png"):
+        return await async_client.post(
+            "/api/users/me/avatar", headers=self.auth_headers, files={"file": (filename, content, "image/png")}
+        )
+
+    async def test_content_addressed_with_thumbnails(self, async_client: AsyncClient):
+        Image = pytest.importorskip("PIL.Image")
+        content = png_bytes()
+        response = await self.upload(async_client, content)
+        assert response.status_code == status.HTTP_200_OK
+        avatar_url = response.json()["avatar_url"]
+        assert avatar_url.startswith("uploads/avatars/") and avatar_url.endswith(".png")
+
+        relative = avatar_url[len("uploads/"):]
+        assert (self.uploads_dir / relative).read_bytes() == content
+        for size in settings.AVATAR_THUMBNAIL_SIZES:
+            thumbnail = self.uploads_dir / avatar_thumbnail_url(avatar_url, size)[len("uploads/"):]
+            with Image.open(thumbnail) as image:
+                assert max(image.size) == size
+
+        # Тот же файл под другим именем не дублируется
+        again = await self.upload(async_client, content, filename="copy.PNG")
+        assert again.json()["avatar_url"] == avatar_url
+        files = [name for _, _, names in os.walk(self.uploads_dir) for name in names]
+        assert len(files) == 1 + len(settings.AVATAR_THUMBNAIL_SIZES)
+
+    async def test_too_large_is_rejected(self, async_client: AsyncClient, monkeypatch):
+        monkeypatch.setattr(settings, "AVATAR_MAX_BYTES", 1024)
+        response = await self.upload(async_client, b"\x89PNG" + b"0" * 2048)
+        assert response.status_code == status.HTTP_413_CONTENT_TOO_LARGE
+        # Временный файл удален, профиль не изменился
+        assert [name for _, _, names in os.walk(self.uploads_dir) for name in names] == []
+        me = await async_client.get("/api/users/me", headers=self.auth_headers)
+        assert me.json()["avatar_url"] is None
+
+    async def test_large_body_is_rejected_before_parsing(self, async_client: AsyncClient, monkeypatch):
+        monkeypatch.setattr(settings, "AVATAR_MAX_BYTES", 1024)
+
+        async def not_called(*args):
+            raise AssertionError("multipart body should not reach the endpoint")
+
+        monkeypatch.setattr(avatars_service, "save_avatar", not_called)
+        content = b"\x89PNG" + b"0" * (MULTIPART_OVERHEAD + 2048)
+        response = await self.upload(async_client, content)
+        assert response.status_code == status.HTTP_413_CONTENT_TOO_LARGE
+
+        # Без Content-Length (chunked) тело обрывается по мере чтения
+        boundary = "limit-test"
+        body = (
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"me.png\"\r\n"
+            f"Content-Type: image/png\r\n\r\n"
+        ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+
+        async def chunks():
+            for start in range(0, len(body), 8192):
+                yield body[start:start + 8192]
+
+        response = await async_client.post(
+            "/api/users/me/avatar", content=chunks(),
+            headers={**self.auth_headers, "Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+        assert response.status_code == status.HTTP_413_CONTENT_TOO_LARGE
+
+    async def test_rejects_non_images(self, async_client: AsyncClient):
+        response = await self.upload(async_client, b"#!/bin/sh", filename="script.sh")
+        assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        pytest.importorskip("PIL")
+        response = await self.upload(async_client, b"not really a png", filename="fake.png")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestUploadsStaticFiles:
+    """Тесты заголовков кэширования при раздаче загрузок."""
+
+    async def test_cache_headers(self, tmp_path):
+        (tmp_path / "avatars" / "ab").mkdir(parents=True)
+        (tmp_path / "avatars" / "ab" / "abc.png").write_bytes(b"avatar")
+        (tmp_path / "1_legacy.jpg").write_bytes(b"legacy")
+        transport = ASGITransport(app=UploadsStaticFiles(directory=tmp_path))
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            avatar = await client.get("/avatars/ab/abc.png")
+            assert avatar.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+            assert avatar.headers["ETag"]
+
+            revalidated = await client.get("/avatars/ab/abc.png", headers={"If-None-Match": avatar.headers["ETag"]})
+            assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+
+            legacy = await client.get("/1_legacy.jpg")
+            assert legacy.headers["Cache-Control"] == "no-cache"
+
+
+class FakeS3Error(Exception):
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}}
+
+
+class FakeS3Client:
+    """Минимальная замена клиента boto3 S3: объекты хранятся в словаре."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise FakeS3Error("404")
+        return {"ContentLength": len(self.objects[(Bucket, Key)]["body"])}
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None):
+        with open(Filename, "rb") as source:
+            self.objects[(Bucket, Key)] = {"body": source.read(), **(ExtraArgs or {})}
+
+    def generate_presigned_url(self, ClientMethod, Params, ExpiresIn):
+        return f"https://s3.test/{Params['Bucket']}/{Params['Key']}?X-Amz-Expires={ExpiresIn}"
+
+
+class TestS3Storage:
+    """Тесты загрузки аватаров в S3-совместимое хранилище."""
+
+    @pytest.fixture(scope="function", autouse=True)
+    async def setup_user_and_token(self, async_client: AsyncClient):
+        self.client = FakeS3Client()
+        self.storage = S3Storage("avatars-bucket", client=self.client, presign_expires=600)
+        app.dependency_overrides[get_storage] = lambda: self.storage
+        await async_client.post(
+            "/api/users/",
+            json={"email": "s3@example.com", "first_name": "Эс", "last_name": "Три", "password": "password123"},
+        )
+        token = await get_auth_token(async_client, "s3@example.com", "password123")
+        self.auth_headers = {"Authorization": f"Bearer {token}"}
+        yield
+        app.dependency_overrides.pop(get_storage, None)
+
+    async def test_upload_and_presigned_redirect(self, async_client: AsyncClient):
+        content = png_bytes(color=(0, 0, 255))
+        response = await async_client.post(
+            "/api/users/me/avatar", headers=self.auth_headers, files={"file": ("me.png", content, "image/png")}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        avatar_url = response.json()["avatar_url"]
+        assert avatar_url.startswith("files/avatars/")
+
+        key = avatar_url[len("files/"):]
+        stored = self.client.objects[("avatars-bucket", key)]
+        assert stored["body"] == content
+        assert stored["ContentType"] == "image/png"
+        assert stored["CacheControl"] == IMMUTABLE_CACHE_CONTROL
+        assert ("avatars-bucket", thumbnail_key(key, 64)) in self.client.objects
+
+        redirect = await async_client.get(f"/api/{avatar_url}")
+        assert redirect.status_code == status.HTTP_307_TEMPORARY_REDIRECT
+        assert redirect.headers["Location"] == f"https://s3.test/avatars-bucket/{key}?X-Amz-Expires=600"
+        assert redirect.headers["Cache-Control"] == "private, max-age=300"
+
+    async def test_rejects_keys_outside_storage(self):
+        for key in ("avatars/../../secret", "/etc/passwd", ""):
+            with pytest.raises(HTTPException) as error:
+                await self.storage.download_url(key)
+            assert error.value.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_missing_bucket_fails_at_creation(self, monkeypatch):
+        monkeypatch.setattr(settings, "STORAGE_BACKEND", "s3")
+        monkeypatch.setattr(settings, "S3_BUCKET", None)
+        with pytest.raises(RuntimeError, match="S3_BUCKET"):
+            create_storage()
@@ -0,0 +1,104 @@
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+
+from tests.test_tasks import get_auth_token
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestTaskBatch:
+    """Тесты пакетного эндпоинта /tasks/batch."""
+
+    @pytest.fixture(scope="function", autouse=True)
+    async def setup_users_and_token(self, async_client: AsyncClient):
+        response = await async_client.post(
+            "/api/users/",
+            json={"email": "batch@example.com", "first_name": "Пакет", "last_name": "Тест", "password": "password123"},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        self.user_id = response.json()["id"]
+        token = await get_auth_token(async_client, "batch@example.com", "password123")
+        self.auth_headers = {"Authorization": f"Bearer {token}"}
+
+    async def post_batch(self, async_client: AsyncClient, **batch) -> list:
+        response = await async_client.post("/api/tasks/batch", headers=self.auth_headers, json=batch)
+        assert response.status_code == status.HTTP_200_OK
+        return response.json()["results"]
+
+    async def test_batch_create_move_update_delete(self, async_client: AsyncClient):
+        created = await self.post_batch(async_client, create=[
+            {"title": "Batch task A", "type": "development", "priority": "high", "assignee_ids": [self.user_id]},
+            {"title": "Batch task B", "type": "testing"},
+            {"title": "Batch task C", "type": "testing", "assignee_ids": [999]},
+        ])
+        assert [result["status_code"] for result in created] == [201, 201, 404]
+        assert created[0]["task"]["assignees"][0]["id"] == self.user_id
+        assert created[1]["task"]["creator"]["email"] == "batch@example.com"
+        task_a, task_b = created[0]["id"], created[1]["id"]
+
+        results = await self.post_batch(
+            async_client,
+            update=[{"id": task_b, "title": "Batch task B renamed", "priority": "low"}],
+            move=[{"id": task_a, "status": "done"}],
+            delete=[12345],
+        )
+        assert [(result["op"], result["status_code"]) for result in results] == [
+            ("update", 200), ("move", 200), ("delete", 404),
+        ]
+        assert results[0]["task"]["title"] == "Batch task B renamed"
+        assert results[1]["task"]["status"] == "done"
+        results = await self.post_batch(async_client, move=[{"id": task_b, "status": "done"}])
+        assert results[0]["status_code"] == 403
+
+        # Порядок по приоритету учитывает ранг, обновленный пакетом
+        listing = await async_client.get("/api/tasks/", headers=self.auth_headers)
+        assert [task["id"] for task in listing.json()] == [task_a, task_b]
+
+        results = await self.post_batch(async_client, delete=[task_a, task_b])
+        assert [result["status_code"] for result in results] == [204, 204]
+        listing = await async_client.get("/api/tasks/", headers=self.auth_headers)
+        assert listing.json() == []
+
+    async def test_batch_query_count_does_not_grow_with_size(self, async_client: AsyncClient, query_counter):
+        await async_client.get("/api/users/me", headers=self.auth_headers)
+
+        async def count_queries(size: int) -> int:
+            query_counter.clear()
+            await self.post_batch(async_client, create=[
+                {"title": f"Bulk task {i}", "type": "development", "assignee_ids": [self.user_id]}
+                for i in range(size)
+            ])
+            # В SQLite нет sentinel-колонки для insertmanyvalues, и INSERT ... RETURNING с сохранением
+            # порядка выполняется построчно; в Postgres это один запрос. Его здесь не считаем.
+            return len([statement for statement in query_counter if not statement.startswith("INSERT INTO tasks")])
+
+        assert await count_queries(2) == await count_queries(20)
+
+    async def test_repeated_task_ids_conflict(self, async_client: AsyncClient):
+        created = await self.post_batch(async_client, create=[
+            {"title": "Batch task A", "type": "development", "assignee_ids": [self.user_id]},
+            {"title": "Batch task B", "type": "development", "assignee_ids": [self.user_id]},
+        ])
+        task_a, task_b = created[0]["id"], created[1]["id"]
+
+        results = await self.post_batch(
+            async_client,
+            update=[{"id": task_a, "title": "First"}, {"id": task_a, "title": "Second"}, {"id": task_b, "title": "Renamed"}],
+            move=[{"id": task_b, "status": "done"}],
+            delete=[task_b],
+        )
+        assert [(result["op"], result["id"], result["status_code"]) for result in results] == [
+            ("update", task_a, 409), ("update", task_a, 409), ("update", task_b, 409),
+            ("move", task_b, 409), ("delete", task_b, 409),
+        ]
+        listing = await async_client.get("/api/tasks/", headers=self.auth_headers, params={"sort": "oldest"})
+        assert [(task["title"], task["status"]) for task in listing.json()] == [
+            ("Batch task A", "todo"), ("Batch task B", "todo"),
+        ]
+
+    async def test_batch_size_is_limited(self, async_client: AsyncClient):
+        response = await async_client.post(
+            "/api/tasks/batch", headers=self.auth_headers, json={"delete": list(range(501))}
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
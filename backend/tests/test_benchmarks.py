@@ -0,0 +1,36 @@
+import pytest
+from httpx import AsyncClient
+
+from app.core.security import get_password_hash
+from benchmarks.load import BenchmarkContext, check_thresholds, compare_with_baseline, open_sessions, run_scenario
+from benchmarks.seed import BENCHMARK_PASSWORD, seed
+from tests.conftest import TestingSessionLocal
+
+
+class TestLoadHarness:
+    """Нагрузочный бенчмарк на маленьком наборе: сценарии проходят без ошибок, пороги проверяются."""
+
+    @pytest.mark.asyncio
+    async def test_scenarios_run_on_seeded_data(self, async_client: AsyncClient, db_session):
+        await seed(db_session, task_count=30, user_count=5, assignees_per_task=2,
+                   hashed_password=get_password_hash(BENCHMARK_PASSWORD))
+        context = BenchmarkContext(5, 30, await open_sessions(async_client, TestingSessionLocal, 5, 2))
+        assert context.assigned_sessions
+
+        for name in ("board", "tasks", "move", "reorder", "time", "login"):
+            result = await run_scenario(async_client, name, context, requests=4, concurrency=1)
+            report = result.to_dict()
+            assert report["requests"] == 4
+            assert report["errors"] == 0, name
+            assert report["p50_ms"] <= report["p95_ms"] <= report["max_ms"]
+
+    def test_thresholds_and_baseline(self):
+        report = {"board": {"p95_ms": 120.0, "p99_ms": 200.0, "rps": 40.0, "error_rate": 0.0}}
+
+        assert check_thresholds(report, {"board": {"p95_ms": 150, "min_rps": 20}}) == []
+        violations = check_thresholds(report, {"board": {"p95_ms": 100, "min_rps": 50}})
+        assert violations == ["board: p95_ms 120.0 > 100", "board: rps 40.0 < 50"]
+
+        baseline = {"board": {"p95_ms": 90.0, "rps": 41.0}}
+        assert compare_with_baseline(report, baseline, tolerance=0.5) == []
+        assert compare_with_baseline(report, baseline, tolerance=0.2) == ["board: p95 120.0 ms vs baseline 90.0 ms"]
@@ -0,0 +1,72 @@
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+
+from tests.test_tasks import get_auth_token
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestBoardRoutes:
+    """Тесты для агрегированного эндпоинта /board."""
+
+    @pytest.fixture(scope="function", autouse=True)
+    async def setup_user_and_token(self, async_client: AsyncClient):
+        user_response = await async_client.post(
+            "/api/users/",
+            json={"email": "board@example.com", "first_name": "Доска", "last_name": "Тест", "password": "password123"},
+        )
+        assert user_response.status_code == status.HTTP_201_CREATED
+        self.user_id = user_response.json()["id"]
+        token = await get_auth_token(async_client, "board@example.com", "password123")
+        self.auth_headers = {"Authorization": f"Bearer {token}"}
+
+    async def create_task(self, async_client: AsyncClient, title: str, task_status: str = "todo") -> dict:
+        response = await async_client.post(
+            "/api/tasks/",
+            headers=self.auth_headers,
+            json={"title": title, "type": "development", "assignee_ids": [self.user_id]},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        task = response.json()
+        if task_status != "todo":
+            response = await async_client.put(
+                f"/api/tasks/{task['id']}", headers=self.auth_headers, json={"status": task_status}
+            )
+            assert response.status_code == status.HTTP_200_OK
+            task = response.json()
+        return task
+
+    async def test_board_columns_counts_and_cursors(self, async_client: AsyncClient):
+        for i in range(3):
+            await self.create_task(async_client, f"Todo task {i}")
+        await self.create_task(async_client, "Done task", task_status="done")
+
+        response = await async_client.get("/api/board", headers=self.auth_headers, params={"per_column": 2})
+        assert response.status_code == status.HTTP_200_OK
+        columns = {column["status"]: column for column in response.json()["columns"]}
+
+        assert list(columns) == ["todo", "in_progress", "done"]
+        assert columns["todo"]["count"] == 3
+        assert len(columns["todo"]["tasks"]) == 2
+        assert columns["todo"]["next_cursor"]
+        assert columns["in_progress"] == {
+            "status": "in_progress", "count": 0, "time_spent": 0.0, "tasks": [], "next_cursor": None,
+        }
+        assert columns["done"]["count"] == 1
+        assert columns["done"]["next_cursor"] is None
+
+        more = await async_client.get(
+            "/api/tasks/",
+            headers=self.auth_headers,
+            params={"status": "todo", "cursor": columns["todo"]["next_cursor"]},
+        )
+        assert more.status_code == status.HTTP_200_OK
+        loaded_ids = [task["id"] for task in columns["todo"]["tasks"]] + [task["id"] for task in more.json()]
+        assert len(set(loaded_ids)) == 3
+
+    async def test_board_respects_status_filter(self, async_client: AsyncClient):
+        await self.create_task(async_client, "Only todo")
+        response = await async_client.get("/api/board", headers=self.auth_headers, params={"status": "done"})
+        assert response.status_code == status.HTTP_200_OK
+        assert [column["status"] for column in response.json()["columns"]] == ["done"]
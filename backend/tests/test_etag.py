@@ -0,0 +1,87 @@
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+from sqlalchemy import update
+
+from app.models.task import Task
+from tests.test_tasks import get_auth_token
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestConditionalGet:
+    """Тесты ETag и ответов 304 для списков."""
+
+    @pytest.fixture(scope="function", autouse=True)
+    async def setup_user_and_token(self, async_client: AsyncClient):
+        await async_client.post(
+            "/api/users/",
+            json={"email": "etag@example.com", "first_name": "Етаг", "last_name": "Тест", "password": "password123"},
+        )
+        token = await get_auth_token(async_client, "etag@example.com", "password123")
+        self.auth_headers = {"Authorization": f"Bearer {token}"}
+
+    async def test_unchanged_list_returns_304_after_version_read(self, async_client: AsyncClient, query_counter):
+        first = await async_client.get("/api/tasks/", headers=self.auth_headers)
+        etag = first.headers["ETag"]
+        assert etag.startswith('W/"')
+        assert "Last-Modified" in first.headers
+
+        query_counter.clear()
+        second = await async_client.get("/api/tasks/", headers={**self.auth_headers, "If-None-Match": etag})
+        assert second.status_code == status.HTTP_304_NOT_MODIFIED
+        assert second.headers["ETag"] == etag
+        assert second.content == b""
+        # Только чтение версии доски, без запросов за задачами
+        assert len(query_counter) == 1 and "max(change_seq)" in query_counter[0]
+
+    async def test_mutation_changes_etag(self, async_client: AsyncClient):
+        etag = (await async_client.get("/api/tasks/", headers=self.auth_headers)).headers["ETag"]
+        await async_client.post("/api/tasks/", headers=self.auth_headers, json={"title": "New card", "type": "testing"})
+
+        response = await async_client.get("/api/tasks/", headers={**self.auth_headers, "If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["ETag"] != etag
+        assert len(response.json()) == 1
+
+    async def test_etag_depends_on_query_and_user(self, async_client: AsyncClient):
+        all_tasks = await async_client.get("/api/tasks/", headers=self.auth_headers)
+        todo_tasks = await async_client.get("/api/tasks/", headers=self.auth_headers, params={"status": "todo"})
+        assert all_tasks.headers["ETag"] != todo_tasks.headers["ETag"]
+
+        await async_client.post(
+            "/api/users/",
+            json={"email": "etag2@example.com", "first_name": "Второй", "last_name": "Тест", "password": "password123"},
+        )
+        other_token = await get_auth_token(async_client, "etag2@example.com", "password123")
+        mine = await async_client.get("/api/users/me/tasks", headers=self.auth_headers)
+        others = await async_client.get("/api/users/me/tasks", headers={"Authorization": f"Bearer {other_token}"})
+        assert mine.headers["ETag"] != others.headers["ETag"]
+
+    async def test_users_list_etag_changes_on_new_user(self, async_client: AsyncClient):
+        etag = (await async_client.get("/api/users/", headers=self.auth_headers)).headers["ETag"]
+        await async_client.post(
+            "/api/users/",
+            json={"email": "etag3@example.com", "first_name": "Третий", "last_name": "Тест", "password": "password123"},
+        )
+        response = await async_client.get("/api/users/", headers={**self.auth_headers, "If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()) == 2
+
+    async def test_write_without_local_event_changes_etag(self, async_client: AsyncClient, db_session):
+        response = await async_client.post(
+            "/api/tasks/", headers=self.auth_headers, json={"title": "Other worker", "type": "testing"}
+        )
+        task_id = response.json()["id"]
+        urls = ["/api/tasks/", "/api/board", "/api/sync"]
+        etags = {url: (await async_client.get(url, headers=self.auth_headers)).headers["ETag"] for url in urls}
+
+        # Запись в другом воркере: событие до этого процесса не доходит, меняется только база
+        await db_session.execute(update(Task).where(Task.id == task_id).values(title="Renamed elsewhere"))
+        await db_session.commit()
+
+        for url, etag in etags.items():
+            response = await async_client.get(url, headers={**self.auth_headers, "If-None-Match": etag})
+            assert response.status_code == status.HTTP_200_OK, url
+        response = await async_client.get("/api/tasks/", headers=self.auth_headers)
+        assert response.json()[0]["title"] == "Renamed elsewhere"
@@ -0,0 +1,105 @@
+import json
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.config import settings
+from app.core.events import RESYNC_EVENT, EventBroker, broker
+from app.core.security import create_access_token
+from app.main import app
+from tests.test_tasks import get_auth_token
+
+
+def drain(subscription) -> list:
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return events
+
+
+class TestEventBroker:
+    """Тесты раздачи событий внутри процесса."""
+
+    async def test_fan_out_to_all_subscribers(self):
+        event_broker = EventBroker(max_queue_size=10)
+        first, second = event_broker.subscribe(), event_broker.subscribe()
+        await event_broker.publish({"type": "task.created", "id": 1})
+        assert drain(first) == drain(second) == [{"type": "task.created", "id": 1}]
+
+        event_broker.unsubscribe(second)
+        await event_broker.publish({"type": "task.deleted", "id": 1})
+        assert drain(second) == []
+
+    async def test_slow_subscriber_gets_resync(self):
+        event_broker = EventBroker(max_queue_size=3)
+        subscription = event_broker.subscribe()
+        for task_id in range(5):
+            await event_broker.publish({"type": "task.updated", "id": task_id})
+        assert drain(subscription) == [RESYNC_EVENT, {"type": "task.updated", "id": 4}]
+        assert subscription.dropped == 3
+
+    async def test_remote_events_skip_own_origin(self):
+        event_broker = EventBroker()
+        subscription = event_broker.subscribe()
+        event_broker._on_remote(json.dumps({"origin": event_broker.origin, "event": {"type": "task.created"}}))
+        event_broker._on_remote(json.dumps({"origin": "other-worker", "event": {"type": "task.deleted"}}))
+        assert drain(subscription) == [{"type": "task.deleted"}]
+
+
+class TestTaskEvents:
+    """Тесты событий, которые публикуют операции записи задач."""
+
+    @pytest.fixture(scope="function", autouse=True)
+    async def setup_subscription(self, async_client: AsyncClient):
+        response = await async_client.post(
+            "/api/users/",
+            json={"email": "events@example.com", "first_name": "Событие", "last_name": "Тест", "password": "password123"},
+        )
+        self.user_id = response.json()["id"]
+        token = await get_auth_token(async_client, "events@example.com", "password123")
+        self.auth_headers = {"Authorization": f"Bearer {token}"}
+        self.subscription = broker.subscribe()
+        yield
+        broker.unsubscribe(self.subscription)
+
+    async def test_task_lifecycle_events(self, async_client: AsyncClient):
+        response = await async_client.post(
+            "/api/tasks/",
+            headers=self.auth_headers,
+            json={"title": "Evented task", "type": "development", "assignee_ids": [self.user_id]},
+        )
+        task_id = response.json()["id"]
+        await async_client.put(f"/api/tasks/{task_id}", headers=self.auth_headers, json={"title": "Evented task 2"})
+        await async_client.put(f"/api/tasks/{task_id}", headers=self.auth_headers, json={"status": "done"})
+        await async_client.delete(f"/api/tasks/{task_id}", headers=self.auth_headers)
+
+        events = drain(self.subscription)
+        assert [(event["type"], event["id"]) for event in events] == [
+            ("task.created", task_id), ("task.updated", task_id), ("task.moved", task_id), ("task.deleted", task_id),
+        ]
+        assert events[1]["task"]["title"] == "Evented task 2"
+        assert events[2]["task"]["status"] == "done"
+        assert events[3]["task"] is None
+
+
+def test_board_websocket_streams_events(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_USER_CLAIMS", True)
+    token = create_access_token({
+        "sub": "ws@example.com", "uid": 1, "usr": {"first_name": "Веб", "last_name": "Сокет", "avatar_url": None},
+    })
+    event = {"type": "task.moved", "id": 7, "task": None}
+
+    with TestClient(app) as client:
+        with client.websocket_connect(f"/api/ws/board?token={token}") as websocket:
+            client.portal.call(broker.publish, event)
+            assert websocket.receive_json() == event
+
+
+def test_board_websocket_rejects_bad_token():
+    with TestClient(app) as client:
+        with pytest.raises(WebSocketDisconnect) as disconnect:
+            with client.websocket_connect("/api/ws/board?token=invalid") as websocket:
+                websocket.receive_json()
+    assert disconnect.value.code == status.WS_1008_POLICY_VIOLATION
@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+
+from app.schemas.task import ExportFormat
+from app.services import export as export_service
+from tests.test_tasks import get_auth_token
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestTaskExport:
+    """Потоковая выгрузка задач: один запрос на всю выгрузку, чтение порциями, фильтры как у списка."""
+
+    @pytest.fixture(scope="function", autouse=True)
+    async def setup_tasks(self, async_client: AsyncClient):
+        self.user_ids, self.headers = [], []
+        for first_name, last_name in [("Анна", "Иванова"), ("Борис", "Петров")]:
+            email = f"{last_name.lower()}@example.com"
+            response = await async_client.post(
+                "/api/users/", json={"email": email, "first_name": first_name, "last_name": last_name, "password": "password123"}
+            )
+            self.user_ids.append(response.json()["id"])
+            token = await get_auth_token(async_client, email, "password123")
+            self.headers.append({"Authorization": f"Bearer {token}"})
+        self.task_ids = []
+        for i, assignee_ids in enumerate([self.user_ids, [self.user_ids[1]], []]):
+            response = await async_client.post(
+                "/api/tasks/", headers=self.headers[0],
+                json={"title": f"Export {i}", "description": "a, \"quoted\"\nline", "type": "development",
+                      "assignee_ids": assignee_ids},
+            )
+            self.task_ids.append(response.json()["id"])
+
+    async def test_csv(self, async_client: AsyncClient, query_counter):
+        query_counter.clear()
+        response = await async_client.get("/api/tasks/export", headers=self.headers[0], params={"sort": "oldest"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="tasks.csv"' in response.headers["content-disposition"]
+        # Имена исполнителей собираются в том же запросе, что и задачи
+        assert len([q for q in query_counter if "FROM tasks" in q]) == 1
+
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [int(row["id"]) for row in rows] == self.task_ids
+        assert rows[0]["description"] == "a, \"quoted\"\nline"
+        assert (rows[0]["status"], rows[0]["type"], rows[0]["creator"]) == ("todo", "development", "Анна Иванова")
+        assert set(rows[0]["assignees"].split(", ")) == {"Анна Иванова", "Борис Петров"}
+        assert rows[1]["assignees"] == "Борис Петров"
+        assert rows[2]["assignees"] == ""
+
+    async def test_ndjson_with_filters(self, async_client: AsyncClient):
+        await async_client.put(f"/api/tasks/{self.task_ids[1]}", headers=self.headers[1], json={"status": "done"})
+        response = await async_client.get(
+            "/api/tasks/export", headers=self.headers[0],
+            params={"format": "ndjson", "status": "todo", "assignee_id": self.user_ids[1]},
+        )
+        assert response.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["id"] for row in rows] == [self.task_ids[0]]
+        assert rows[0]["time_spent"] == 0
+
+        # Задача без исполнителей: пустая строка, как и в CSV, а не null
+        response = await async_client.get(
+            "/api/tasks/export", headers=self.headers[0], params={"format": "ndjson", "sort": "oldest"}
+        )
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert rows[2]["assignees"] == ""
+
+        response = await async_client.get(
+            "/api/tasks/export", headers=self.headers[0], params={"q": "no such task"}
+        )
+        assert response.text.splitlines() == [
+            "id,title,description,type,status,priority,time_spent,created_at,creator,assignees"
+        ]
+
+    async def test_csv_escapes_formulas(self, async_client: AsyncClient):
+        for title in ['=HYPERLINK("http://evil")', "+1 day", "-1 day", "@SUM(A1)", "\tcmd"]:
+            await async_client.put(f"/api/tasks/{self.task_ids[0]}", headers=self.headers[0], json={"title": title})
+            response = await async_client.get("/api/tasks/export", headers=self.headers[0], params={"sort": "oldest"})
+            rows = list(csv.DictReader(io.StringIO(response.text)))
+            assert rows[0]["title"] == "'" + title
+
+            # В NDJSON значения не меняются
+            response = await async_client.get(
+                "/api/tasks/export", headers=self.headers[0], params={"format": "ndjson", "sort": "oldest"}
+            )
+            assert json.loads(response.text.splitlines()[0])["title"] == title
+
+    async def test_time_report(self, async_client: AsyncClient):
+        for headers, hours in [(self.headers[0], 1.5), (self.headers[1], 2), (self.headers[0], 0.5)]:
+            await async_client.post(f"/api/tasks/{self.task_ids[0]}/time", headers=headers, json={"hours": hours})
+        response = await async_client.get(
+            "/api/tasks/export", headers=self.headers[0], params={"format": "ndjson", "report": "time"}
+        )
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [(row["task_id"], row["user"], row["hours"]) for row in rows] == [
+            (self.task_ids[0], "Анна Иванова", 2.0), (self.task_ids[0], "Борис Петров", 2.0),
+        ]
+
+    async def test_rows_are_streamed_in_batches(self, db_session, monkeypatch):
+        monkeypatch.setattr(export_service.settings, "EXPORT_BATCH_SIZE", 2)
+        chunks = [chunk async for chunk in export_service.export_tasks(db_session, ExportFormat.ndjson)]
+        assert [chunk.count(b"\n") for chunk in chunks] == [2, 1]
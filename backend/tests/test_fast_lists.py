@@ -0,0 +1,110 @@
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+
+from app.core.config import settings
+from app.schemas.task import TaskListNormalized
+from tests.test_tasks import get_auth_token
+
+pytestmark = pytest.mark.asyncio
+
+
+def data_queries(statements):
+    # Чтение версии доски для ETag не считается: оно одно на запрос при любом пути сериализации
+    return [
+        statement for statement in statements
+        if statement.lstrip().upper().startswith("SELECT") and "max(change_seq)" not in statement
+    ]
+
+
+class TestFastTaskLists:
+    """Быстрый путь списков задач должен отдавать то же, что и путь через TaskOut."""
+
+    @pytest.fixture(scope="function", autouse=True)
+    async def setup_tasks(self, async_client: AsyncClient):
+        user_ids = []
+        for i in range(3):
+            response = await async_client.post(
+                "/api/users/",
+                json={"email": f"fast{i}@example.com", "first_name": "Быстрый", "last_name": f"Тест{i}",
+                      "password": "password123"},
+            )
+            user_ids.append(response.json()["id"])
+        token = await get_auth_token(async_client, "fast0@example.com", "password123")
+        self.auth_headers = {"Authorization": f"Bearer {token}"}
+        for i in range(7):
+            await async_client.post(
+                "/api/tasks/",
+                headers=self.auth_headers,
+                json={"title": f"Task {i}", "type": "development", "priority": ["high", "low", "medium"][i % 3],
+                      "assignee_ids": user_ids[1:1 + i % 3]},
+            )
+
+    async def fetch_pages(self, async_client: AsyncClient, path: str, fast: bool, monkeypatch, **params):
+        monkeypatch.setattr(settings, "FAST_TASK_LISTS", fast)
+        pages, cursor = [], None
+        while True:
+            query = {**params, "limit": 3, **({"cursor": cursor} if cursor else {})}
+            response = await async_client.get(path, headers=self.auth_headers, params=query)
+            assert response.status_code == status.HTTP_200_OK
+            tasks = response.json()
+            for task in tasks:
+                task["assignees"].sort(key=lambda user: user["id"])
+            pages.append(tasks)
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return pages
+
+    @pytest.mark.parametrize("sort", ["priority", "newest", "oldest"])
+    async def test_same_pages_as_model_path(self, async_client: AsyncClient, monkeypatch, sort):
+        for path in ("/api/tasks/", "/api/users/me/tasks"):
+            expected = await self.fetch_pages(async_client, path, False, monkeypatch, sort=sort)
+            actual = await self.fetch_pages(async_client, path, True, monkeypatch, sort=sort)
+            assert actual == expected
+        assert sum(len(page) for page in expected) == 7
+
+    async def test_filters_and_query_count(self, async_client: AsyncClient, monkeypatch, query_counter):
+        expected = await self.fetch_pages(async_client, "/api/tasks/", False, monkeypatch, priority="high", q="Task")
+        actual = await self.fetch_pages(async_client, "/api/tasks/", True, monkeypatch, priority="high", q="Task")
+        assert actual == expected
+
+        query_counter.clear()
+        response = await async_client.get("/api/tasks/", headers=self.auth_headers, params={"limit": 50})
+        assert len(response.json()) == 7
+        assert "ETag" in response.headers
+        # Задачи с создателем одним JOIN и исполнители одним запросом
+        assert len(data_queries(query_counter)) == 2
+
+    async def test_normalized_shape(self, async_client: AsyncClient, monkeypatch, query_counter):
+        expected = await self.fetch_pages(async_client, "/api/users/me/tasks", False, monkeypatch, sort="newest")
+        full = [task for page in expected for task in page]
+
+        query_counter.clear()
+        response = await async_client.get(
+            "/api/users/me/tasks", headers=self.auth_headers, params={"sort": "newest", "shape": "normalized"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        # Задачи, связи с исполнителями и пользователи — по одному запросу
+        assert len(data_queries(query_counter)) == 3
+        payload = TaskListNormalized.model_validate(response.json())
+        assert sorted(payload.users) == [1, 2, 3]
+
+        inflated = []
+        for task in response.json()["tasks"]:
+            users = response.json()["users"]
+            creator_id, assignee_ids = task.pop("creator_id"), task.pop("assignee_ids")
+            task["creator"] = users[str(creator_id)]
+            task["assignees"] = sorted((users[str(user_id)] for user_id in assignee_ids), key=lambda user: user["id"])
+            inflated.append(task)
+        assert inflated == full
+
+    async def test_normalized_shape_paginates(self, async_client: AsyncClient):
+        seen, cursor = [], None
+        while True:
+            params = {"shape": "normalized", "limit": 3, **({"cursor": cursor} if cursor else {})}
+            response = await async_client.get("/api/tasks/", headers=self.auth_headers, params=params)
+            seen.extend(task["id"] for task in response.json()["tasks"])
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert sorted(seen) == list(range(1, 8))
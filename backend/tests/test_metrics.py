@@ -0,0 +1,162 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+
+from app.core.config import settings
+from app.core import instrumentation
+from app.core.metrics import Histogram, MetricsRegistry, counter, gauge
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.session import InstrumentedQueuePool, engine_options
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestMetrics:
+    """Тесты эндпоинта /metrics и формата Prometheus."""
+
+    async def test_metrics_endpoint_exposes_runtime_stats(self, async_client: AsyncClient):
+        response = await async_client.get("/metrics")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE kanban_password_hash_in_flight gauge" in response.text
+        assert "kanban_auth_cache_hits_total" in response.text
+        assert "kanban_events_subscribers" in response.text
+
+    async def test_render_format(self):
+        registry = MetricsRegistry()
+        registry.register(lambda: [
+            gauge("test_gauge", "A gauge", 2, route='/a"b'),
+            counter("test_total", "A counter", 5),
+        ])
+        assert registry.render() == (
+            "# HELP test_gauge A gauge\n"
+            "# TYPE test_gauge gauge\n"
+            'test_gauge{route="/a\\"b"} 2\n'
+            "# HELP test_total A counter\n"
+            "# TYPE test_total counter\n"
+            "test_total 5\n"
+        )
+
+    async def test_histogram_render(self):
+        registry = MetricsRegistry()
+        histogram = Histogram("test_seconds", "A histogram", buckets=(0.1, 1))
+        registry.register(histogram.collect)
+        for value in (0.05, 0.1, 3):
+            histogram.observe(value, route="/a")
+        assert registry.render() == (
+            "# HELP test_seconds A histogram\n"
+            "# TYPE test_seconds histogram\n"
+            'test_seconds_bucket{le="0.1",route="/a"} 2\n'
+            'test_seconds_bucket{le="1",route="/a"} 2\n'
+            'test_seconds_bucket{le="+Inf",route="/a"} 3\n'
+            'test_seconds_sum{route="/a"} 3.15\n'
+            'test_seconds_count{route="/a"} 3\n'
+        )
+
+
+class TestRequestMetrics:
+    """Тесты middleware с метриками HTTP-запросов и запросов к БД."""
+
+    @pytest.fixture(scope="function", autouse=True)
+    def instrument_test_engine(self):
+        from tests.conftest import engine
+        instrumentation.instrument_engine(engine)
+        for histogram in (instrumentation.request_duration, instrumentation.request_queries):
+            histogram.clear()
+
+    async def test_route_latency_and_query_counts(self, async_client: AsyncClient):
+        await async_client.post(
+            "/api/users/",
+            json={"email": "metrics@example.com", "first_name": "Метрика", "last_name": "Тест", "password": "password123"},
+        )
+        response = await async_client.get("/api/tasks/999")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        metrics = (await async_client.get("/metrics")).text
+        assert 'kanban_http_request_duration_seconds_count{method="POST",route="/api/users/",status="2xx"} 1' in metrics
+        assert 'kanban_http_request_duration_seconds_count{method="GET",route="/api/tasks/{task_id}",status="4xx"} 1' in metrics
+        # Создание пользователя: проверка email, INSERT и refresh
+        assert 'kanban_http_request_db_queries_sum{route="/api/users/"} 3' in metrics
+        assert 'kanban_http_request_db_queries_sum{route="/api/tasks/{task_id}"} 0' in metrics
+
+    async def test_slow_request_log_includes_sql(self, async_client: AsyncClient, monkeypatch):
+        logged = []
+        monkeypatch.setattr(settings, "SLOW_REQUEST_SECONDS", 1e-9)
+        monkeypatch.setattr(instrumentation.logger, "warning", lambda message, *args: logged.append(message % args))
+
+        await async_client.post(
+            "/api/users/",
+            json={"email": "slow@example.com", "first_name": "Медленный", "last_name": "Тест", "password": "password123"},
+        )
+        assert len(logged) == 1
+        assert logged[0].startswith("Slow request POST /api/users/")
+        assert "3 queries" in logged[0]
+        assert "INSERT INTO users" in logged[0]
+
+    async def test_failed_query_leaves_no_state_on_connection(self):
+        test_engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        instrumentation.instrument_engine(test_engine)
+        async with test_engine.connect() as conn:
+            with pytest.raises(Exception):
+                await conn.execute(text("SELECT * FROM missing_table"))
+            await conn.execute(text("SELECT 1"))
+            raw = await conn.get_raw_connection()
+            assert "query_started" not in raw.info
+        await test_engine.dispose()
+
+
+class TestEngineOptions:
+    """Тесты параметров engine из настроек."""
+
+    async def test_sqlite_uses_default_pool(self):
+        assert engine_options("sqlite+aiosqlite:///:memory:") == {"echo": False}
+
+    async def test_postgres_pool_and_pgbouncer_mode(self, monkeypatch):
+        options = engine_options("postgresql+asyncpg://user:pass@db/kanban")
+        assert options["pool_size"] == settings.DB_POOL_SIZE
+        assert options["pool_pre_ping"] is True
+        assert options["connect_args"] == {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+
+        monkeypatch.setattr(settings, "DB_PGBOUNCER_MODE", True)
+        connect_args = engine_options("postgresql+asyncpg://user:pass@db/kanban")["connect_args"]
+        assert connect_args["statement_cache_size"] == 0
+        assert connect_args["prepared_statement_cache_size"] == 0
+        assert connect_args["prepared_statement_name_func"]() != connect_args["prepared_statement_name_func"]()
+
+    async def test_instrumented_pool_counts_checkouts(self, tmp_path):
+        test_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool, pool_size=1
+        )
+        for _ in range(3):
+            async with test_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        pool = test_engine.pool
+        assert pool.checkouts == 3
+        assert pool.checkedout() == 0
+        # Открытие соединения и выдача свободного — не ожидание
+        assert pool.wait_seconds_total == 0
+        await test_engine.dispose()
+
+    async def test_instrumented_pool_measures_only_waiting(self, tmp_path):
+        test_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0
+        )
+
+        async def hold():
+            async with test_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                await asyncio.sleep(0.05)
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        async with test_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        await holder
+        pool = test_engine.pool
+        assert pool.checkouts == 2
+        assert 0.02 <= pool.wait_seconds_total == pool.max_wait_seconds
+        await test_engine.dispose()
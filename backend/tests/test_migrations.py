@@ -0,0 +1,124 @@
+import os
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import (
+    Column, DateTime, Enum, Float, ForeignKey, Integer, MetaData, String, Table, create_engine, inspect, select, text,
+)
+
+from app.db.session import Base
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Модели до перехода на Alembic: такую схему строил create_all в уже работающих базах
+baseline = MetaData()
+Table(
+    "users", baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("first_name", String, index=True),
+    Column("last_name", String, index=True),
+    Column("email", String, unique=True, index=True, nullable=False),
+    Column("hashed_password", String, nullable=False),
+    Column("avatar_url", String, nullable=True),
+)
+Table(
+    "tasks", baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String, index=True),
+    Column("description", String),
+    Column("status", Enum("todo", "in_progress", "done", name="taskstatus")),
+    Column("type", Enum("development", "analytics", "documentation", "testing", name="tasktype")),
+    Column("priority", String, nullable=False, index=True),
+    Column("time_spent", Float),
+    Column("created_at", DateTime, nullable=False),
+    Column("creator_id", Integer, ForeignKey("users.id"), nullable=False),
+)
+Table(
+    "task_assignees", baseline,
+    Column("task_id", Integer, ForeignKey("tasks.id"), primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+)
+
+
+def alembic_config(database_path) -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", f"sqlite+aiosqlite:///{database_path}")
+    config.attributes["configure_logger"] = False
+    return config
+
+
+class TestMigrations:
+    """Миграции должны создавать ту же схему, что описана в моделях."""
+
+    def test_upgrade_matches_models_and_downgrades(self, tmp_path):
+        database_path = tmp_path / "migrations.db"
+        config = alembic_config(database_path)
+        command.upgrade(config, "head")
+
+        engine = create_engine(f"sqlite:///{database_path}")
+        try:
+            with engine.connect() as connection:
+                context = MigrationContext.configure(connection)
+                assert compare_metadata(context, Base.metadata) == []
+                indexes = {index["name"] for index in inspect(connection).get_indexes("task_assignees")}
+                assert "ix_task_assignees_user_id_task_id" in indexes
+
+            command.downgrade(config, "base")
+            with engine.connect() as connection:
+                assert inspect(connection).get_table_names() == ["alembic_version"]
+        finally:
+            engine.dispose()
+
+    def test_baseline_revision_matches_create_all_schema(self, tmp_path):
+        database_path = tmp_path / "baseline.db"
+        command.upgrade(alembic_config(database_path), "0001")
+        engine = create_engine(f"sqlite:///{database_path}")
+        try:
+            with engine.connect() as connection:
+                assert compare_metadata(MigrationContext.configure(connection), baseline) == []
+        finally:
+            engine.dispose()
+
+    def test_upgrade_database_created_by_create_all(self, tmp_path):
+        database_path = tmp_path / "legacy.db"
+        engine = create_engine(f"sqlite:///{database_path}")
+        try:
+            with engine.begin() as connection:
+                baseline.create_all(connection)
+                connection.execute(text(
+                    "INSERT INTO users (id, email, hashed_password) VALUES (1, 'a@example.com', 'x'), "
+                    "(2, 'b@example.com', 'x')"
+                ))
+                connection.execute(text(
+                    "INSERT INTO tasks (id, title, status, type, priority, time_spent, created_at, creator_id) VALUES "
+                    "(1, 'Low', 'todo', 'testing', 'low', 0, '2024-01-01', 1), "
+                    "(2, 'High', 'todo', 'testing', 'high', 0, '2024-01-02', 1), "
+                    "(3, 'Odd', 'done', 'testing', 'urgent', 0, '2024-01-03', 2)"
+                ))
+
+            config = alembic_config(database_path)
+            command.stamp(config, "0001")
+            command.upgrade(config, "head")
+
+            with engine.connect() as connection:
+                assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+                tasks = Base.metadata.tables["tasks"]
+                rows = connection.execute(
+                    select(tasks.c.id, tasks.c.priority_rank, tasks.c.change_seq, tasks.c.updated_at, tasks.c.position)
+                    .order_by(tasks.c.id)
+                ).all()
+                assert [row.priority_rank for row in rows] == [2, 0, 3]
+                users = Base.metadata.tables["users"]
+                user_seqs = connection.execute(select(users.c.change_seq)).scalars().all()
+                seqs = user_seqs + [row.change_seq for row in rows]
+                assert len(set(seqs)) == len(seqs) and None not in seqs
+                assert all(row.updated_at is not None for row in rows)
+                # Карточки колонки todo расставлены в порядке доски: сначала высокий приоритет
+                todo = {row.id: row.position for row in rows if row.id != 3}
+                assert todo[2] < todo[1]
+                indexes = {index["name"] for index in inspect(connection).get_indexes("tasks")}
+                assert {"ix_tasks_creator_id", "ix_tasks_status", "ix_tasks_priority_rank_created_at_id"} <= indexes
+        finally:
+            engine.dispose()
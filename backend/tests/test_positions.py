@@ -0,0 +1,153 @@
+import random
+
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+from sqlalchemy import select, update
+
+from app.core.ranking import rank_between, spread_ranks
+from app.models.task import Task, TaskStatus
+from app.services import tasks as tasks_service
+from tests.test_tasks import get_auth_token
+
+
+class TestRanks:
+    def test_rank_between_keeps_order(self):
+        rng = random.Random(7)
+        ranks = [rank_between(None, None)]
+        for _ in range(2000):
+            index = rng.randint(0, len(ranks))
+            lower = ranks[index - 1] if index > 0 else None
+            upper = ranks[index] if index < len(ranks) else None
+            rank = rank_between(lower, upper)
+            assert (lower is None or lower < rank) and (upper is None or rank < upper)
+            assert not rank.endswith("0")
+            ranks.insert(index, rank)
+        with pytest.raises(ValueError):
+            rank_between("b", "a")
+
+    @pytest.mark.parametrize("count", [1, 2, 17, 36, 1000])
+    def test_spread_ranks_sorted_and_short(self, count):
+        ranks = spread_ranks(count)
+        assert ranks == sorted(set(ranks))
+        assert max(map(len, ranks)) <= 3
+        assert all(rank and not rank.endswith("0") for rank in ranks)
+
+
+@pytest.mark.asyncio
+class TestMoveEndpoint:
+    """Ручной порядок карточек: перенос пишет одну строку, колонки перебалансируются."""
+
+    @pytest.fixture(scope="function", autouse=True)
+    async def setup_tasks(self, async_client: AsyncClient):
+        self.user_ids, self.headers = [], []
+        for i in range(2):
+            email = f"mover{i}@example.com"
+            response = await async_client.post(
+                "/api/users/", json={"email": email, "first_name": "Перенос", "last_name": f"Тест{i}", "password": "password123"}
+            )
+            self.user_ids.append(response.json()["id"])
+            token = await get_auth_token(async_client, email, "password123")
+            self.headers.append({"Authorization": f"Bearer {token}"})
+        self.task_ids = []
+        for i in range(4):
+            response = await async_client.post(
+                "/api/tasks/", headers=self.headers[0],
+                json={"title": f"Card {i}", "type": "development", "assignee_ids": [self.user_ids[0]]},
+            )
+            self.task_ids.append(response.json()["id"])
+
+    async def column(self, async_client: AsyncClient, task_status: str = "todo") -> list:
+        response = await async_client.get(
+            "/api/tasks/", headers=self.headers[0], params={"sort": "position", "status": task_status}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        return [task["id"] for task in response.json()]
+
+    async def move(self, async_client: AsyncClient, task_id: int, user: int = 0, **placement):
+        return await async_client.post(f"/api/tasks/{task_id}/move", headers=self.headers[user], json=placement)
+
+    async def test_new_cards_append_to_column(self, async_client: AsyncClient):
+        assert await self.column(async_client) == self.task_ids
+
+    async def test_move_between_neighbours_updates_one_row(self, async_client: AsyncClient, query_counter):
+        first, second, third, fourth = self.task_ids
+        query_counter.clear()
+        response = await self.move(async_client, fourth, after_id=first, before_id=second)
+        assert response.status_code == status.HTTP_200_OK
+        assert [q for q in query_counter if q.startswith("UPDATE")] == [
+            q for q in query_counter if q.startswith("UPDATE tasks SET")
+        ]
+        assert len([q for q in query_counter if q.startswith("UPDATE")]) == 1
+        assert await self.column(async_client) == [first, fourth, second, third]
+
+    async def test_single_neighbour_and_column_end(self, async_client: AsyncClient):
+        first, second, third, fourth = self.task_ids
+        assert (await self.move(async_client, first, after_id=second)).status_code == status.HTTP_200_OK
+        assert await self.column(async_client) == [second, first, third, fourth]
+        assert (await self.move(async_client, fourth, before_id=second)).status_code == status.HTTP_200_OK
+        assert await self.column(async_client) == [fourth, second, first, third]
+        assert (await self.move(async_client, fourth)).status_code == status.HTTP_200_OK
+        assert await self.column(async_client) == [second, first, third, fourth]
+
+    async def test_move_to_other_column(self, async_client: AsyncClient):
+        first, second, third, _ = self.task_ids
+        response = await self.move(async_client, second, status="in_progress")
+        assert response.json()["status"] == "in_progress"
+        response = await self.move(async_client, third, status="in_progress", before_id=second)
+        assert response.status_code == status.HTTP_200_OK
+        assert await self.column(async_client, "in_progress") == [third, second]
+
+        # Чужую карточку в другую колонку не перенести, в своей колонке — можно
+        assert (await self.move(async_client, first, user=1, status="done")).status_code == status.HTTP_403_FORBIDDEN
+        assert (await self.move(async_client, first, user=1)).status_code == status.HTTP_200_OK
+
+    async def test_invalid_neighbours(self, async_client: AsyncClient):
+        first, second, third, _ = self.task_ids
+        await self.move(async_client, second, status="done")
+        response = await self.move(async_client, first, after_id=second)
+        assert response.status_code == status.HTTP_409_CONFLICT
+        response = await self.move(async_client, first, after_id=third, before_id=third)
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert (await self.move(async_client, first, after_id=999999)).status_code == status.HTTP_404_NOT_FOUND
+        assert (await self.move(async_client, first, after_id=first)).status_code == status.HTTP_400_BAD_REQUEST
+        assert (await self.move(async_client, 999999)).status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_equal_neighbour_keys_are_rebalanced(self, async_client: AsyncClient, db_session):
+        first, second, third, fourth = self.task_ids
+        # Одновременные вставки в конец колонки могли получить один и тот же ключ
+        position = (await db_session.execute(select(Task.position).where(Task.id == second))).scalar()
+        await db_session.execute(update(Task).where(Task.id == third).values(position=position))
+        await db_session.commit()
+
+        response = await self.move(async_client, fourth, after_id=second, before_id=third)
+        assert response.status_code == status.HTTP_200_OK
+        assert await self.column(async_client) == [first, second, fourth, third]
+        response = await async_client.get("/api/tasks/", headers=self.headers[0], params={"sort": "position"})
+        assert len({task["position"] for task in response.json()}) == 4
+
+    async def test_long_keys_are_rebalanced(self, async_client: AsyncClient, db_session, monkeypatch):
+        monkeypatch.setattr(tasks_service, "pending_rebalance", set())
+        monkeypatch.setattr(tasks_service.settings, "POSITION_REBALANCE_LENGTH", 4)
+        first, second, third, _ = self.task_ids
+        # Каждый перенос вплотную под first удлиняет ключ
+        for _ in range(20):
+            moved = second if (await self.column(async_client))[1] == third else third
+            await self.move(async_client, moved, after_id=first)
+        order = await self.column(async_client)
+        assert tasks_service.pending_rebalance == {TaskStatus.todo}
+
+        assert await tasks_service.rebalance_pending_columns(db_session) == 1
+        assert tasks_service.pending_rebalance == set()
+        assert await self.column(async_client) == order
+        response = await async_client.get("/api/tasks/", headers=self.headers[0], params={"sort": "position"})
+        assert max(len(task["position"]) for task in response.json()) == 1
+
+    async def test_batch_move_appends_to_target_column(self, async_client: AsyncClient):
+        first, second, _, _ = self.task_ids
+        response = await async_client.post(
+            "/api/tasks/batch", headers=self.headers[0],
+            json={"move": [{"id": second, "status": "done"}, {"id": first, "status": "done"}]},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert await self.column(async_client, "done") == [second, first]
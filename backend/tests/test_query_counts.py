@@ -0,0 +1,122 @@
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+
+from app.services import tasks as tasks_service
+from tests.test_tasks import get_auth_token
+
+pytestmark = pytest.mark.asyncio
+
+
+def data_queries(statements: list) -> list:
+    """SQL-запросы без служебных BEGIN/COMMIT/ROLLBACK."""
+    return [statement for statement in statements if statement.split()[0] in ("SELECT", "INSERT", "UPDATE", "DELETE")]
+
+
+class TestWriteQueryCounts:
+    """Бюджеты запросов для эндпоинтов записи: ответ строится без повторной загрузки задачи."""
+
+    @pytest.fixture(scope="function", autouse=True)
+    async def setup_users_and_token(self, async_client: AsyncClient):
+        response = await async_client.post(
+            "/api/users/",
+            json={"email": "queries@example.com", "first_name": "Запрос", "last_name": "Счетчик", "password": "password123"},
+        )
+        self.user_id = response.json()["id"]
+        token = await get_auth_token(async_client, "queries@example.com", "password123")
+        self.auth_headers = {"Authorization": f"Bearer {token}"}
+        # Прогреваем кэш аутентификации, чтобы не учитывать его запрос
+        await async_client.get("/api/users/me", headers=self.auth_headers)
+
+    async def create_task(self, async_client: AsyncClient) -> dict:
+        response = await async_client.post(
+            "/api/tasks/",
+            headers=self.auth_headers,
+            json={"title": "Counted task", "type": "development", "assignee_ids": [self.user_id]},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        return response.json()
+
+    async def test_create_task_query_budget(self, async_client: AsyncClient, query_counter):
+        task = await self.create_task(async_client)
+        assert task["creator"]["id"] == self.user_id
+        assert [assignee["id"] for assignee in task["assignees"]] == [self.user_id]
+        # SELECT users, SELECT max(position) колонки, INSERT tasks, INSERT task_assignees
+        assert len(data_queries(query_counter)) == 4
+
+    async def test_update_task_query_budget(self, async_client: AsyncClient, query_counter):
+        task = await self.create_task(async_client)
+        query_counter.clear()
+
+        response = await async_client.put(
+            f"/api/tasks/{task['id']}", headers=self.auth_headers, json={"status": "in_progress", "title": "Renamed"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["status"] == "in_progress"
+        assert response.json()["title"] == "Renamed"
+        # SELECT tasks JOIN users, SELECT assignees, SELECT max(position) новой колонки, UPDATE tasks
+        assert len(data_queries(query_counter)) == 4
+
+    async def test_delete_task_query_budget(self, async_client: AsyncClient, query_counter):
+        task = await self.create_task(async_client)
+        query_counter.clear()
+
+        response = await async_client.delete(f"/api/tasks/{task['id']}", headers=self.auth_headers)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        # DELETE task_assignees, DELETE tasks ... RETURNING, INSERT tombstones
+        assert len(data_queries(query_counter)) == 3
+
+    async def test_log_time_query_budget(self, async_client: AsyncClient, db_session, query_counter):
+        task = await self.create_task(async_client)
+        query_counter.clear()
+
+        task_out = await tasks_service.log_time_for_task(db_session, task_id=task["id"], time_to_add=1.5)
+        assert task_out.time_spent == 1.5
+        assert task_out.assignees[0].id == self.user_id
+        # UPDATE ... RETURNING и загрузка связей (создатель может уже быть в identity map)
+        assert len(data_queries(query_counter)) <= 3
+
+
+class TestAssigneeLoading:
+    """Исполнители проверяются и загружаются одним запросом к users, без N+1."""
+
+    @pytest.fixture(scope="function", autouse=True)
+    async def setup_users_and_token(self, async_client: AsyncClient):
+        self.user_ids = []
+        for index in range(5):
+            response = await async_client.post(
+                "/api/users/",
+                json={"email": f"assignee{index}@example.com", "first_name": "Исполнитель", "last_name": f"Номер{index}", "password": "password123"},
+            )
+            self.user_ids.append(response.json()["id"])
+        token = await get_auth_token(async_client, "assignee0@example.com", "password123")
+        self.auth_headers = {"Authorization": f"Bearer {token}"}
+        await async_client.get("/api/users/me", headers=self.auth_headers)
+        response = await async_client.post(
+            "/api/tasks/", headers=self.auth_headers, json={"title": "Reassigned", "type": "development"}
+        )
+        self.task_id = response.json()["id"]
+
+    async def test_reassign_many_users_single_users_query(self, async_client: AsyncClient, query_counter):
+        query_counter.clear()
+        response = await async_client.put(
+            f"/api/tasks/{self.task_id}", headers=self.auth_headers, json={"assignee_ids": self.user_ids}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert [assignee["id"] for assignee in response.json()["assignees"]] == self.user_ids
+        user_queries = [q for q in data_queries(query_counter) if q.startswith("SELECT") and "FROM users" in q and "WHERE users.id IN" in q]
+        assert len(user_queries) == 1
+
+    async def test_missing_assignees_reported_together(self, async_client: AsyncClient):
+        missing = [999998, 999999]
+        response = await async_client.put(
+            f"/api/tasks/{self.task_id}", headers=self.auth_headers, json={"assignee_ids": [self.user_ids[1], *missing]}
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json()["detail"] == f"Users not found: {missing}"
+
+        response = await async_client.post(
+            "/api/tasks/", headers=self.auth_headers, json={"title": "Broken", "type": "development", "assignee_ids": missing}
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json()["detail"] == f"Users not found: {missing}"
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+
+from app.core.singleflight import SingleFlight, read_flights
+from tests.test_tasks import get_auth_token
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestSingleFlight:
+    async def test_concurrent_calls_share_one_execution(self):
+        flights = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        results = await asyncio.gather(*(flights.do("key", work) for _ in range(5)))
+        assert results == [1] * 5
+        assert (flights.executed, flights.shared, flights.in_flight) == (1, 4, 0)
+        # Завершенный вызов не кэшируется
+        assert await flights.do("key", work) == 2
+
+    async def test_exception_reaches_every_caller(self):
+        flights = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(flights.do("key", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+
+    async def test_cancelled_leader_does_not_fail_waiters(self):
+        flights = SingleFlight()
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+
+        async def fast():
+            return "own result"
+
+        leader = asyncio.create_task(flights.do("key", slow))
+        await started.wait()
+        waiter = asyncio.create_task(flights.do("key", fast))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await waiter == "own result"
+
+
+class TestCoalescedReads:
+    """Одновременные одинаковые чтения выполняют запросы к БД один раз."""
+
+    @pytest.fixture(scope="function", autouse=True)
+    async def setup_tasks(self, async_client: AsyncClient):
+        response = await async_client.post(
+            "/api/users/",
+            json={"email": "herd@example.com", "first_name": "Стадо", "last_name": "Запросов", "password": "password123"},
+        )
+        user_id = response.json()["id"]
+        token = await get_auth_token(async_client, "herd@example.com", "password123")
+        self.auth_headers = {"Authorization": f"Bearer {token}"}
+        for i in range(3):
+            await async_client.post(
+                "/api/tasks/", headers=self.auth_headers,
+                json={"title": f"Herd {i}", "type": "development", "assignee_ids": [user_id]},
+            )
+        await async_client.get("/api/users/me", headers=self.auth_headers)
+
+    async def test_concurrent_task_lists_run_one_query(self, async_client: AsyncClient, query_counter):
+        query_counter.clear()
+        single = await async_client.get("/api/tasks/", headers=self.auth_headers)
+        queries_per_request = len(query_counter)
+
+        query_counter.clear()
+        executed = read_flights.executed
+        responses = await asyncio.gather(
+            *(async_client.get("/api/tasks/", headers=self.auth_headers) for _ in range(10))
+        )
+        assert all(response.status_code == status.HTTP_200_OK for response in responses)
+        assert all(response.json() == single.json() for response in responses)
+        # Версию доски каждый запрос читает сам, а список строится один раз на всех
+        version_reads = [q for q in query_counter if "max(change_seq)" in q]
+        assert len(version_reads) == 10
+        assert len(query_counter) - len(version_reads) == queries_per_request - 1
+        assert read_flights.executed == executed + 1
+
+    async def test_authorization_checked_per_caller(self, async_client: AsyncClient):
+        responses = await asyncio.gather(
+            async_client.get("/api/tasks/", headers=self.auth_headers),
+            async_client.get("/api/tasks/"),
+            async_client.get("/api/board", headers={"Authorization": "Bearer invalid"}),
+            async_client.get("/api/board", headers=self.auth_headers),
+        )
+        assert [response.status_code for response in responses] == [200, 401, 401, 200]
+        assert sum(column["count"] for column in responses[3].json()["columns"]) == 3
+
+    async def test_read_after_write_not_joined_to_older_read(self, async_client: AsyncClient):
+        before = await async_client.get("/api/tasks/", headers=self.auth_headers)
+        await async_client.post(
+            "/api/tasks/", headers=self.auth_headers, json={"title": "Fresh", "type": "development"}
+        )
+        after = await async_client.get("/api/tasks/", headers=self.auth_headers)
+        assert len(after.json()) == len(before.json()) + 1
@@ -0,0 +1,199 @@
+import asyncio
+import os
+
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base
+from app.models.change import Tombstone, latest_change_seq, next_change_seq
+from app.models.task import Task
+from app.models.user import User
+from app.services import tasks as tasks_service
+from app.services.sync import get_changes
+from tests.test_tasks import get_auth_token
+
+
+@pytest.mark.asyncio
+class TestDeltaSync:
+    """Тесты дельта-синхронизации /sync."""
+
+    @pytest.fixture(scope="function", autouse=True)
+    async def setup_user_and_token(self, async_client: AsyncClient):
+        user_response = await async_client.post(
+            "/api/users/",
+            json={"email": "sync@example.com", "first_name": "Синк", "last_name": "Тест", "password": "password123"},
+        )
+        self.user_id = user_response.json()["id"]
+        token = await get_auth_token(async_client, "sync@example.com", "password123")
+        self.auth_headers = {"Authorization": f"Bearer {token}"}
+
+    async def create_task(self, async_client: AsyncClient, title: str) -> dict:
+        response = await async_client.post(
+            "/api/tasks/", headers=self.auth_headers, json={"title": title, "type": "development"}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        return response.json()
+
+    async def sync(self, async_client: AsyncClient, since: int, **params) -> dict:
+        response = await async_client.get("/api/sync", headers=self.auth_headers, params={"since": since, **params})
+        assert response.status_code == status.HTTP_200_OK
+        return response.json()
+
+    async def test_full_then_delta(self, async_client: AsyncClient):
+        first = await self.create_task(async_client, "First")
+        second = await self.create_task(async_client, "Second")
+
+        full = await self.sync(async_client, 0)
+        assert [task["id"] for task in full["tasks"]] == [first["id"], second["id"]]
+        assert [user["id"] for user in full["users"]] == [self.user_id]
+        assert full["has_more"] is False
+
+        # Без изменений клиент получает пустой ответ с той же версией
+        empty = await self.sync(async_client, full["version"])
+        assert empty == {
+            "version": full["version"], "tasks": [], "users": [],
+            "deleted_tasks": [], "deleted_users": [], "has_more": False,
+        }
+
+        await async_client.put(f"/api/tasks/{second['id']}", headers=self.auth_headers, json={"title": "Renamed"})
+        await async_client.delete(f"/api/tasks/{first['id']}", headers=self.auth_headers)
+
+        delta = await self.sync(async_client, full["version"])
+        assert [task["title"] for task in delta["tasks"]] == ["Renamed"]
+        assert delta["deleted_tasks"] == [first["id"]]
+        assert delta["users"] == []
+        assert delta["version"] > full["version"]
+
+    async def test_assignment_and_time_bump_version(self, async_client: AsyncClient):
+        task = await self.create_task(async_client, "Assign me")
+        version = (await self.sync(async_client, 0))["version"]
+
+        await async_client.put(
+            f"/api/tasks/{task['id']}", headers=self.auth_headers, json={"assignee_ids": [self.user_id]}
+        )
+        delta = await self.sync(async_client, version)
+        assert [t["assignees"][0]["id"] for t in delta["tasks"]] == [self.user_id]
+
+        await async_client.post(f"/api/tasks/{task['id']}/time", headers=self.auth_headers, json={"hours": 1.5})
+        delta = await self.sync(async_client, delta["version"])
+        assert [t["time_spent"] for t in delta["tasks"]] == [1.5]
+
+    async def test_batch_changes_and_paging(self, async_client: AsyncClient):
+        tasks = [await self.create_task(async_client, f"Task {i}") for i in range(3)]
+        version = (await self.sync(async_client, 0))["version"]
+
+        response = await async_client.post(
+            "/api/tasks/batch",
+            headers=self.auth_headers,
+            json={"update": [{"id": tasks[0]["id"], "assignee_ids": [self.user_id]}], "delete": [tasks[1]["id"]]},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        delta = await self.sync(async_client, version)
+        assert [task["id"] for task in delta["tasks"]] == [tasks[0]["id"]]
+        assert delta["deleted_tasks"] == [tasks[1]["id"]]
+
+        page = await self.sync(async_client, 0, limit=2)
+        assert page["has_more"] is True
+        rest = await self.sync(async_client, page["version"])
+        seen = {task["id"] for task in page["tasks"] + rest["tasks"]}
+        assert seen == {tasks[0]["id"], tasks[2]["id"]}
+
+    async def test_equal_versions_stay_in_one_page(self, async_client: AsyncClient, db_session):
+        await self.create_task(async_client, "Before")
+        version = (await self.sync(async_client, 0))["version"]
+        await db_session.execute(insert(Tombstone), [
+            {"entity": "task", "entity_id": entity_id, "change_seq": version + 1} for entity_id in (101, 102)
+        ])
+        await db_session.commit()
+
+        # Обе записи одной версии попадают в порцию, и следующая порция не обещается зря
+        page = await self.sync(async_client, version, limit=1)
+        assert page["deleted_tasks"] == [101, 102]
+        assert (page["version"], page["has_more"]) == (version + 1, False)
+
+        task = await self.create_task(async_client, "After")
+        page = await self.sync(async_client, version, limit=1)
+        assert page["has_more"] is True
+        rest = await self.sync(async_client, page["version"], limit=1)
+        assert ([t["id"] for t in rest["tasks"]], rest["has_more"]) == ([task["id"]], False)
+
+
+class TestChangeSeq:
+    def test_postgres_versions_are_transaction_ids(self):
+        # Без глобальной блокировки: порядок фиксации учитывает граница change_horizon
+        sql = str(next_change_seq().compile(dialect=postgresql.dialect()))
+        assert sql == "pg_current_xact_id()::text::bigint"
+
+    def test_postgres_version_bounded_by_snapshot_xmin(self):
+        sql = str(latest_change_seq().compile(dialect=postgresql.dialect()))
+        assert sql.count("change_seq < pg_snapshot_xmin(pg_current_snapshot())") == 3
+
+
+# Параллельные транзакции нужно проверять на настоящем Postgres; SQLite пишет по одной
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL не задан")
+@pytest.mark.asyncio
+class TestPostgresChangeSeq:
+    """Версии изменений при параллельных транзакциях в Postgres (TEST_POSTGRES_URL)."""
+
+    @pytest.fixture(scope="function")
+    async def pg_session(self):
+        pg_engine = create_async_engine(POSTGRES_URL)
+        async with pg_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(bind=pg_engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_factory() as db:
+            user = User(email="pg@example.com", hashed_password="x")
+            db.add(user)
+            await db.flush()
+            db.add_all([Task(title=f"Task {i}", creator_id=user.id, position=f"a{i}") for i in range(2)])
+            await db.commit()
+        yield session_factory
+        async with pg_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await pg_engine.dispose()
+
+    async def task_ids(self, session_factory):
+        async with session_factory() as db:
+            return (await db.execute(select(Task.id).order_by(Task.id))).scalars().all()
+
+    async def test_move_does_not_deadlock_with_time_update(self, pg_session):
+        moved_id, neighbour_id = await self.task_ids(pg_session)
+        async with pg_session() as mover, pg_session() as logger:
+            # Порядок move_task: сначала FOR UPDATE на соседа, затем запись переносимой карточки
+            await mover.execute(select(Task.id).where(Task.id == neighbour_id).with_for_update())
+            # Списание времени на соседа ждет блокировку строки, которую держит перенос
+            logged = asyncio.create_task(tasks_service.log_time_for_task(logger, neighbour_id, 1.5))
+            await asyncio.sleep(0.2)
+            await mover.execute(update(Task).where(Task.id == moved_id).values(position="a0V"))
+            await mover.commit()
+            task = await asyncio.wait_for(logged, timeout=10)
+        assert task.time_spent == 1.5
+
+    async def test_sync_waits_for_older_transaction(self, pg_session):
+        first_id, second_id = await self.task_ids(pg_session)
+        async with pg_session() as reader:
+            version = (await get_changes(reader, 0)).version
+            await reader.commit()
+        async with pg_session() as older, pg_session() as newer:
+            # older получает меньший id транзакции, но фиксируется позже newer
+            await older.execute(update(Task).where(Task.id == first_id).values(title="Older"))
+            await newer.execute(update(Task).where(Task.id == second_id).values(title="Newer"))
+            await newer.commit()
+            async with pg_session() as reader:
+                delta = await get_changes(reader, version)
+                await reader.commit()
+            # Пока older не зафиксирована, версия newer не отдается: иначе older осталась бы позади
+            assert (delta.version, delta.tasks) == (version, [])
+            await older.commit()
+        async with pg_session() as reader:
+            delta = await get_changes(reader, version)
+        assert sorted(task.title for task in delta.tasks) == ["Newer", "Older"]
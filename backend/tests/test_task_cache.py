@@ -0,0 +1,164 @@
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+
+from app.core.cache import GenerationalCache, MemoryCacheBackend, RedisCacheBackend
+from app.services import task_cache
+from app.services import tasks as tasks_service
+from app.services import users as users_service
+from tests.test_tasks import get_auth_token
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeRedis:
+    """Минимальный Redis для тестов: GET, SET EX, MGET и INCR над словарем."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    cache = GenerationalCache(MemoryCacheBackend(max_size=100, ttl=60), ttl=60)
+    monkeypatch.setattr(task_cache, "task_list_cache", cache)
+    return cache
+
+
+class TestTaskListCache:
+    """Кэш списков задач: повторное чтение без запросов, точечная инвалидация изменениями."""
+
+    @pytest.fixture(scope="function", autouse=True)
+    async def setup_users(self, async_client: AsyncClient, memory_cache):
+        self.cache = memory_cache
+        self.user_ids, self.headers = [], []
+        for i in range(3):
+            email = f"cached{i}@example.com"
+            response = await async_client.post(
+                "/api/users/", json={"email": email, "first_name": "Кэш", "last_name": f"Тест{i}", "password": "password123"}
+            )
+            self.user_ids.append(response.json()["id"])
+            token = await get_auth_token(async_client, email, "password123")
+            self.headers.append({"Authorization": f"Bearer {token}"})
+            await async_client.get("/api/users/me", headers=self.headers[i])
+
+    async def create_task(self, async_client: AsyncClient, assignee_ids) -> dict:
+        response = await async_client.post(
+            "/api/tasks/", headers=self.headers[0],
+            json={"title": "Cached", "type": "development", "assignee_ids": assignee_ids},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        return response.json()
+
+    async def list_tasks(self, async_client: AsyncClient, path: str = "/api/tasks/", user: int = 0) -> list:
+        response = await async_client.get(path, headers=self.headers[user])
+        assert response.status_code == status.HTTP_200_OK
+        return response.json()
+
+    async def test_repeated_list_served_from_cache(self, async_client: AsyncClient, query_counter):
+        task = await self.create_task(async_client, [self.user_ids[1]])
+        first = await self.list_tasks(async_client)
+        query_counter.clear()
+
+        second = await self.list_tasks(async_client)
+        assert second == first
+        assert [item["id"] for item in second] == [task["id"]]
+        # Из базы читается только версия доски для ETag
+        assert [q for q in query_counter if "max(change_seq)" not in q] == []
+        assert self.cache.hits == 1
+
+    async def test_mutations_invalidate_lists(self, async_client: AsyncClient, db_session):
+        task = await self.create_task(async_client, [self.user_ids[1]])
+        assert [item["id"] for item in await self.list_tasks(async_client, "/api/users/me/tasks", user=1)] == [task["id"]]
+
+        response = await async_client.put(
+            f"/api/tasks/{task['id']}", headers=self.headers[1], json={"status": "in_progress"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert (await self.list_tasks(async_client))[0]["status"] == "in_progress"
+
+        await async_client.post(f"/api/tasks/{task['id']}/time", headers=self.headers[1], json={"hours": 2})
+        assert (await self.list_tasks(async_client, "/api/users/me/tasks", user=1))[0]["time_spent"] == 2
+
+        # Снятый с задачи исполнитель больше не видит ее в «моих задачах»
+        await async_client.put(
+            f"/api/tasks/{task['id']}", headers=self.headers[0], json={"assignee_ids": [self.user_ids[2]]}
+        )
+        assert await self.list_tasks(async_client, "/api/users/me/tasks", user=1) == []
+        assert [item["id"] for item in await self.list_tasks(async_client, "/api/users/me/tasks", user=2)] == [task["id"]]
+
+        await users_service.update_avatar(db_session, self.user_ids[2], "uploads/avatars/new.png")
+        assignee = (await self.list_tasks(async_client))[0]["assignees"][0]
+        assert assignee["avatar_url"] == "uploads/avatars/new.png"
+
+        response = await async_client.delete(f"/api/tasks/{task['id']}", headers=self.headers[0])
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert await self.list_tasks(async_client) == []
+        assert await self.list_tasks(async_client, "/api/users/me/tasks", user=2) == []
+
+    async def test_unrelated_changes_keep_other_users_lists(self, async_client: AsyncClient):
+        await self.create_task(async_client, [self.user_ids[1]])
+        await self.list_tasks(async_client, "/api/users/me/tasks", user=2)
+        await self.list_tasks(async_client, "/api/users/me/tasks", user=1)
+
+        await self.create_task(async_client, [self.user_ids[1]])
+        hits = self.cache.hits
+        assert await self.list_tasks(async_client, "/api/users/me/tasks", user=2) == []
+        assert self.cache.hits == hits + 1
+        assert len(await self.list_tasks(async_client, "/api/users/me/tasks", user=1)) == 2
+        assert self.cache.hits == hits + 1
+
+    async def test_rollup_invalidates_lists(self, async_client: AsyncClient, db_session):
+        task = await self.create_task(async_client, [self.user_ids[1]])
+        await self.list_tasks(async_client, "/api/users/me/tasks", user=1)
+        await async_client.post(
+            f"/api/tasks/{task['id']}/time/heartbeat", headers=self.headers[1], json={"hours": 0.5}
+        )
+        await tasks_service.rollup_time_entries(db_session)
+        assert (await self.list_tasks(async_client, "/api/users/me/tasks", user=1))[0]["time_spent"] == 0.5
+
+    async def test_cache_metrics_exposed(self, async_client: AsyncClient):
+        await self.list_tasks(async_client)
+        await self.list_tasks(async_client)
+        metrics = (await async_client.get("/metrics")).text
+        assert "kanban_task_cache_hits_total 1" in metrics
+        assert "kanban_task_cache_misses_total 1" in metrics
+
+
+class TestCacheBackends:
+    async def test_memory_backend_counts_evictions(self):
+        cache = GenerationalCache(MemoryCacheBackend(max_size=2, ttl=60), ttl=60)
+        for key in ("a", "b", "c"):
+            assert await cache.get_or_load(["scope"], key, lambda key=key: _value(key)) == key.encode()
+        assert cache.backend.evictions == 1
+        assert len(cache.backend) == 2
+
+    async def test_redis_backend_shares_invalidation_between_workers(self):
+        redis = FakeRedis()
+        worker_a = GenerationalCache(RedisCacheBackend(client=redis), ttl=60)
+        worker_b = GenerationalCache(RedisCacheBackend(client=redis), ttl=60)
+
+        assert await worker_a.get_or_load(["tasks"], "list", lambda: _value("v1")) == b"v1"
+        assert await worker_b.get_or_load(["tasks"], "list", lambda: _value("v2")) == b"v1"
+        assert worker_b.hits == 1
+
+        await worker_b.invalidate(["tasks"])
+        assert await worker_a.get_or_load(["tasks"], "list", lambda: _value("v3")) == b"v3"
+        assert await worker_a.get_or_load(["other"], "list", lambda: _value("v4")) == b"v4"
+
+
+async def _value(value: str) -> bytes:
+    return value.encode()
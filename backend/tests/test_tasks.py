@@ -1,3 +1,6 @@
+import base64
+import json
+
 import pytest
 from httpx import AsyncClient
 from fastapi import status
@@ -203,4 +206,66 @@ class TestTaskRoutesWithAuth:
         assert update_response.status_code == status.HTTP_200_OK
         updated_task_data = update_response.json()
         assert updated_task_data["title"] == new_title
-        assert updated_task_data["status"] == original_status # Status should remain unchanged
\ No newline at end of file
+        assert updated_task_data["status"] == original_status # Status should remain unchanged
+
+    async def test_cursor_pagination_walks_all_tasks(self, async_client: AsyncClient):
+        for i, priority in enumerate(["low", "high", "medium", "high", "low"]):
+            response = await async_client.post(
+                "/api/tasks/",
+                headers=self.auth_headers,
+                json={"title": f"Paged task {i}", "type": "development", "priority": priority},
+            )
+            assert response.status_code == status.HTTP_201_CREATED
+
+        full_response = await async_client.get("/api/tasks/", headers=self.auth_headers)
+        expected_ids = [task["id"] for task in full_response.json()]
+        assert [task["priority"] for task in full_response.json()] == ["high", "high", "medium", "low", "low"]
+
+        seen_ids = []
+        params = {"limit": 2}
+        while True:
+            page = await async_client.get("/api/tasks/", headers=self.auth_headers, params=params)
+            assert page.status_code == status.HTTP_200_OK
+            seen_ids.extend(task["id"] for task in page.json())
+            next_cursor = page.headers.get("X-Next-Cursor")
+            if not next_cursor:
+                break
+            params = {"limit": 2, "cursor": next_cursor}
+
+        assert seen_ids == expected_ids
+
+    async def test_invalid_cursor_is_rejected(self, async_client: AsyncClient):
+        response = await async_client.get("/api/tasks/", headers=self.auth_headers, params={"cursor": "not-a-cursor"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        # Курсор правильной формы, но с подмененными типами значений
+        for values in (["high", "2024-01-01T00:00:00", 1], [1, 12345, 1], [1, "2024-01-01T00:00:00", "1"]):
+            raw = json.dumps({"s": "priority", "v": values}).encode()
+            cursor = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+            response = await async_client.get("/api/tasks/", headers=self.auth_headers, params={"cursor": cursor})
+            assert response.status_code == status.HTTP_400_BAD_REQUEST, values
+
+    async def test_filter_and_search_tasks(self, async_client: AsyncClient):
+        for title, description, task_type, priority in [
+            ("Fix login form", "Broken 100% of the time", "development", "high"),
+            ("Write release notes", None, "documentation", "low"),
+            ("Regression suite", "Cover the login flow", "testing", "medium"),
+        ]:
+            response = await async_client.post(
+                "/api/tasks/",
+                headers=self.auth_headers,
+                json={"title": title, "description": description, "type": task_type, "priority": priority},
+            )
+            assert response.status_code == status.HTTP_201_CREATED
+
+        async def titles(**params):
+            response = await async_client.get("/api/tasks/", headers=self.auth_headers, params=params)
+            assert response.status_code == status.HTTP_200_OK
+            return [task["title"] for task in response.json()]
+
+        assert await titles(q="LOGIN") == ["Fix login form", "Regression suite"]
+        assert await titles(q="100%") == ["Fix login form"]
+        assert await titles(type=["documentation", "testing"]) == ["Regression suite", "Write release notes"]
+        assert await titles(priority="high") == ["Fix login form"]
+        assert await titles(status="done") == []
+        assert await titles(sort="oldest") == ["Fix login form", "Write release notes", "Regression suite"]
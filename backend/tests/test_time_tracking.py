@@ -0,0 +1,61 @@
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+
+from app.services import tasks as tasks_service
+from tests.test_tasks import get_auth_token
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestTimeTracking:
+    """Тесты учета времени: атомарные списания, heartbeat'ы и rollup."""
+
+    @pytest.fixture(scope="function", autouse=True)
+    async def setup_task(self, async_client: AsyncClient):
+        response = await async_client.post(
+            "/api/users/",
+            json={"email": "timer@example.com", "first_name": "Таймер", "last_name": "Тест", "password": "password123"},
+        )
+        self.user_id = response.json()["id"]
+        token = await get_auth_token(async_client, "timer@example.com", "password123")
+        self.auth_headers = {"Authorization": f"Bearer {token}"}
+        response = await async_client.post(
+            "/api/tasks/", headers=self.auth_headers, json={"title": "Timed task", "type": "development"}
+        )
+        self.task_id = response.json()["id"]
+
+    async def get_time_spent(self, async_client: AsyncClient) -> float:
+        response = await async_client.get(f"/api/tasks/{self.task_id}", headers=self.auth_headers)
+        return response.json()["time_spent"]
+
+    async def test_log_time_increments_and_records_entry(self, async_client: AsyncClient):
+        for hours in (1.5, 2.0):
+            response = await async_client.post(
+                f"/api/tasks/{self.task_id}/time", headers=self.auth_headers, json={"hours": hours}
+            )
+            assert response.status_code == status.HTTP_200_OK
+        assert response.json()["time_spent"] == 3.5
+
+        totals = await async_client.get(f"/api/tasks/{self.task_id}/time", headers=self.auth_headers)
+        assert totals.json() == [{"user_id": self.user_id, "hours": 3.5}]
+
+    async def test_heartbeats_are_applied_once_by_rollup(self, async_client: AsyncClient, db_session):
+        for _ in range(3):
+            response = await async_client.post(
+                f"/api/tasks/{self.task_id}/time/heartbeat", headers=self.auth_headers, json={"hours": 0.25}
+            )
+            assert response.status_code == status.HTTP_202_ACCEPTED
+
+        assert await self.get_time_spent(async_client) == 0.0
+        totals = await async_client.get(f"/api/tasks/{self.task_id}/time", headers=self.auth_headers)
+        assert totals.json() == [{"user_id": self.user_id, "hours": 0.75}]
+
+        assert await tasks_service.rollup_time_entries(db_session) == 3
+        assert await tasks_service.rollup_time_entries(db_session) == 0
+        assert await self.get_time_spent(async_client) == 0.75
+
+    async def test_time_for_missing_task(self, async_client: AsyncClient):
+        for path in ("/api/tasks/9999/time", "/api/tasks/9999/time/heartbeat"):
+            response = await async_client.post(path, headers=self.auth_headers, json={"hours": 1})
+            assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -1,12 +1,21 @@
 import React, { memo } from 'react';
 
+// Для аватаров по хешу содержимого (uploads/avatars/… или files/avatars/…) рядом с оригиналом лежат миниатюры …_64.png
+const avatarThumbnailUrl = (avatarUrl, size = 64) =>
+    avatarUrl.includes('/avatars/') ? avatarUrl.replace(/\.[^./]+$/, `_${size}.png`) : avatarUrl;
+
 const AssigneeAvatar = ({ user }) => (
     <div
         className="w-8 h-8 bg-neutral-300 dark:bg-neutral-700 rounded-full flex items-center justify-center text-xs font-bold text-neutral-700 dark:text-white ring-2 ring-white dark:ring-neutral-800 uppercase"
         title={`${user.first_name} ${user.last_name}`}
     >
         {user.avatar_url ? (
-            <img src={`http://localhost:8000/api/${user.avatar_url}?v=${user.avatar_last_updated || '0'}`} alt="avatar" className="w-full h-full rounded-full object-cover" />
+            <img
+                src={`http://localhost:8000/api/${avatarThumbnailUrl(user.avatar_url)}`}
+                onError={(event) => { event.currentTarget.onerror = null; event.currentTarget.src = `http://localhost:8000/api/${user.avatar_url}`; }}
+                alt="avatar"
+                className="w-full h-full rounded-full object-cover"
+            />
         ) : (
             `${user.first_name.charAt(0)}${user.last_name.charAt(0)}`
         )}
@@ -27,7 +27,7 @@ const KanbanBoardPage = () => {
     const fetchTasks = useCallback(async () => {
         setLoading(true);
         try {
-            const response = await api.get('/tasks/');
+            const response = await api.get('/tasks/', { params: { sort: 'position' } });
             setTasks(response.data);
         } catch (err) {
             setError('Не удалось загрузить задачи.');
@@ -82,13 +82,27 @@ const KanbanBoardPage = () => {
         const newStatus = destination.droppableId;
         const currentTasks = tasks;
 
-        const updatedTasks = tasks.map(task =>
-            task.id === taskId ? { ...task, status: newStatus } : task
-        );
+        // Соседи в целевой колонке (задачи уже отсортированы по position)
+        const movedTask = tasks.find(task => task.id === taskId);
+        const remaining = tasks.filter(task => task.id !== taskId);
+        const columnTasks = remaining.filter(task => task.status === newStatus);
+        const after = columnTasks[destination.index - 1];
+        const before = columnTasks[destination.index];
+
+        const updatedTasks = [...remaining];
+        const insertAt = before
+            ? updatedTasks.indexOf(before)
+            : after ? updatedTasks.indexOf(after) + 1 : updatedTasks.length;
+        updatedTasks.splice(insertAt, 0, { ...movedTask, status: newStatus });
         setTasks(updatedTasks);
 
         try {
-            await api.put(`/tasks/${taskId}`, { status: newStatus });
+            const response = await api.post(`/tasks/${taskId}/move`, {
+                status: newStatus,
+                after_id: after ? after.id : null,
+                before_id: before ? before.id : null,
+            });
+            setTasks(prevTasks => prevTasks.map(task => task.id === taskId ? response.data : task));
         } catch (err) {
             console.error("Failed to update task status:", err); // Keep console.error
             if (err.response && err.response.status === 403 && err.response.data && err.response.data.detail) {